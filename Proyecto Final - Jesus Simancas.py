@@ -1,27 +1,247 @@
-import requests  # Importa la librería requests para hacer solicitudes HTTP
 import json  # Importa la librería json para manejar datos en formato JSON
 import urllib.request  # Importa urllib para hacer solicitudes HTTP
+import urllib.error  # Importa los errores de urllib
+import pathlib  # Importa pathlib para convertir rutas locales en URLs
+import concurrent.futures  # Importa concurrent.futures para descargar los catálogos en paralelo
 import random  # Importa la librería random para generar valores aleatorios
 import string  # Importa la librería string para manejar cadenas de texto
 import os  # Importa la librería os para interactuar con el sistema operativo
-import matplotlib.pyplot as plt  # Importa pyplot de matplotlib para crear gráficos
-from bokeh.plotting import figure, show  # Importa figure y show de bokeh para crear gráficos interactivos
+import math  # Importa la librería math para cálculos numéricos
+import time  # Importa la librería time para registrar la fecha de las operaciones
+import sqlite3  # Importa sqlite3 para guardar las ventas en disco
+import contextlib  # Importa contextlib para agrupar operaciones en lotes
+import csv  # Importa csv para leer pedidos en lote
+import itertools  # Importa itertools para leer los pedidos por bloques
+import threading  # Importa threading para proteger los datos compartidos entre taquillas
+import collections  # Importa collections para contar las ventas
+import heapq  # Importa heapq para obtener los más vendidos sin ordenar todo
+import operator  # Importa operator para ordenar por cantidad
+import bisect  # Importa bisect para buscar en listas ordenadas
+import unicodedata  # Importa unicodedata para quitar acentos en las búsquedas
+import sys  # Importa la librería sys para manejar la salida del programa
+import argparse  # Importa argparse para leer las opciones de la línea de comandos
+import subprocess  # Importa subprocess para medir la importación en un intérprete nuevo
+import statistics  # Importa statistics para resumir las mediciones
+import tempfile  # Importa tempfile para generar datos de prueba en un directorio temporal
+import tracemalloc  # Importa tracemalloc para medir la memoria máxima de cada operación
+import datetime  # Importa datetime para generar las fechas de los partidos de prueba
+import functools  # Importa functools para conservar el nombre de las funciones medidas
+import atexit  # Importa atexit para guardar las métricas al salir
+import cProfile  # Importa cProfile para perfilar una sesión completa
+import pstats  # Importa pstats para resumir el perfil de la sesión
+import asyncio  # Importa asyncio para atender muchas taquillas remotas a la vez
+import secrets  # Importa secrets para generar los códigos de las retenciones
+import urllib.parse  # Importa urllib.parse para leer las rutas y consultas del servicio
+import hashlib  # Importa hashlib para separar la copia local de cada fuente de datos
+# matplotlib y bokeh se importan al dibujar el primer gráfico para que el programa arranque más rápido
+# numpy se importa al armar el reporte de cierre por la misma razón
+
+URL_BASE_DATOS = "https://raw.githubusercontent.com/Algoritmos-y-Programacion/api-proyecto/main/"  # URL base de los catálogos
+DIRECTORIO_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache_datos")  # Directorio con una copia local de los catálogos por cada fuente
+RUTA_VENTAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ventas.db")  # Base de datos donde se guardan las ventas
+VERSION_ESTADO = 1  # Versión del formato de exportación del estado
+TIEMPO_ESPERA_DESCARGA = 10  # Segundos de espera máxima por cada descarga
+CATALOGOS = {"equipos": "teams.json", "estadios": "stadiums.json", "partidos": "matches.json"}  # Archivo de cada catálogo
+CAMPOS_CATALOGOS = {  # Campos obligatorios de cada catálogo
+    "equipos": ("id", "code", "name", "group"),
+    "estadios": ("id", "name", "city", "capacity", "restaurants"),
+    "partidos": ("id", "number", "home", "away", "date", "group", "stadium_id"),
+}
+ASIENTOS_POR_FILA = 10  # Cantidad de asientos por fila en cada sección del estadio
+FILAS_MAPA_VISIBLES = 10  # Cantidad de filas que se muestran del mapa del estadio
+TIEMPO_RETENCION = 300  # Segundos que un asiento queda apartado mientras se paga
+UMBRAL_STOCK_BAJO = 5  # Stock a partir del cual se avisa que un producto se está agotando
+TAMANO_BLOQUE_PEDIDOS = 1000  # Cantidad de pedidos que se procesan y guardan juntos en la venta masiva
+FORMATOS_GRAFICOS = ("png", "svg", "html")  # Formatos de archivo para los gráficos sin ventana
+TAMANOS_BENCHMARK = (50, 500, 5000)  # Cantidades de partidos de los datos de prueba del benchmark
+TAMANO_PAGINA = 10  # Cantidad de resultados por página en las búsquedas de productos
+TOP_COMPRADORES = 3  # Cantidad de personas que más boletos compraron que se mantienen al momento de cada venta
+OPCIONES_MENU = ("1", "2", "3", "4", "5", "6", "7", "8")  # Opciones válidas del menú principal
+SERVICIO_PREDETERMINADO = "127.0.0.1:8080"  # Dirección donde escucha el servicio de taquilla
+TAMANO_MAXIMO_SOLICITUD = 1 << 20  # Bytes máximos del cuerpo de una solicitud al servicio
+LIMITES_HISTOGRAMA = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 60)  # Límites en segundos de los histogramas de duración
+BOLETO_VALIDO = "valido"  # Estado de un boleto que entra por primera vez
+BOLETO_USADO = "usado"  # Estado de un boleto que ya se había usado
+BOLETO_INVALIDO = "invalido"  # Estado de un boleto que no existe
+
+NUMEROS_PERFECTOS = (6, 28, 496, 8128, 33550336, 8589869056, 137438691328, 2305843008139952128)  # Números perfectos conocidos hasta 2**63
+
+cache_vampiros = {}  # Resultados ya calculados de es_numero_vampiro por cédula
+cache_perfectos = {}  # Resultados ya calculados de es_numero_perfecto por cédula
+
+# Define la clase Histograma para acumular las duraciones de una operación
+class Histograma:
+    def __init__(self, limites=LIMITES_HISTOGRAMA):  # Constructor de la clase
+        self.limites = limites  # Asigna los límites de los intervalos
+        self.cubetas = [0] * (len(limites) + 1)  # Cantidad de mediciones en cada intervalo (la última es +Inf)
+        self.suma = 0.0  # Suma de las duraciones
+        self.cantidad = 0  # Cantidad de mediciones
+
+    def observar(self, segundos):  # Método para agregar una duración
+        self.cubetas[bisect.bisect_left(self.limites, segundos)] += 1  # Cuenta la duración en su intervalo
+        self.suma += segundos  # Suma la duración
+        self.cantidad += 1  # Cuenta la medición
+
+    def acumuladas(self):  # Método para obtener las cantidades acumuladas por límite, como las usa Prometheus
+        return list(zip([*self.limites, "+Inf"], itertools.accumulate(self.cubetas)))  # Devuelve pares (límite, acumulado)
+
+# Define la clase Instrumentacion para medir duraciones y contar eventos del sistema
+class Instrumentacion:
+    def __init__(self):  # Constructor de la clase
+        self.activa = False  # Las mediciones están apagadas hasta que se activen
+        self.histogramas = {}  # Histograma de duración por operación
+        self.contadores = collections.Counter()  # Cantidad de eventos por nombre
+        self.candado = threading.Lock()  # Candado para las taquillas que miden a la vez
+        self.ruta = None  # Archivo donde se guardan las métricas al salir
+
+    def activar(self, ruta=None):  # Método para encender las mediciones
+        self.activa = True  # Enciende las mediciones
+        if ruta and self.ruta is None:  # Si se indicó un archivo por primera vez
+            atexit.register(lambda: self.guardar(self.ruta))  # Guarda las métricas al salir del programa
+        self.ruta = ruta or self.ruta  # Asigna el archivo de métricas
+
+    def observar(self, nombre, segundos):  # Método para registrar la duración de una operación
+        with self.candado:  # Toma el candado
+            if nombre not in self.histogramas:  # Si es la primera medición de la operación
+                self.histogramas[nombre] = Histograma()  # Crea su histograma
+            self.histogramas[nombre].observar(segundos)  # Agrega la duración
+
+    def contar(self, nombre, cantidad=1):  # Método para contar un evento
+        if self.activa:  # Solo cuenta si las mediciones están encendidas
+            with self.candado:  # Toma el candado
+                self.contadores[nombre] += cantidad  # Suma el evento
+
+    def medir(self, nombre=None):  # Método que devuelve un decorador para medir una función
+        def decorador(funcion):  # Decorador de la función
+            etiqueta = nombre or funcion.__qualname__  # Nombre de la operación
+
+            @functools.wraps(funcion)
+            def envoltura(*args, **kwargs):  # Función que mide la llamada
+                if not self.activa:  # Si las mediciones están apagadas
+                    return funcion(*args, **kwargs)  # Llama a la función sin medir
+                inicio = time.perf_counter()  # Momento de inicio
+                try:
+                    return funcion(*args, **kwargs)  # Llama a la función
+                finally:
+                    self.observar(etiqueta, time.perf_counter() - inicio)  # Registra la duración aunque falle
+            return envoltura  # Devuelve la función medida
+        return decorador  # Devuelve el decorador
+
+    def cronometro(self, nombre):  # Método para medir un bloque con with
+        return self.medir_bloque(nombre) if self.activa else contextlib.nullcontext()  # No mide si están apagadas
+
+    @contextlib.contextmanager
+    def medir_bloque(self, nombre):  # Método que mide la duración de un bloque
+        inicio = time.perf_counter()  # Momento de inicio
+        try:
+            yield  # Ejecuta el bloque
+        finally:
+            self.observar(nombre, time.perf_counter() - inicio)  # Registra la duración
+
+    def a_diccionario(self):  # Método para exportar las métricas como diccionario JSON
+        with self.candado:  # Toma el candado
+            return {  # Devuelve las métricas
+                "contadores": dict(self.contadores),  # Cantidad de cada evento
+                "duraciones": {nombre: {"cantidad": h.cantidad, "suma": h.suma, "cubetas": {str(limite): n for limite, n in h.acumuladas()}} for nombre, h in self.histogramas.items()},  # Histogramas
+            }
+
+    def a_prometheus(self):  # Método para exportar las métricas en el formato de texto de Prometheus
+        lineas = ["# HELP eurocopa_eventos_total Cantidad de eventos del sistema.", "# TYPE eurocopa_eventos_total counter"]  # Encabezado de los contadores
+        with self.candado:  # Toma el candado
+            for nombre, cantidad in sorted(self.contadores.items()):  # Recorre los contadores
+                lineas.append(f'eurocopa_eventos_total{{evento="{nombre}"}} {cantidad}')  # Línea del contador
+            lineas += ["# HELP eurocopa_duracion_segundos Duración de las operaciones.", "# TYPE eurocopa_duracion_segundos histogram"]  # Encabezado de los histogramas
+            for nombre, histograma in sorted(self.histogramas.items()):  # Recorre los histogramas
+                for limite, acumulado in histograma.acumuladas():  # Recorre los intervalos
+                    lineas.append(f'eurocopa_duracion_segundos_bucket{{operacion="{nombre}",le="{limite}"}} {acumulado}')  # Línea del intervalo
+                lineas.append(f'eurocopa_duracion_segundos_sum{{operacion="{nombre}"}} {histograma.suma}')  # Suma de las duraciones
+                lineas.append(f'eurocopa_duracion_segundos_count{{operacion="{nombre}"}} {histograma.cantidad}')  # Cantidad de mediciones
+        return "\n".join(lineas) + "\n"  # Devuelve el texto
+
+    def guardar(self, ruta):  # Método para guardar las métricas en JSON o en texto de Prometheus según la extensión
+        contenido = json.dumps(self.a_diccionario(), indent=2) if ruta.lower().endswith(".json") else self.a_prometheus()  # Elige el formato
+        with open(ruta + ".tmp", "w", encoding="utf-8") as archivo:  # Escribe en un archivo temporal
+            archivo.write(contenido)  # Guarda las métricas
+        os.replace(ruta + ".tmp", ruta)  # Reemplaza el archivo anterior de forma atómica
+        return ruta  # Devuelve la ruta del archivo
+
+metricas = Instrumentacion()  # Mediciones del programa, apagadas por defecto
 
 # Define la clase Cliente para almacenar datos de los clientes
 class Cliente:
-    def __init__(self, nombre, cedula, edad, tipo_entrada, nombre_estadio):  # Constructor de la clase
+    def __init__(self, nombre, cedula, edad, tipo_entrada, nombre_estadio, id_boleto=None, partido_id=None, asiento=None, total=0.0):  # Constructor de la clase
         self.nombre = nombre  # Asigna el nombre
         self.cedula = cedula  # Asigna la cédula
         self.edad = edad  # Asigna la edad
         self.tipo_entrada = tipo_entrada  # Asigna el tipo de entrada
         self.nombre_estadio = nombre_estadio  # Asigna el nombre del estadio
-        self.id_boleto = self.generar_id_boleto()  # Genera un ID de boleto
+        self.id_boleto = id_boleto or self.generar_id_boleto()  # Usa el ID emitido por el registro o genera uno
+        self.partido_id = partido_id  # Asigna el ID del partido
+        self.asiento = asiento  # Asigna el índice del asiento dentro de su sección
+        self.total = total  # Asigna el monto pagado por el boleto
 
-    def generar_id_boleto(self):  # Método para generar un ID de boleto
+    @staticmethod
+    def generar_id_boleto():  # Método para generar un ID de boleto
         caracteres = string.ascii_letters + string.digits  # Define los caracteres permitidos
         id_boleto = ''.join(random.choice(caracteres) for _ in range(8))  # Genera una cadena aleatoria de 8 caracteres
         return id_boleto  # Devuelve el ID del boleto
 
+# Define la clase RegistroBoletos para emitir, indexar y validar los boletos vendidos
+class RegistroBoletos:
+    def __init__(self):  # Constructor de la clase
+        self.clientes = []  # Lista de clientes en orden de venta
+        self.por_id = {}  # Índice de clientes por ID de boleto
+        self.emitidos = set()  # IDs emitidos, vendidos o no
+        self.asistencias = {}  # Cantidad de veces que se escaneó cada boleto
+        self.candado = threading.Lock()  # Candado para emitir IDs desde varias taquillas
+
+    def emitir_id(self):  # Método para emitir un ID de boleto que no se haya usado
+        while True:  # Repite hasta encontrar un ID libre
+            id_boleto = Cliente.generar_id_boleto()  # Genera un ID aleatorio
+            with self.candado:  # Verifica y marca el ID en un solo paso
+                if id_boleto not in self.emitidos:  # Verifica que no se haya emitido antes
+                    self.emitidos.add(id_boleto)  # Marca el ID como emitido
+                    return id_boleto  # Devuelve el ID
+
+    def registrar(self, cliente):  # Método para registrar un boleto vendido
+        if cliente.id_boleto in self.por_id:  # Verifica que el ID no esté registrado
+            raise ValueError(f"El boleto {cliente.id_boleto} ya está registrado")  # Error si el ID está repetido
+        self.emitidos.add(cliente.id_boleto)  # Marca el ID como emitido
+        self.por_id[cliente.id_boleto] = cliente  # Indexa el boleto
+        self.clientes.append(cliente)  # Añade el cliente a la lista
+
+    def buscar(self, id_boleto):  # Método para buscar un boleto en O(1)
+        return self.por_id.get(id_boleto)  # Devuelve el cliente o None
+
+    def validar(self, id_boleto):  # Método para validar un boleto en la entrada y registrar la asistencia
+        cliente = self.por_id.get(id_boleto)  # Busca el boleto
+        if cliente is None:  # Verifica si el boleto existe
+            return BOLETO_INVALIDO, None  # El boleto es falso
+        usos = self.asistencias.get(id_boleto, 0)  # Veces que ya se escaneó el boleto
+        self.asistencias[id_boleto] = usos + 1  # Registra el escaneo
+        return (BOLETO_VALIDO if usos == 0 else BOLETO_USADO), cliente  # Devuelve el estado y el cliente
+
+    def validar_lote(self, ids_boletos, validar=None):  # Método para validar muchos boletos escaneados
+        validar = validar or self.validar  # Usa la validación indicada o la del registro
+        resumen = {BOLETO_VALIDO: 0, BOLETO_USADO: [], BOLETO_INVALIDO: []}  # Inicializa el resumen
+        for id_boleto in ids_boletos:  # Recorre los IDs escaneados
+            id_boleto = id_boleto.strip()  # Elimina espacios y saltos de línea
+            if not id_boleto:  # Ignora las líneas vacías
+                continue  # Siguiente ID
+            estado, _ = validar(id_boleto)  # Valida el boleto
+            if estado == BOLETO_VALIDO:  # Si el boleto es válido
+                resumen[BOLETO_VALIDO] += 1  # Cuenta el boleto válido
+            else:
+                resumen[estado].append(id_boleto)  # Guarda el boleto repetido o falso
+        return resumen  # Devuelve el resumen
+
+    def validar_archivo(self, ruta, validar=None):  # Método para validar un archivo con un ID escaneado por línea
+        with open(ruta, encoding="utf-8") as archivo:  # Abre el archivo
+            return self.validar_lote(archivo, validar)  # Valida las líneas sin cargar todo el archivo
+
+    def asistentes(self):  # Método para contar las personas que ya entraron
+        return len(self.asistencias)  # Devuelve la cantidad de boletos escaneados
+
 # Define la clase Equipo para almacenar datos de los equipos
 class Equipo:
     def __init__(self, id, code, name, group):  # Constructor de la clase
@@ -30,6 +250,238 @@ class Equipo:
         self.name = name  # Asigna el nombre
         self.group = group  # Asigna el grupo
 
+# Define la clase Retencion para guardar un asiento apartado mientras se completa el pago
+class Retencion:
+    def __init__(self, seccion, indice, cantidad, expira):  # Constructor de la clase
+        self.seccion = seccion  # Asigna la sección
+        self.indice = indice  # Asigna el índice del primer asiento
+        self.cantidad = cantidad  # Asigna la cantidad de asientos contiguos
+        self.expira = expira  # Asigna el momento en que vence la retención
+
+# Define la clase MapaAsientos para manejar los asientos de un partido de forma compacta
+class MapaAsientos:
+    LIBRE = 0  # Valor de un asiento disponible
+    OCUPADO = 1  # Valor de un asiento ocupado
+    RETENIDO = 2  # Valor de un asiento apartado mientras se paga
+
+    def __init__(self, capacidad_general, capacidad_vip, asientos_por_fila=ASIENTOS_POR_FILA):  # Constructor de la clase
+        self.asientos_por_fila = asientos_por_fila  # Asigna la cantidad de asientos por fila
+        self.secciones = {"General": bytearray(capacidad_general), "VIP": bytearray(capacidad_vip)}  # Un byte por asiento en cada sección
+        self.libres = {"General": capacidad_general, "VIP": capacidad_vip}  # Contadores de asientos libres por sección
+        self.siguiente = {"General": 0, "VIP": 0}  # Posición desde donde buscar el próximo asiento libre
+        self.candados = {"General": threading.Lock(), "VIP": threading.Lock()}  # Un candado por sección
+        self.retenciones = {"General": [], "VIP": []}  # Montículo de retenciones por fecha de vencimiento
+
+    def capacidad(self, seccion):  # Método para obtener la capacidad de una sección
+        return len(self.secciones[seccion])  # Devuelve la cantidad de asientos de la sección
+
+    def disponibles(self, seccion):  # Método para obtener los asientos libres de una sección en O(1)
+        return self.libres[seccion]  # Devuelve el contador de asientos libres
+
+    def filas(self, seccion):  # Método para obtener la cantidad de filas de una sección
+        return -(-self.capacidad(seccion) // self.asientos_por_fila)  # Redondea hacia arriba la división
+
+    def indice(self, fila, columna):  # Método para convertir fila y columna (desde 1) en un índice
+        return (fila - 1) * self.asientos_por_fila + (columna - 1)  # Devuelve el índice del asiento
+
+    def posicion(self, indice):  # Método para convertir un índice en fila y columna (desde 1)
+        return indice // self.asientos_por_fila + 1, indice % self.asientos_por_fila + 1  # Devuelve la fila y la columna
+
+    def es_valido(self, seccion, indice):  # Método para verificar si un índice existe en la sección
+        return 0 <= indice < self.capacidad(seccion)  # Verifica los límites de la sección
+
+    def esta_libre(self, seccion, indice):  # Método para verificar si un asiento está libre
+        return self.secciones[seccion][indice] == self.LIBRE  # Compara el byte del asiento
+
+    def vencer_retenciones(self, seccion, ahora=None):  # Método para liberar las retenciones vencidas (con el candado tomado)
+        ahora = time.monotonic() if ahora is None else ahora  # Momento actual
+        retenciones = self.retenciones[seccion]  # Montículo de retenciones de la sección
+        while retenciones and retenciones[0][0] <= ahora:  # Mientras la más próxima esté vencida
+            _, _, retencion = heapq.heappop(retenciones)  # Saca la retención vencida
+            if retencion.expira is not None:  # Si no fue confirmada ni cancelada
+                self.soltar(retencion)  # Libera sus asientos
+
+    def soltar(self, retencion):  # Método para devolver los asientos de una retención (con el candado tomado)
+        inicio, fin = retencion.indice, retencion.indice + retencion.cantidad  # Rango de asientos
+        self.secciones[retencion.seccion][inicio:fin] = bytes(retencion.cantidad)  # Marca los asientos como libres
+        self.libres[retencion.seccion] += retencion.cantidad  # Actualiza el contador de libres
+        self.siguiente[retencion.seccion] = min(self.siguiente[retencion.seccion], inicio)  # Permite volver a encontrarlos
+        retencion.expira = None  # Marca la retención como terminada
+
+    def buscar_libre(self, seccion):  # Método para encontrar el próximo asiento libre (con el candado tomado)
+        if self.libres[seccion] == 0:  # Verifica si la sección está llena
+            return None  # No hay asientos libres
+        asientos = self.secciones[seccion]  # Obtiene los asientos de la sección
+        indice = asientos.find(self.LIBRE, self.siguiente[seccion])  # Busca desde la última posición conocida
+        if indice == -1:  # Si no encuentra, busca desde el principio
+            indice = asientos.find(self.LIBRE)  # Busca desde el inicio
+        self.siguiente[seccion] = indice  # Guarda la posición para la próxima búsqueda
+        return indice  # Devuelve el índice del asiento libre
+
+    def buscar_bloque_libre(self, seccion, cantidad):  # Método para encontrar un bloque contiguo en una misma fila (con el candado tomado)
+        if cantidad < 1 or cantidad > self.asientos_por_fila or self.libres[seccion] < cantidad:  # Verifica si el bloque es posible
+            return None  # No se puede ubicar el bloque
+        asientos = self.secciones[seccion]  # Obtiene los asientos de la sección
+        patron = bytes(cantidad)  # Crea un patrón de asientos libres contiguos
+        inicio = asientos.find(patron)  # Busca el primer bloque libre
+        while inicio != -1:  # Mientras encuentre bloques
+            fin_fila = (inicio // self.asientos_por_fila + 1) * self.asientos_por_fila  # Calcula el final de la fila
+            if inicio + cantidad <= fin_fila:  # Verifica que el bloque no cruce de fila
+                return inicio  # Devuelve el inicio del bloque
+            inicio = asientos.find(patron, fin_fila)  # Continúa en la fila siguiente
+        return None  # No hay bloques disponibles
+
+    def marcar(self, seccion, indice, cantidad, valor):  # Método para ocupar o retener asientos libres (con el candado tomado)
+        asientos = self.secciones[seccion]  # Obtiene los asientos de la sección
+        if indice < 0 or indice + cantidad > len(asientos) or asientos.count(self.LIBRE, indice, indice + cantidad) != cantidad:  # Verifica que todos estén libres
+            return False  # No se pudo marcar
+        asientos[indice:indice + cantidad] = bytes([valor]) * cantidad  # Marca los asientos
+        self.libres[seccion] -= cantidad  # Actualiza el contador de libres
+        return True  # Marcado exitoso
+
+    def siguiente_libre(self, seccion):  # Método para encontrar el próximo asiento libre
+        with self.candados[seccion]:  # Toma el candado de la sección
+            self.vencer_retenciones(seccion)  # Libera las retenciones vencidas
+            return self.buscar_libre(seccion)  # Devuelve el índice del asiento libre
+
+    def buscar_bloque(self, seccion, cantidad):  # Método para encontrar un bloque de asientos contiguos en una misma fila
+        with self.candados[seccion]:  # Toma el candado de la sección
+            self.vencer_retenciones(seccion)  # Libera las retenciones vencidas
+            return self.buscar_bloque_libre(seccion, cantidad)  # Devuelve el inicio del bloque
+
+    def reservar(self, seccion, indice, cantidad=1):  # Método para ocupar uno o varios asientos contiguos
+        with self.candados[seccion]:  # Toma el candado de la sección
+            self.vencer_retenciones(seccion)  # Libera las retenciones vencidas
+            return self.marcar(seccion, indice, cantidad, self.OCUPADO)  # Ocupa los asientos si están libres
+
+    def retener(self, seccion, indice=None, cantidad=1, duracion=TIEMPO_RETENCION):  # Método para apartar asientos mientras se paga
+        with self.candados[seccion]:  # Toma el candado de la sección
+            self.vencer_retenciones(seccion)  # Libera las retenciones vencidas
+            if indice is None:  # Si no se indicó el asiento
+                indice = self.buscar_libre(seccion) if cantidad == 1 else self.buscar_bloque_libre(seccion, cantidad)  # Busca asientos libres
+            if indice is None or not self.marcar(seccion, indice, cantidad, self.RETENIDO):  # Intenta apartar los asientos
+                return None  # No se pudieron apartar
+            retencion = Retencion(seccion, indice, cantidad, time.monotonic() + duracion)  # Crea la retención
+            heapq.heappush(self.retenciones[seccion], (retencion.expira, id(retencion), retencion))  # La agenda para vencer
+            return retencion  # Devuelve la retención
+
+    def confirmar(self, retencion):  # Método para convertir una retención en asientos ocupados
+        with self.candados[retencion.seccion]:  # Toma el candado de la sección
+            self.vencer_retenciones(retencion.seccion)  # Libera las retenciones vencidas
+            if retencion.expira is None:  # Si la retención venció o fue cancelada
+                return False  # No se puede confirmar
+            inicio, fin = retencion.indice, retencion.indice + retencion.cantidad  # Rango de asientos
+            self.secciones[retencion.seccion][inicio:fin] = bytes([self.OCUPADO]) * retencion.cantidad  # Marca los asientos como ocupados
+            retencion.expira = None  # Marca la retención como terminada
+            return True  # Confirmación exitosa
+
+    def cancelar(self, retencion):  # Método para devolver los asientos de una retención que no se pagó
+        with self.candados[retencion.seccion]:  # Toma el candado de la sección
+            if retencion.expira is not None:  # Si la retención sigue vigente
+                self.soltar(retencion)  # Libera sus asientos
+
+    def liberar(self, seccion, indice, cantidad=1):  # Método para liberar uno o varios asientos ocupados
+        with self.candados[seccion]:  # Toma el candado de la sección
+            asientos = self.secciones[seccion]  # Obtiene los asientos de la sección
+            for i in range(indice, indice + cantidad):  # Recorre los asientos a liberar
+                if asientos[i] == self.OCUPADO:  # Solo libera los que estaban ocupados
+                    asientos[i] = self.LIBRE  # Marca el asiento como libre
+                    self.libres[seccion] += 1  # Actualiza el contador de libres
+            self.siguiente[seccion] = min(self.siguiente[seccion], indice)  # Permite volver a encontrar los asientos liberados
+            return True  # Liberación exitosa
+
+    def describir(self, seccion, indice):  # Método para describir un asiento como texto
+        fila, columna = self.posicion(indice)  # Obtiene la fila y la columna
+        return f"{seccion} Fila {fila}, Columna {columna}"  # Devuelve la descripción del asiento
+
+    def dibujar(self, seccion, fila_inicial=1, cantidad_filas=FILAS_MAPA_VISIBLES):  # Método para dibujar una parte del mapa
+        asientos = self.secciones[seccion]  # Obtiene los asientos de la sección
+        lineas = []  # Inicializa las líneas del mapa
+        for fila in range(fila_inicial, min(fila_inicial + cantidad_filas, self.filas(seccion) + 1)):  # Recorre las filas visibles
+            inicio = (fila - 1) * self.asientos_por_fila  # Calcula el inicio de la fila
+            fila_asientos = asientos[inicio:inicio + self.asientos_por_fila]  # Obtiene los asientos de la fila
+            lineas.append(f"{fila:>5} " + " ".join("O" if a == self.LIBRE else "X" for a in fila_asientos))  # Dibuja la fila
+        return "\n".join(lineas)  # Devuelve el mapa como texto
+
+# Define la excepción StockInsuficiente para las compras que superan el inventario
+class StockInsuficiente(ValueError):
+    pass
+
+# Define la clase ReservaInventario para apartar los productos de una compra mientras se paga
+class ReservaInventario:
+    def __init__(self, inventario, lineas):  # Constructor de la clase
+        self.inventario = inventario  # Asigna el inventario del estadio
+        self.lineas = lineas  # Asigna las líneas (producto, cantidad)
+        self.activa = True  # La reserva sigue pendiente hasta confirmarla o cancelarla
+
+    def subtotal(self):  # Método para calcular el precio con IVA de la reserva
+        return sum(entrada.producto.price * cantidad for entrada, cantidad in self.lineas)  # Suma el precio de cada línea
+
+# Define la clase InventarioEstadio para manejar el stock de los restaurantes de un estadio
+class InventarioEstadio:
+    def __init__(self, estadio, indice, umbral=UMBRAL_STOCK_BAJO):  # Constructor de la clase
+        self.estadio = estadio  # Asigna el estadio
+        self.indice = indice  # Índice de productos del catálogo, usado para buscar en O(1)
+        self.umbral = umbral  # Stock a partir del cual se avisa que queda poco
+        self.apartados = collections.Counter()  # Unidades apartadas por reservas pendientes
+        self.alertas = []  # Avisos de stock bajo sin mostrar
+        self.candado = threading.RLock()  # Candado compartido por las cajas del estadio
+
+    @staticmethod
+    def clave(entrada):  # Método para obtener la clave de un producto en el inventario
+        return entrada.restaurante.name, normalizar_texto(entrada.producto.name)  # Devuelve el restaurante y el nombre
+
+    def disponible(self, entrada):  # Método para obtener las unidades que se pueden vender de un producto
+        return entrada.producto.stock - self.apartados[self.clave(entrada)]  # Resta las unidades apartadas
+
+    def producto(self, nombre, cantidad=1, restaurante=None):  # Método para buscar un producto en O(1)
+        if restaurante is not None:  # Si se indicó el restaurante
+            return self.indice.producto_en(self.estadio, restaurante, nombre)  # Devuelve el producto de ese restaurante
+        entradas = self.indice.productos(nombre, self.estadio)  # Productos del estadio con ese nombre
+        return next((e for e in entradas if self.disponible(e) >= cantidad), entradas[0] if entradas else None)  # Prefiere el que tenga stock
+
+    def reservar(self, lineas):  # Método para apartar todos los productos de una compra o ninguno
+        pedidas = collections.Counter()  # Unidades pedidas por producto
+        entradas = {}  # Entrada de cada producto pedido
+        for entrada, cantidad in lineas:  # Recorre las líneas
+            if cantidad < 1:  # Verifica la cantidad
+                raise ValueError(f"Cantidad inválida para {entrada.producto.name}: {cantidad}")  # Error si la cantidad es inválida
+            pedidas[self.clave(entrada)] += cantidad  # Acumula las unidades del producto
+            entradas[self.clave(entrada)] = entrada  # Guarda la entrada
+        with self.candado:  # Ninguna otra caja cambia el stock mientras se revisa
+            for clave, cantidad in pedidas.items():  # Revisa cada producto
+                if self.disponible(entradas[clave]) < cantidad:  # Si no alcanza el stock
+                    metricas.contar("reserva_sin_stock")  # Cuenta la reserva rechazada
+                    raise StockInsuficiente(f"Stock insuficiente de {entradas[clave].producto.name} en {clave[0]}: quedan {self.disponible(entradas[clave])}")  # No se aparta nada
+            self.apartados.update(pedidas)  # Aparta todas las unidades
+        return ReservaInventario(self, list(lineas))  # Devuelve la reserva
+
+    def soltar(self, reserva):  # Método para devolver las unidades apartadas de una reserva
+        with self.candado:  # Toma el candado del inventario
+            if not reserva.activa:  # Si la reserva ya terminó
+                return False  # No hay nada que devolver
+            for entrada, cantidad in reserva.lineas:  # Recorre las líneas
+                self.apartados[self.clave(entrada)] -= cantidad  # Devuelve las unidades apartadas
+            reserva.activa = False  # Marca la reserva como terminada
+            return True  # Devolución exitosa
+
+    def cancelar(self, reserva):  # Método para cancelar una reserva sin vender nada
+        return self.soltar(reserva)  # Devuelve las unidades al inventario
+
+    def descontar(self, productos):  # Método para reducir el stock de los productos vendidos
+        with self.candado:  # Toma el candado del inventario
+            for linea in productos:  # Recorre las líneas vendidas
+                entrada = self.indice.producto_en(self.estadio, linea["restaurante"], linea["nombre"])  # Busca el producto
+                antes = entrada.producto.stock  # Stock antes de la venta
+                entrada.producto.stock -= linea["cantidad"]  # Reduce el stock
+                if antes > self.umbral >= entrada.producto.stock:  # Si el stock acaba de bajar del umbral
+                    self.alertas.append(f"Stock bajo: {entrada.producto.name} en {entrada.restaurante.name} ({self.estadio.name}), quedan {entrada.producto.stock}")  # Guarda el aviso
+
+    def tomar_alertas(self):  # Método para obtener y vaciar los avisos de stock bajo
+        with self.candado:  # Toma el candado del inventario
+            alertas, self.alertas = self.alertas, []  # Vacía la lista de avisos
+        return alertas  # Devuelve los avisos
+
 # Define la clase Stadium para almacenar datos de los estadios
 class Stadium:
     def __init__(self, id, name, city, capacity_general, capacity_vip, restaurants):  # Constructor de la clase
@@ -39,7 +491,18 @@ class Stadium:
         self.capacity_general = capacity_general  # Asigna la capacidad general
         self.capacity_vip = capacity_vip  # Asigna la capacidad VIP
         self.restaurants = restaurants  # Asigna los restaurantes
-        self.asientos = [["Disponible" for _ in range(self.capacity_vip)] for _ in range(self.capacity_general)]  # Inicializa los asientos como disponibles
+        self.mapas = {}  # Mapa compacto de asientos de cada partido, creado al usarlo por primera vez
+        self.candado_mapas = threading.Lock()  # Candado para crear un solo mapa por partido
+        self.inventario = None  # Inventario de los restaurantes, lo crea el catálogo junto con el índice de productos
+
+    def asientos(self, partido_id):  # Método para obtener el mapa de asientos de un partido jugado en el estadio
+        mapa = self.mapas.get(partido_id)  # Busca el mapa del partido
+        if mapa is None:  # Si el partido aún no tiene mapa
+            with self.candado_mapas:  # Evita que dos taquillas creen mapas distintos
+                mapa = self.mapas.get(partido_id)  # Vuelve a buscar con el candado tomado
+                if mapa is None:  # Si sigue sin mapa
+                    mapa = self.mapas[partido_id] = MapaAsientos(self.capacity_general, self.capacity_vip)  # Crea el mapa del partido
+        return mapa  # Devuelve el mapa del partido
 
 # Define la clase Restaurant para almacenar datos de los restaurantes
 class Restaurant:
@@ -52,115 +515,981 @@ class Product:
     def __init__(self, name, quantity, price, adicional, stock):  # Constructor de la clase
         self.name = name  # Asigna el nombre
         self.quantity = quantity  # Asigna la cantidad
+        self.precio_base = float(price)  # Asigna el precio sin IVA
         self.price = float(price) + float(price) * 0.16  # Calcula el precio con IVA
         self.adicional = adicional  # Asigna información adicional
         self.stock = stock  # Asigna el stock
 
 # Define la clase Match para almacenar datos de los partidos
 class Match:
-    def __init__(self, match_data, equipos, estadios):  # Constructor de la clase
+    def __init__(self, match_data, catalogo):  # Constructor de la clase
         self.id = match_data['id']  # Asigna el ID
         self.number = match_data['number']  # Asigna el número del partido
-        self.home = self.get_equipo_by_id(match_data['home']['id'], equipos)  # Obtiene el equipo local
-        self.away = self.get_equipo_by_id(match_data['away']['id'], equipos)  # Obtiene el equipo visitante
+        self.home = catalogo.equipo(match_data['home']['id'])  # Obtiene el equipo local
+        self.away = catalogo.equipo(match_data['away']['id'])  # Obtiene el equipo visitante
         self.date = match_data['date']  # Asigna la fecha
         self.group = match_data['group']  # Asigna el grupo
-        self.estadio = self.get_estadio_by_id(match_data['stadium_id'], estadios)  # Obtiene el estadio
+        self.estadio = catalogo.estadio(match_data['stadium_id'])  # Obtiene el estadio
+
+    @property
+    def asientos(self):  # Propiedad con el mapa de asientos de este partido
+        return self.estadio.asientos(self.id)  # Devuelve el mapa del partido en su estadio
+
+# Define la clase ResultadoProducto para devolver un producto junto con su restaurante y estadio
+class ResultadoProducto:
+    def __init__(self, estadio, restaurante, producto):  # Constructor de la clase
+        self.estadio = estadio  # Asigna el estadio
+        self.restaurante = restaurante  # Asigna el restaurante
+        self.producto = producto  # Asigna el producto
+
+# Define la clase PaginaResultados para devolver una página de resultados de búsqueda
+class PaginaResultados:
+    def __init__(self, resultados, pagina=1, tamano_pagina=TAMANO_PAGINA):  # Constructor de la clase
+        self.total = len(resultados)  # Cantidad total de resultados
+        self.pagina = pagina  # Número de la página
+        self.paginas = max(1, -(-self.total // tamano_pagina))  # Cantidad de páginas
+        self.resultados = resultados[(pagina - 1) * tamano_pagina:pagina * tamano_pagina]  # Resultados de la página
 
-    def get_equipo_by_id(self, equipo_id, equipos):  # Método para obtener un equipo por ID
-        for equipo in equipos:  # Recorre los equipos
-            if equipo.id == equipo_id:  # Si encuentra el ID
-                return equipo  # Devuelve el equipo
-        return None  # Si no encuentra, devuelve None
+    def hay_siguiente(self):  # Método para saber si hay más páginas
+        return self.pagina < self.paginas  # Verifica si quedan páginas
 
-    def get_estadio_by_id(self, estadio_id, estadios):  # Método para obtener un estadio por ID
+# Define la clase IndiceProductos para buscar productos por nombre, tipo y rango de precio
+class IndiceProductos:
+    def __init__(self, estadios, con_subindices=True):  # Constructor de la clase
+        self.entradas = [ResultadoProducto(e, r, p) for e in estadios for r in e.restaurants for p in r.products]  # Lista de todos los productos
+        self.por_nombre = {}  # Índice de productos por nombre normalizado
+        self.por_tipo = {}  # Índice de productos por tipo (adicional)
+        self.por_ubicacion = {}  # Índice de productos por estadio, restaurante y nombre
+        claves = []  # Claves para buscar por prefijo (nombre completo y cada palabra)
+        for posicion, entrada in enumerate(self.entradas):  # Recorre los productos
+            nombre = normalizar_texto(entrada.producto.name)  # Normaliza el nombre del producto
+            self.por_nombre.setdefault(nombre, []).append(posicion)  # Indexa por nombre completo
+            self.por_tipo.setdefault(normalizar_texto(entrada.producto.adicional), []).append(posicion)  # Indexa por tipo
+            self.por_ubicacion[(entrada.estadio.id, entrada.restaurante.name, nombre)] = entrada  # Indexa por ubicación exacta
+            claves.extend((clave, posicion) for clave in {nombre, *nombre.split()})  # Añade las claves de prefijo
+        claves.sort()  # Ordena las claves para buscar por bisección
+        self.claves = [clave for clave, _ in claves]  # Claves ordenadas
+        self.posiciones_claves = [posicion for _, posicion in claves]  # Posición del producto de cada clave
+        por_precio = sorted(range(len(self.entradas)), key=lambda p: self.entradas[p].producto.price)  # Ordena los productos por precio
+        self.precios = [self.entradas[p].producto.price for p in por_precio]  # Precios ordenados
+        self.posiciones_precios = por_precio  # Posición del producto de cada precio
+        self.por_estadio = {e.id: IndiceProductos([e], False) for e in estadios} if con_subindices else {}  # Subíndices por estadio
+
+    def indice_de(self, estadio):  # Método para obtener el índice de un estadio o el general
+        return self if estadio is None else self.por_estadio[estadio.id]  # Devuelve el índice correspondiente
+
+    def resultados(self, posiciones):  # Método para convertir posiciones en resultados sin repetir
+        return [self.entradas[p] for p in dict.fromkeys(posiciones)]  # Elimina repetidos manteniendo el orden
+
+    def productos(self, nombre, estadio=None):  # Método para obtener todos los productos con un nombre exacto
+        indice = self.indice_de(estadio)  # Obtiene el índice a consultar
+        return [indice.entradas[p] for p in indice.por_nombre.get(normalizar_texto(nombre), [])]  # Devuelve los productos encontrados
+
+    def producto_en(self, estadio, nombre_restaurante, nombre):  # Método para obtener un producto de un restaurante concreto
+        return self.por_ubicacion.get((estadio.id, nombre_restaurante, normalizar_texto(nombre)))  # Devuelve el producto o None
+
+    def buscar_nombre(self, texto, estadio=None, pagina=1, tamano_pagina=TAMANO_PAGINA):  # Método para buscar productos por prefijo del nombre o de una palabra
+        indice = self.indice_de(estadio)  # Obtiene el índice a consultar
+        prefijo = normalizar_texto(texto)  # Normaliza el texto buscado
+        inicio = bisect.bisect_left(indice.claves, prefijo)  # Primera clave que puede empezar con el prefijo
+        fin = inicio  # Inicializa el final del rango
+        while fin < len(indice.claves) and indice.claves[fin].startswith(prefijo):  # Avanza mientras las claves coincidan
+            fin += 1  # Siguiente clave
+        posiciones = sorted(indice.posiciones_claves[inicio:fin])  # Posiciones de los productos encontrados
+        return PaginaResultados(indice.resultados(posiciones), pagina, tamano_pagina)  # Devuelve la página de resultados
+
+    def buscar_tipo(self, tipo, estadio=None, pagina=1, tamano_pagina=TAMANO_PAGINA):  # Método para buscar productos por tipo
+        indice = self.indice_de(estadio)  # Obtiene el índice a consultar
+        posiciones = indice.por_tipo.get(normalizar_texto(tipo), [])  # Busca el tipo en el índice
+        return PaginaResultados(indice.resultados(posiciones), pagina, tamano_pagina)  # Devuelve la página de resultados
+
+    def buscar_rango(self, precio_minimo, precio_maximo, estadio=None, pagina=1, tamano_pagina=TAMANO_PAGINA):  # Método para buscar productos por rango de precio
+        indice = self.indice_de(estadio)  # Obtiene el índice a consultar
+        inicio = bisect.bisect_left(indice.precios, precio_minimo)  # Primer precio dentro del rango
+        fin = bisect.bisect_right(indice.precios, precio_maximo)  # Posición siguiente al último precio del rango
+        return PaginaResultados(indice.resultados(indice.posiciones_precios[inicio:fin]), pagina, tamano_pagina)  # Devuelve la página de resultados
+
+# Define la excepción ElementoNoEncontrado para las búsquedas fallidas en el catálogo
+class ElementoNoEncontrado(LookupError):
+    pass
+
+# Define la clase Catalogo para buscar equipos, estadios y partidos por ID, código o nombre
+class Catalogo:
+    def __init__(self, equipos, estadios):  # Constructor de la clase
+        self.equipos = equipos  # Asigna los equipos
+        self.estadios = estadios  # Asigna los estadios
+        self.partidos = []  # Inicializa los partidos
+        self.equipos_por_id = {equipo.id: equipo for equipo in equipos}  # Índice de equipos por ID
+        self.equipos_por_codigo = {equipo.code.lower(): equipo for equipo in equipos}  # Índice de equipos por código
+        self.equipos_por_nombre = {equipo.name.lower(): equipo for equipo in equipos}  # Índice de equipos por nombre
+        self.estadios_por_id = {estadio.id: estadio for estadio in estadios}  # Índice de estadios por ID
+        self.estadios_por_nombre = {estadio.name.lower(): estadio for estadio in estadios}  # Índice de estadios por nombre
+        self.partidos_por_id = {}  # Índice de partidos por ID
+        self.productos = IndiceProductos(estadios)  # Índice de productos de los restaurantes
         for estadio in estadios:  # Recorre los estadios
-            if estadio.id == estadio_id:  # Si encuentra el ID
-                return estadio  # Devuelve el estadio
-        return None  # Si no encuentra, devuelve None
+            estadio.inventario = InventarioEstadio(estadio, self.productos)  # Crea el inventario sobre el mismo índice de productos
+        self.buscador = BuscadorPartidos([])  # Inicializa el buscador de partidos
+
+    def agregar_partidos(self, partidos):  # Método para agregar partidos al catálogo
+        for partido in partidos:  # Recorre los partidos
+            self.partidos.append(partido)  # Añade el partido a la lista
+            self.partidos_por_id[str(partido.id)] = partido  # Indexa el partido por ID
+        self.buscador = BuscadorPartidos(self.partidos)  # Reconstruye el buscador de partidos
+
+    def buscar(self, indice, clave, descripcion):  # Método para buscar en un índice o lanzar un error claro
+        try:
+            return indice[clave]  # Devuelve el elemento encontrado
+        except KeyError:  # Si no existe la clave
+            raise ElementoNoEncontrado(f"No existe {descripcion} {clave}") from None  # Lanza un error claro
+
+    def equipo(self, equipo_id):  # Método para obtener un equipo por ID
+        return self.buscar(self.equipos_por_id, equipo_id, "un equipo con ID")  # Busca en el índice de IDs
+
+    def equipo_por_codigo(self, codigo):  # Método para obtener un equipo por código
+        return self.buscar(self.equipos_por_codigo, codigo.lower(), "un equipo con código")  # Busca en el índice de códigos
+
+    def equipo_por_nombre(self, nombre):  # Método para obtener un equipo por nombre
+        return self.buscar(self.equipos_por_nombre, nombre.lower(), "un equipo llamado")  # Busca en el índice de nombres
+
+    def estadio(self, estadio_id):  # Método para obtener un estadio por ID
+        return self.buscar(self.estadios_por_id, estadio_id, "un estadio con ID")  # Busca en el índice de IDs
+
+    def estadio_por_nombre(self, nombre):  # Método para obtener un estadio por nombre
+        return self.buscar(self.estadios_por_nombre, nombre.lower(), "un estadio llamado")  # Busca en el índice de nombres
+
+    def partido(self, partido_id):  # Método para obtener un partido por ID
+        return self.buscar(self.partidos_por_id, str(partido_id), "un partido con ID")  # Busca en el índice de IDs
+
+# Define la clase BuscadorPartidos para buscar partidos con índices invertidos
+class BuscadorPartidos:
+    def __init__(self, partidos):  # Constructor de la clase
+        self.partidos = sorted(partidos, key=lambda p: p.date)  # Ordena los partidos por fecha
+        self.fechas = [partido.date[:10] for partido in self.partidos]  # Fechas ordenadas para buscar por bisección
+        self.por_equipo = {}  # Índice de partidos por nombre o código de equipo
+        self.por_estadio = {}  # Índice de partidos por nombre de estadio
+        self.por_ciudad = {}  # Índice de partidos por ciudad
+        self.por_grupo = {}  # Índice de partidos por grupo
+        for posicion, partido in enumerate(self.partidos):  # Recorre los partidos en orden de fecha
+            for equipo in (partido.home, partido.away):  # Recorre ambos equipos
+                for clave in {normalizar_texto(equipo.name), normalizar_texto(equipo.code)}:  # Indexa por nombre y por código
+                    self.por_equipo.setdefault(clave, []).append(posicion)  # Añade la posición al índice
+            self.por_estadio.setdefault(normalizar_texto(partido.estadio.name), []).append(posicion)  # Indexa por estadio
+            self.por_ciudad.setdefault(normalizar_texto(partido.estadio.city), []).append(posicion)  # Indexa por ciudad
+            self.por_grupo.setdefault(normalizar_texto(partido.group), []).append(posicion)  # Indexa por grupo
+
+    def rango_fechas(self, desde=None, hasta=None):  # Método para obtener las posiciones entre dos fechas (inclusive)
+        inicio = bisect.bisect_left(self.fechas, desde[:10]) if desde else 0  # Primera posición desde la fecha inicial
+        fin = bisect.bisect_right(self.fechas, hasta[:10]) if hasta else len(self.fechas)  # Posición siguiente a la fecha final
+        return inicio, fin  # Devuelve el rango de posiciones
+
+    @metricas.medir()
+    def buscar(self, equipo=None, estadio=None, ciudad=None, grupo=None, desde=None, hasta=None):  # Método para buscar partidos combinando filtros
+        candidatos = []  # Listas de posiciones de cada filtro
+        for indice, valor in ((self.por_equipo, equipo), (self.por_estadio, estadio), (self.por_ciudad, ciudad), (self.por_grupo, grupo)):  # Recorre los filtros
+            if valor:  # Si el filtro fue indicado
+                candidatos.append(indice.get(normalizar_texto(valor), []))  # Añade las posiciones del filtro
+        inicio, fin = self.rango_fechas(desde, hasta)  # Obtiene el rango de fechas
+        if not candidatos:  # Si solo se filtra por fecha
+            return self.partidos[inicio:fin]  # Devuelve el rango de partidos
+        candidatos.sort(key=len)  # Empieza por el filtro con menos partidos
+        otros = [set(posiciones) for posiciones in candidatos[1:]]  # Convierte los demás filtros en conjuntos
+        return [self.partidos[p] for p in candidatos[0] if inicio <= p < fin and all(p in conjunto for conjunto in otros)]  # Intersecta los filtros
+
+# Define la clase EstadisticasPartidos para mantener los contadores de cada partido al momento de cada venta o validación
+class EstadisticasPartidos:
+    def __init__(self, partidos):  # Constructor de la clase
+        self.partidos = {str(partido.id): partido for partido in partidos}  # Partidos por ID
+        self.boletos = dict.fromkeys(self.partidos, 0)  # Boletos vendidos por partido
+        self.asistencia = dict.fromkeys(self.partidos, 0)  # Personas que entraron por partido
+        self.recaudacion = dict.fromkeys(self.partidos, 0.0)  # Dinero recaudado en boletos por partido
+        self.mayor_boletos = None  # ID del partido con más boletos vendidos
+        self.mayor_asistencia = None  # ID del partido con mayor asistencia
+
+    def registrar_venta(self, cliente):  # Método para contar la venta de un boleto
+        partido_id = str(cliente.partido_id)  # ID del partido del boleto
+        self.boletos[partido_id] += 1  # Suma el boleto vendido
+        self.recaudacion[partido_id] += cliente.total  # Suma el monto del boleto
+        if self.mayor_boletos is None or self.boletos[partido_id] > self.boletos[self.mayor_boletos]:  # Verifica si supera al mayor
+            self.mayor_boletos = partido_id  # Actualiza el partido con más boletos vendidos
+
+    def registrar_asistencia(self, cliente):  # Método para contar la entrada de una persona
+        partido_id = str(cliente.partido_id)  # ID del partido del boleto
+        self.asistencia[partido_id] += 1  # Suma la persona que entró
+        if self.mayor_asistencia is None or self.asistencia[partido_id] > self.asistencia[self.mayor_asistencia]:  # Verifica si supera al mayor
+            self.mayor_asistencia = partido_id  # Actualiza el partido con mayor asistencia
+
+    def partido_mayor_boletos(self):  # Método para obtener el partido con más boletos vendidos
+        return self.partidos[self.mayor_boletos] if self.mayor_boletos else None  # Devuelve el partido o None
+
+    def partido_mayor_asistencia(self):  # Método para obtener el partido con mayor asistencia
+        return self.partidos[self.mayor_asistencia] if self.mayor_asistencia else None  # Devuelve el partido o None
+
+    def tabla(self):  # Método para armar la tabla de asistencia de todos los partidos
+        filas = []  # Inicializa las filas de la tabla
+        for partido_id, partido in self.partidos.items():  # Recorre los partidos
+            vendidos = self.boletos[partido_id]  # Boletos vendidos del partido
+            asistieron = self.asistencia[partido_id]  # Personas que entraron al partido
+            filas.append((partido, vendidos, asistieron, asistieron / vendidos if vendidos > 0 else 0))  # Añade la fila con la relación asistencia/venta
+        return filas  # Devuelve las filas
+
+    def verificar(self, registro):  # Método para comparar los contadores con un recálculo completo desde el registro de boletos
+        recalculadas = EstadisticasPartidos(self.partidos.values())  # Crea contadores vacíos
+        for cliente in registro.clientes:  # Recorre todos los boletos
+            recalculadas.registrar_venta(cliente)  # Cuenta la venta
+            if registro.asistencias.get(cliente.id_boleto):  # Si el boleto se usó
+                recalculadas.registrar_asistencia(cliente)  # Cuenta la asistencia
+        diferencias = []  # Inicializa la lista de diferencias
+        for partido_id in self.partidos:  # Recorre los partidos
+            for nombre, actual, esperado in (("boletos", self.boletos, recalculadas.boletos), ("asistencia", self.asistencia, recalculadas.asistencia), ("recaudacion", self.recaudacion, recalculadas.recaudacion)):  # Recorre los contadores
+                if not math.isclose(actual[partido_id], esperado[partido_id], abs_tol=1e-6):  # Compara el contador
+                    diferencias.append((partido_id, nombre, actual[partido_id], esperado[partido_id]))  # Guarda la diferencia
+        return diferencias  # Devuelve las diferencias
+
+# Define la clase LineaVenta para guardar un producto vendido en el restaurante
+class LineaVenta:
+    def __init__(self, fecha, cedula, partido_id, estadio_id, restaurante, producto, cantidad, precio, descuento=0.0):  # Constructor de la clase
+        self.fecha = fecha  # Asigna la fecha de la venta
+        self.cedula = cedula  # Asigna la cédula del cliente
+        self.partido_id = partido_id  # Asigna el ID del partido del boleto del cliente
+        self.estadio_id = estadio_id  # Asigna el ID del estadio
+        self.restaurante = restaurante  # Asigna el nombre del restaurante
+        self.producto = producto  # Asigna el nombre del producto
+        self.cantidad = cantidad  # Asigna la cantidad vendida
+        self.precio = precio  # Asigna el precio unitario con IVA
+        self.descuento = descuento  # Asigna la fracción de descuento aplicada a la compra
+
+    def monto(self):  # Método para obtener lo pagado por la línea
+        return self.precio * self.cantidad * (1 - self.descuento)  # Devuelve el monto con descuento
+
+# Define la clase LibroVentas para llevar las ventas del restaurante y sus totales al momento de cada venta
+class LibroVentas:
+    def __init__(self):  # Constructor de la clase
+        self.lineas = []  # Líneas de venta en orden de llegada
+        self.fechas = []  # Fecha de cada línea para buscar por bisección
+        self.por_producto = collections.Counter()  # Unidades vendidas por producto
+        self.por_restaurante = collections.Counter()  # Unidades vendidas por estadio y restaurante
+        self.por_estadio = collections.Counter()  # Unidades vendidas por estadio
+        self.por_partido = {}  # Unidades vendidas por producto en cada partido
+        self.ingresos_por_estadio = collections.Counter()  # Dinero vendido por estadio
+
+    def registrar(self, linea):  # Método para registrar una línea de venta y actualizar los totales
+        self.lineas.append(linea)  # Añade la línea
+        self.fechas.append(linea.fecha or 0.0)  # Añade la fecha de la línea
+        self.por_producto[linea.producto] += linea.cantidad  # Actualiza el total del producto
+        self.por_restaurante[(linea.estadio_id, linea.restaurante)] += linea.cantidad  # Actualiza el total del restaurante
+        self.por_estadio[linea.estadio_id] += linea.cantidad  # Actualiza el total del estadio
+        self.por_partido.setdefault(linea.partido_id, collections.Counter())[linea.producto] += linea.cantidad  # Actualiza el total del partido
+        self.ingresos_por_estadio[linea.estadio_id] += linea.monto()  # Actualiza el dinero cobrado en el estadio, con descuento
+
+    def registrar_compra(self, datos, fecha):  # Método para registrar todas las líneas de una compra
+        descuento = datos["descuento"] / datos["subtotal"] if datos["subtotal"] else 0.0  # Fracción de descuento de la compra
+        for producto in datos["productos"]:  # Recorre los productos de la compra
+            self.registrar(LineaVenta(fecha, datos["cedula"], datos.get("partido_id"), datos["estadio_id"], producto["restaurante"], producto["nombre"], producto["cantidad"], producto["precio"], descuento))  # Registra la línea
+
+    @staticmethod
+    def mayores(contador, k):  # Método para obtener los k mayores de un contador con un montículo
+        return heapq.nlargest(k, contador.items(), key=operator.itemgetter(1))  # Devuelve los k mayores sin ordenar todo
+
+    def top_productos(self, k=3):  # Método para obtener los productos más vendidos
+        return self.mayores(self.por_producto, k)  # Devuelve los k productos más vendidos
+
+    def top_restaurantes(self, k=3):  # Método para obtener los restaurantes que más vendieron
+        return self.mayores(self.por_restaurante, k)  # Devuelve los k restaurantes que más vendieron
+
+    def top_productos_partido(self, partido_id, k=3):  # Método para obtener los productos más vendidos durante un partido
+        return self.mayores(self.por_partido.get(partido_id, collections.Counter()), k)  # Devuelve los k productos del partido
+
+    def top_productos_entre(self, desde, hasta, k=3):  # Método para obtener los productos más vendidos entre dos fechas
+        inicio = bisect.bisect_left(self.fechas, desde)  # Primera línea desde la fecha inicial
+        fin = bisect.bisect_right(self.fechas, hasta)  # Línea siguiente a la fecha final
+        contador = collections.Counter()  # Inicializa el contador de la ventana
+        for linea in self.lineas[inicio:fin]:  # Recorre solo las líneas de la ventana
+            contador[linea.producto] += linea.cantidad  # Suma las unidades del producto
+        return self.mayores(contador, k)  # Devuelve los k productos de la ventana
+
+# Define la clase PerfilCliente para reunir los boletos y gastos de una persona
+class PerfilCliente:
+    def __init__(self, cedula, nombre, edad):  # Constructor de la clase
+        self.cedula = cedula  # Asigna la cédula
+        self.nombre = nombre  # Asigna el nombre
+        self.edad = edad  # Asigna la edad
+        self.boletos = []  # Boletos comprados por la persona
+        self.gasto_boletos = 0.0  # Dinero gastado en boletos
+        self.gasto_restaurante = 0.0  # Dinero gastado en el restaurante
+        self.es_vip = False  # Indica si compró al menos un boleto VIP
+
+    def gasto_total(self):  # Método para obtener todo lo gastado por la persona
+        return self.gasto_boletos + self.gasto_restaurante  # Devuelve la suma de los gastos
+
+    def boleto_vip(self):  # Método para obtener el último boleto VIP de la persona
+        return next((c for c in reversed(self.boletos) if c.tipo_entrada == "VIP"), None)  # Devuelve el boleto o None
+
+# Define la clase RegistroClientes para buscar a las personas por cédula y llevar sus gastos
+class RegistroClientes:
+    def __init__(self):  # Constructor de la clase
+        self.por_cedula = {}  # Perfiles por cédula
+        self.gasto_vip = 0.0  # Dinero de los boletos VIP y del restaurante de todas las personas VIP
+        self.cantidad_vip = 0  # Cantidad de personas VIP
+        self.lideres = []  # Personas que más boletos compraron, de mayor a menor
+
+    def perfil(self, cedula):  # Método para obtener el perfil de una persona
+        return self.por_cedula.get(cedula)  # Devuelve el perfil o None
+
+    def registrar_boleto(self, cliente):  # Método para sumar un boleto al perfil de su comprador
+        perfil = self.por_cedula.get(cliente.cedula)  # Busca el perfil
+        if perfil is None:  # Si la persona no estaba registrada
+            perfil = self.por_cedula[cliente.cedula] = PerfilCliente(cliente.cedula, cliente.nombre, cliente.edad)  # Crea el perfil
+        perfil.nombre, perfil.edad = cliente.nombre, cliente.edad  # Actualiza los datos con la última compra
+        perfil.boletos.append(cliente)  # Añade el boleto
+        perfil.gasto_boletos += cliente.total  # Suma el gasto del boleto
+        self.actualizar_lideres(perfil)  # Actualiza las personas que más boletos compraron
+        if cliente.tipo_entrada == "VIP":  # Los boletos General no cuentan en el gasto VIP
+            if not perfil.es_vip:  # Si es su primer boleto VIP
+                perfil.es_vip = True  # Marca a la persona como VIP
+                self.cantidad_vip += 1  # Cuenta a la persona VIP
+                self.gasto_vip += perfil.gasto_restaurante  # Suma lo que ya había gastado en el restaurante
+            self.gasto_vip += cliente.total  # Suma el boleto VIP
+        return perfil  # Devuelve el perfil
+
+    def registrar_gasto_restaurante(self, cedula, monto):  # Método para sumar una compra del restaurante al perfil
+        perfil = self.por_cedula[cedula]  # Busca el perfil
+        perfil.gasto_restaurante += monto  # Suma el gasto del restaurante
+        if perfil.es_vip:  # Si la persona es VIP
+            self.gasto_vip += monto  # Suma la compra al gasto VIP
+
+    def promedio_gasto_vip(self):  # Método para obtener el gasto promedio de las personas VIP en O(1)
+        return self.gasto_vip / self.cantidad_vip if self.cantidad_vip else None  # Devuelve el promedio o None
+
+    def actualizar_lideres(self, perfil):  # Método para mantener a las personas con más boletos en O(k) por venta
+        if perfil not in self.lideres:  # Si la persona no estaba entre los líderes
+            if len(self.lideres) == TOP_COMPRADORES and len(perfil.boletos) <= len(self.lideres[-1].boletos):  # Si no supera al último líder
+                return  # Los líderes no cambian
+            self.lideres.append(perfil)  # Añade a la persona
+        posicion = self.lideres.index(perfil)  # Posición actual de la persona
+        while posicion > 0 and len(self.lideres[posicion - 1].boletos) < len(perfil.boletos):  # Mientras supere al anterior
+            self.lideres[posicion - 1], self.lideres[posicion] = perfil, self.lideres[posicion - 1]  # Sube una posición
+            posicion -= 1  # Posición siguiente a revisar
+        del self.lideres[TOP_COMPRADORES:]  # Deja solo los líderes
+
+    def top_compradores(self, k=TOP_COMPRADORES):  # Método para obtener las personas que más boletos compraron
+        if k <= TOP_COMPRADORES:  # Si se piden a lo sumo los líderes mantenidos
+            return [(perfil, len(perfil.boletos)) for perfil in self.lideres[:k]]  # Devuelve los líderes sin recorrer a todos
+        mayores = heapq.nlargest(k, self.por_cedula.values(), key=lambda perfil: len(perfil.boletos))  # Para más personas, obtiene los k mayores con un montículo
+        return [(perfil, len(perfil.boletos)) for perfil in mayores]  # Devuelve los perfiles y sus boletos
+
+# Define la clase TablaVentas para guardar los boletos y las líneas del restaurante en columnas de NumPy
+class TablaVentas:
+    def __init__(self, catalogo, registro_boletos, libro):  # Constructor de la clase
+        import numpy as np  # Importa numpy solo al armar la tabla
+        self.partidos = [str(partido.id) for partido in catalogo.partidos]  # ID de cada partido por posición
+        self.estadios = [estadio.id for estadio in catalogo.estadios]  # ID de cada estadio por posición
+        codigo_partido = {partido_id: i for i, partido_id in enumerate(self.partidos)}  # Posición de cada partido
+        codigo_estadio = {estadio_id: i for i, estadio_id in enumerate(self.estadios)}  # Posición de cada estadio
+        self.estadio_partido = np.array([codigo_estadio[partido.estadio.id] for partido in catalogo.partidos], dtype=np.int64)  # Estadio de cada partido
+        self.cedulas = []  # Cédula de cada cliente por posición
+        codigo_cliente = {}  # Posición de cada cédula
+        clientes = registro_boletos.clientes  # Boletos en orden de venta
+        for cedula in itertools.chain((c.cedula for c in clientes), (linea.cedula for linea in libro.lineas)):  # Recorre las cédulas de boletos y compras
+            if cedula not in codigo_cliente:  # Si la cédula es nueva
+                codigo_cliente[cedula] = len(self.cedulas)  # Le asigna una posición
+                self.cedulas.append(cedula)  # Guarda la cédula
+        self.boleto_partido = np.array([codigo_partido[str(c.partido_id)] for c in clientes], dtype=np.int64)  # Partido de cada boleto
+        self.boleto_cliente = np.array([codigo_cliente[c.cedula] for c in clientes], dtype=np.int64)  # Cliente de cada boleto
+        self.boleto_vip = np.array([c.tipo_entrada == "VIP" for c in clientes], dtype=bool)  # Indica si el boleto es VIP
+        self.boleto_descuento = np.array([c.cedula.isdigit() and es_numero_vampiro(int(c.cedula)) for c in clientes], dtype=bool)  # Indica si la cédula es un número vampiro
+        self.boleto_total = np.array([c.total for c in clientes], dtype=np.float64)  # Monto cobrado por cada boleto
+        lineas = libro.lineas  # Líneas del restaurante en orden de venta
+        self.linea_estadio = np.array([codigo_estadio[linea.estadio_id] for linea in lineas], dtype=np.int64)  # Estadio de cada línea
+        self.linea_cliente = np.array([codigo_cliente[linea.cedula] for linea in lineas], dtype=np.int64)  # Cliente de cada línea
+        self.linea_cantidad = np.array([linea.cantidad for linea in lineas], dtype=np.float64)  # Unidades de cada línea
+        self.linea_precio = np.array([linea.precio for linea in lineas], dtype=np.float64)  # Precio unitario con IVA de cada línea
+        self.linea_descuento = np.array([linea.descuento for linea in lineas], dtype=np.float64)  # Fracción de descuento de cada línea
+
+    def precios_boletos(self):  # Método para calcular el precio de todos los boletos a la vez
+        import numpy as np  # Importa numpy
+        precio_base = np.where(self.boleto_vip, 75.0, 35.0)  # Precio base según el tipo de entrada
+        descuento = np.where(self.boleto_descuento, 0.5, 0.0)  # Descuento de las cédulas vampiro
+        iva = precio_base * 0.16  # Calcula el IVA
+        total = precio_base - (precio_base * descuento) + iva  # Mismo orden de operaciones que calcular_costo_entrada
+        return precio_base, descuento, iva, total  # Devuelve las cuatro columnas
+
+    def montos_lineas(self):  # Método para calcular lo pagado en cada línea del restaurante
+        return self.linea_precio * self.linea_cantidad * (1 - self.linea_descuento)  # Mismo orden de operaciones que LineaVenta.monto
+
+    def recaudacion_por_partido(self):  # Método para sumar el dinero de los boletos por partido
+        import numpy as np  # Importa numpy
+        return np.bincount(self.boleto_partido, weights=self.boleto_total, minlength=len(self.partidos))  # Suma por partido
+
+    def recaudacion_por_estadio(self):  # Método para sumar el dinero de los boletos por estadio
+        import numpy as np  # Importa numpy
+        return np.bincount(self.estadio_partido[self.boleto_partido], weights=self.boleto_total, minlength=len(self.estadios))  # Suma por estadio
+
+    def ingresos_restaurante_por_estadio(self):  # Método para sumar lo cobrado en los restaurantes por estadio
+        import numpy as np  # Importa numpy
+        return np.bincount(self.linea_estadio, weights=self.montos_lineas(), minlength=len(self.estadios))  # Suma por estadio
+
+    def promedio_gasto_vip(self):  # Método para calcular el gasto promedio de las personas con algún boleto VIP
+        import numpy as np  # Importa numpy
+        cantidad = len(self.cedulas)  # Cantidad de clientes
+        gasto = np.bincount(self.boleto_cliente, weights=self.boleto_total * self.boleto_vip, minlength=cantidad) + np.bincount(self.linea_cliente, weights=self.montos_lineas(), minlength=cantidad)  # Gasto VIP por cliente: boletos VIP y restaurante
+        vip = np.bincount(self.boleto_cliente, weights=self.boleto_vip, minlength=cantidad) > 0  # Clientes con algún boleto VIP
+        return float(gasto[vip].mean()) if vip.any() else None  # Devuelve el promedio o None
+
+# Define la clase AlmacenVentas para guardar las operaciones en un diario SQLite de solo escritura al final
+class AlmacenVentas:
+    def __init__(self, ruta):  # Constructor de la clase
+        self.ruta = ruta  # Asigna la ruta de la base de datos
+        self.conexion = sqlite3.connect(ruta, check_same_thread=False)  # Abre la base de datos
+        self.conexion.execute("PRAGMA journal_mode=WAL")  # Escribe en un registro adelantado para no bloquear las lecturas
+        self.conexion.execute("PRAGMA synchronous=NORMAL")  # Agrupa las sincronizaciones a disco en los puntos de control
+        self.conexion.execute("CREATE TABLE IF NOT EXISTS operaciones (secuencia INTEGER PRIMARY KEY AUTOINCREMENT, fecha REAL NOT NULL, tipo TEXT NOT NULL, datos TEXT NOT NULL)")  # Crea el diario de operaciones
+        self.conexion.commit()  # Confirma la creación
+        self.en_lote = 0  # Cantidad de lotes abiertos
+
+    def registrar(self, tipo, datos, fecha):  # Método para añadir una operación al diario
+        cursor = self.conexion.execute("INSERT INTO operaciones (fecha, tipo, datos) VALUES (?, ?, ?)", (fecha, tipo, json.dumps(datos)))  # Inserta la operación
+        if not self.en_lote:  # Si no hay un lote abierto
+            self.conexion.commit()  # Confirma la operación de inmediato
+        return cursor.lastrowid  # Devuelve la secuencia de la operación
+
+    @contextlib.contextmanager
+    def lote(self):  # Método para confirmar varias operaciones en una sola transacción
+        self.en_lote += 1  # Abre el lote
+        try:
+            yield self  # Ejecuta las operaciones del lote
+        finally:
+            self.en_lote -= 1  # Cierra el lote
+            if not self.en_lote:  # Si era el último lote abierto
+                self.conexion.commit()  # Confirma todas las operaciones juntas
+
+    def operaciones(self, desde=0):  # Método para leer las operaciones posteriores a una secuencia
+        cursor = self.conexion.execute("SELECT secuencia, fecha, tipo, datos FROM operaciones WHERE secuencia > ? ORDER BY secuencia", (desde,))  # Consulta el diario
+        for secuencia, fecha, tipo, datos in cursor:  # Recorre las operaciones sin cargarlas todas
+            yield secuencia, fecha, tipo, json.loads(datos)  # Devuelve cada operación
+
+    def cerrar(self):  # Método para cerrar la base de datos
+        self.conexion.commit()  # Confirma las operaciones pendientes
+        self.conexion.close()  # Cierra la conexión
+
+# Define la clase EstadoSistema para reunir los datos del sistema y aplicar las operaciones
+class EstadoSistema:
+    def __init__(self, catalogo, almacen=None):  # Constructor de la clase
+        self.catalogo = catalogo  # Asigna el catálogo
+        self.almacen = almacen  # Asigna el almacén de ventas
+        self.boletos = RegistroBoletos()  # Inicializa el registro de boletos
+        self.estadisticas = EstadisticasPartidos(catalogo.partidos)  # Inicializa los contadores de los partidos
+        self.libro = LibroVentas()  # Inicializa el libro de ventas del restaurante
+        self.clientes = RegistroClientes()  # Inicializa el registro de clientes por cédula
+        self.secuencia = 0  # Última operación aplicada
+        self.omitidas = []  # Operaciones guardadas que no se pudieron aplicar con el catálogo actual
+        self.candado = threading.RLock()  # Candado para que varias taquillas registren operaciones en orden
+
+    def registrar(self, tipo, datos):  # Método para guardar una operación en el diario y aplicarla
+        with self.candado:  # Serializa el diario y los datos en memoria
+            fecha = time.time()  # Fecha de la operación
+            if self.almacen is not None:  # Si hay almacén de ventas
+                self.secuencia = self.almacen.registrar(tipo, datos, fecha)  # Guarda la operación antes de aplicarla
+            metricas.contar(f"operacion_{tipo}")  # Cuenta la operación
+            return self.aplicar(tipo, datos, fecha)  # Aplica la operación
+
+    def aplicar(self, tipo, datos, fecha, recuperando=False):  # Método para aplicar una operación a los datos en memoria
+        if tipo == "venta":  # Si es la venta de un boleto
+            partido = self.catalogo.partido(datos["partido_id"])  # Busca el partido
+            if recuperando and not partido.asientos.reservar(datos["tipo_entrada"], datos["asiento"]):  # Al recuperar, ocupa el asiento que aún está libre
+                raise ElementoNoEncontrado(f"El asiento {datos['asiento']} {datos['tipo_entrada']} del partido {partido.id} no existe o ya está ocupado")  # Error si el catálogo cambió
+            cliente = Cliente(datos["nombre"], datos["cedula"], datos["edad"], datos["tipo_entrada"], partido.estadio.name, datos["id_boleto"], partido.id, datos["asiento"], datos["total"])  # Crea el cliente
+            self.boletos.registrar(cliente)  # Registra el boleto
+            self.estadisticas.registrar_venta(cliente)  # Actualiza los contadores del partido
+            self.clientes.registrar_boleto(cliente)  # Actualiza el perfil del comprador
+            return cliente  # Devuelve el cliente
+        elif tipo == "asistencia":  # Si es la validación de un boleto
+            resultado, cliente = self.boletos.validar(datos["id_boleto"])  # Registra la asistencia
+            if resultado == BOLETO_VALIDO:  # Solo la primera entrada cuenta como asistencia
+                self.estadisticas.registrar_asistencia(cliente)  # Actualiza los contadores del partido
+            return resultado, cliente  # Devuelve el estado del boleto y el cliente
+        elif tipo == "compra":  # Si es una compra en el restaurante
+            inventario = self.catalogo.estadio(datos["estadio_id"]).inventario  # Inventario del estadio de la compra
+            if recuperando:  # Al recuperar, verifica todo antes de cambiar los datos
+                faltantes = [p["nombre"] for p in datos["productos"] if inventario.producto(p["nombre"], restaurante=p["restaurante"]) is None]  # Productos que ya no existen
+                if faltantes:  # Si algún producto ya no está en el catálogo
+                    raise ElementoNoEncontrado(f"No existen los productos {faltantes} en {inventario.estadio.name}")  # Error si el catálogo cambió
+                if self.clientes.perfil(datos["cedula"]) is None:  # Si el boleto del comprador no se recuperó
+                    raise ElementoNoEncontrado(f"No existe un cliente con cédula {datos['cedula']}")  # Error si falta el comprador
+            inventario.descontar(datos["productos"])  # Reduce el stock de los productos comprados
+            self.libro.registrar_compra(datos, fecha)  # Registra las líneas en el libro de ventas
+            self.clientes.registrar_gasto_restaurante(datos["cedula"], datos["total"])  # Actualiza el gasto del comprador
+            return datos  # Devuelve la compra
+        raise ValueError(f"Operación desconocida: {tipo}")  # Error si el tipo no existe
+
+    def recuperar(self):  # Método para volver a aplicar las operaciones guardadas
+        if self.almacen is None:  # Si no hay almacén de ventas
+            return 0  # No hay nada que recuperar
+        cantidad = 0  # Inicializa la cantidad de operaciones
+        for secuencia, fecha, tipo, datos in self.almacen.operaciones(self.secuencia):  # Recorre las operaciones pendientes
+            try:
+                self.aplicar(tipo, datos, fecha, recuperando=True)  # Aplica la operación
+                cantidad += 1  # Cuenta la operación
+            except ElementoNoEncontrado as e:  # Si la operación no corresponde al catálogo actual
+                self.omitidas.append((secuencia, tipo, str(e)))  # La omite sin detener la recuperación
+            self.secuencia = secuencia  # Actualiza la última operación revisada
+        return cantidad  # Devuelve la cantidad de operaciones recuperadas
+
+    def vender(self, cliente):  # Método para registrar la venta de un boleto
+        return self.registrar("venta", {"id_boleto": cliente.id_boleto, "nombre": cliente.nombre, "cedula": cliente.cedula, "edad": cliente.edad, "tipo_entrada": cliente.tipo_entrada, "partido_id": cliente.partido_id, "asiento": cliente.asiento, "total": cliente.total})  # Guarda y aplica la venta
+
+    def validar(self, id_boleto):  # Método para validar un boleto y guardar la asistencia
+        with self.candado:  # Evita que dos lectores validen el mismo boleto a la vez
+            if self.boletos.buscar(id_boleto) is None:  # Verifica si el boleto existe
+                metricas.contar(f"validacion_{BOLETO_INVALIDO}")  # Cuenta el boleto falso
+                return BOLETO_INVALIDO, None  # Los boletos falsos no se guardan
+            resultado = self.registrar("asistencia", {"id_boleto": id_boleto})  # Guarda y aplica la asistencia
+            metricas.contar(f"validacion_{resultado[0]}")  # Cuenta el resultado de la validación
+            return resultado  # Devuelve el estado del boleto y el cliente
+
+    def validar_archivo(self, ruta):  # Método para validar un archivo de boletos en un solo lote
+        with self.lote():  # Agrupa las escrituras del archivo
+            return self.boletos.validar_archivo(ruta, self.validar)  # Valida el archivo
+
+    def comprar(self, cliente, reserva, subtotal, descuento, total):  # Método para confirmar la reserva de una compra en el restaurante
+        inventario = reserva.inventario  # Inventario del estadio de la compra
+        productos = [{"restaurante": e.restaurante.name, "nombre": e.producto.name, "cantidad": cantidad, "precio": e.producto.price} for e, cantidad in reserva.lineas]  # Líneas de la compra
+        with self.candado, inventario.candado:  # Descuenta el stock y suelta la reserva sin que otra caja vea un estado intermedio
+            if not reserva.activa:  # Verifica que la reserva siga pendiente
+                raise ValueError("La reserva ya fue confirmada o cancelada")  # Error si la reserva terminó
+            compra = self.registrar("compra", {"cedula": cliente.cedula, "partido_id": cliente.partido_id, "estadio_id": inventario.estadio.id, "productos": productos, "subtotal": subtotal, "descuento": descuento, "total": total})  # Guarda y aplica la compra
+            inventario.soltar(reserva)  # Las unidades ya salieron del stock
+        return compra  # Devuelve la compra
+
+    @contextlib.contextmanager
+    def lote(self):  # Método para agrupar varias operaciones en una sola escritura
+        with self.candado:  # Las demás taquillas esperan a que termine el lote
+            with (self.almacen.lote() if self.almacen is not None else contextlib.nullcontext()):  # Abre el lote del almacén
+                yield self  # Ejecuta las operaciones del lote
+
+    def cerrar(self):  # Método para cerrar el almacén de ventas
+        if self.almacen is not None:  # Si hay almacén de ventas
+            self.almacen.cerrar()  # Cierra el almacén
+
+# Define la clase ServicioTaquilla para atender ventas, validaciones y búsquedas por HTTP con asyncio
+class ServicioTaquilla:
+    ESTADOS_HTTP = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}  # Texto de cada código de respuesta
+
+    def __init__(self, estado, procesos=None):  # Constructor de la clase
+        self.estado = estado  # Asigna el estado del sistema
+        self.candado = asyncio.Lock()  # Una sola operación de escritura a la vez sobre el estado
+        self.retenciones = {}  # Retenciones de asientos pendientes por código
+        self.ejecutor = concurrent.futures.ProcessPoolExecutor(procesos) if procesos != 0 else None  # Procesos para los números vampiro
+        self.rutas = {  # Función de cada método y ruta
+            ("GET", "salud"): self.salud,
+            ("GET", "partidos"): self.buscar_partidos,
+            ("POST", "boletos"): self.vender,
+            ("POST", "retenciones"): self.retener,
+            ("POST", "confirmar"): self.confirmar,
+            ("DELETE", "retenciones"): self.cancelar,
+            ("POST", "validaciones"): self.validar,
+            ("POST", "compras"): self.comprar,
+        }
+
+    async def en_estado(self, funcion, *args):  # Método para ejecutar una operación sobre el estado sin bloquear a los demás clientes
+        async with self.candado:  # Espera su turno
+            return await asyncio.get_running_loop().run_in_executor(None, functools.partial(funcion, *args))  # Ejecuta la operación en un hilo
+
+    async def precalcular_vampiro(self, cedula):  # Método para calcular el descuento de una cédula en otro proceso
+        cedula = str(cedula).strip()  # Limpia la cédula
+        if self.ejecutor is not None and cedula.isdigit() and int(cedula) not in cache_vampiros:  # Si la cédula no está en caché
+            resultados = await asyncio.get_running_loop().run_in_executor(self.ejecutor, clasificar_bloque_vampiros, [int(cedula)])  # Calcula sin ocupar el ciclo de eventos
+            cache_vampiros.update(resultados)  # Guarda el resultado en la caché
+
+    async def salud(self, consulta, cuerpo, codigo=None):  # Método que indica si el servicio está activo
+        return 200, {"estado": "ok", "boletos": len(self.estado.boletos.clientes)}  # Devuelve el estado del servicio
+
+    async def buscar_partidos(self, consulta, cuerpo, codigo=None):  # Método para buscar partidos con los filtros de la consulta
+        filtros = {clave: consulta[clave] for clave in ("equipo", "estadio", "ciudad", "grupo", "desde", "hasta") if consulta.get(clave)}  # Filtros indicados
+        partidos = self.estado.catalogo.buscador.buscar(**filtros)  # Busca los partidos
+        return 200, [{"id": p.id, "numero": p.number, "local": p.home.name, "visitante": p.away.name, "fecha": p.date, "grupo": p.group, "estadio": p.estadio.name, "ciudad": p.estadio.city} for p in partidos]  # Devuelve los partidos
+
+    async def vender(self, consulta, cuerpo, codigo=None):  # Método para vender un boleto
+        await self.precalcular_vampiro(cuerpo.get("cedula", ""))  # Calcula el descuento fuera del ciclo de eventos
+        cliente = await self.en_estado(vender_boleto, self.estado, cuerpo.get("nombre", ""), cuerpo.get("cedula", ""), cuerpo.get("edad"), cuerpo.get("partido_id", ""), cuerpo.get("tipo_entrada", ""), cuerpo.get("asiento"))  # Vende el boleto
+        return 201, self.describir_boleto(cliente)  # Devuelve el boleto
+
+    async def retener(self, consulta, cuerpo, codigo=None):  # Método para apartar asientos mientras el cliente paga
+        partido, retencion = retener_asientos(self.estado, cuerpo.get("partido_id", ""), cuerpo.get("tipo_entrada", ""), cuerpo.get("cantidad", 1))  # Aparta los asientos
+        ahora = time.monotonic()  # Momento actual
+        for vencido in [c for c, (_, r) in self.retenciones.items() if r.expira is None or r.expira <= ahora]:  # Busca las retenciones terminadas
+            del self.retenciones[vencido]  # Las olvida
+        codigo = secrets.token_urlsafe(8)  # Código de la retención
+        self.retenciones[codigo] = (partido, retencion)  # Guarda la retención
+        mapa = partido.asientos  # Mapa de asientos del partido
+        return 201, {"retencion": codigo, "asientos": [mapa.describir(retencion.seccion, retencion.indice + i) for i in range(retencion.cantidad)], "expira_en": retencion.expira - ahora}  # Devuelve la retención
+
+    async def confirmar(self, consulta, cuerpo, codigo=None):  # Método para vender los asientos de una retención
+        if codigo not in self.retenciones:  # Verifica el código
+            raise ElementoNoEncontrado(f"No existe la retención {codigo}")  # Error si no existe
+        partido, retencion = self.retenciones.pop(codigo)  # Saca la retención
+        await self.precalcular_vampiro(cuerpo.get("cedula", ""))  # Calcula el descuento fuera del ciclo de eventos
+        try:
+            clientes = await self.en_estado(confirmar_retencion, self.estado, partido, retencion, cuerpo.get("nombre", ""), cuerpo.get("cedula", ""), cuerpo.get("edad"))  # Vende los asientos
+        except ErrorVenta:  # Si los datos son inválidos
+            if retencion.expira is not None:  # Si la retención sigue vigente
+                self.retenciones[codigo] = (partido, retencion)  # La conserva para otro intento
+            raise  # Propaga el error
+        return 201, [self.describir_boleto(cliente) for cliente in clientes]  # Devuelve los boletos
+
+    async def cancelar(self, consulta, cuerpo, codigo=None):  # Método para cancelar una retención
+        if codigo not in self.retenciones:  # Verifica el código
+            raise ElementoNoEncontrado(f"No existe la retención {codigo}")  # Error si no existe
+        partido, retencion = self.retenciones.pop(codigo)  # Saca la retención
+        partido.asientos.cancelar(retencion)  # Devuelve los asientos
+        return 200, {"retencion": codigo, "cancelada": True}  # Confirma la cancelación
+
+    async def validar(self, consulta, cuerpo, codigo=None):  # Método para validar un boleto en la entrada
+        resultado, cliente = await self.en_estado(self.estado.validar, str(cuerpo.get("id_boleto", "")))  # Valida el boleto
+        return 200, {"resultado": resultado, "nombre": cliente.nombre if cliente else None}  # Devuelve el resultado
+
+    async def comprar(self, consulta, cuerpo, codigo=None):  # Método para comprar productos del restaurante
+        return 201, await self.en_estado(comprar_productos, self.estado, cuerpo.get("cedula", ""), cuerpo.get("productos", []))  # Compra los productos
+
+    def describir_boleto(self, cliente):  # Método para convertir un boleto en diccionario
+        mapa = self.estado.catalogo.partido(cliente.partido_id).asientos  # Mapa de asientos del partido
+        return {"id_boleto": cliente.id_boleto, "partido_id": cliente.partido_id, "asiento": mapa.describir(cliente.tipo_entrada, cliente.asiento), "total": cliente.total}  # Devuelve el boleto
+
+    async def responder(self, metodo, ruta, cuerpo):  # Método para elegir la operación de una solicitud y convertir los errores en códigos HTTP
+        url = urllib.parse.urlsplit(ruta)  # Separa la ruta y la consulta
+        partes = [parte for parte in url.path.split("/") if parte]  # Partes de la ruta
+        consulta = dict(urllib.parse.parse_qsl(url.query))  # Parámetros de la consulta
+        nombre, codigo = (partes[0] if partes else ""), None  # Recurso pedido
+        if nombre == "retenciones" and len(partes) == 3 and partes[2] == "confirmar":  # Confirmación de una retención
+            nombre, codigo = "confirmar", partes[1]  # Recurso y código de la retención
+        elif nombre == "retenciones" and len(partes) == 2:  # Cancelación de una retención
+            codigo = partes[1]  # Código de la retención
+        funcion = self.rutas.get((metodo, nombre))  # Busca la operación
+        if funcion is None:  # Si la ruta no existe
+            return (405, {"error": f"Método {metodo} no permitido en {url.path}"}) if any(n == nombre for _, n in self.rutas) else (404, {"error": f"No existe la ruta {url.path}"})  # Error de ruta
+        try:
+            datos = json.loads(cuerpo) if cuerpo else {}  # Lee el cuerpo de la solicitud
+        except ValueError as e:  # Si el cuerpo no es JSON válido
+            return 400, {"error": f"El cuerpo no es JSON válido: {e}"}  # Solicitud inválida
+        if not isinstance(datos, dict):  # Verifica que el cuerpo sea un objeto
+            return 400, {"error": "El cuerpo debe ser un objeto JSON"}  # Solicitud inválida
+        try:
+            with metricas.cronometro(f"servicio_{metodo}_{nombre}"):  # Mide la duración de la operación
+                return await funcion(consulta, datos, codigo)  # Ejecuta la operación
+        except ElementoNoEncontrado as e:  # Si algo no existe
+            return 404, {"error": str(e)}  # No encontrado
+        except StockInsuficiente as e:  # Si no alcanza el stock
+            return 409, {"error": str(e)}  # Conflicto
+        except ErrorVenta as e:  # Si los datos de la venta o la compra son inválidos
+            return 400, {"error": str(e)}  # Solicitud inválida
+        except Exception as e:  # Cualquier otro error es un fallo del servicio
+            metricas.contar("servicio_error_interno")  # Cuenta el fallo
+            print(f"Error interno en {metodo} {url.path}: {e!r}", file=sys.stderr)  # Deja constancia del fallo
+            return 500, {"error": "Error interno del servicio"}  # Error del servidor
+
+    async def atender(self, lector, escritor):  # Método para atender una conexión con varias solicitudes seguidas
+        try:
+            while True:  # Atiende las solicitudes de la conexión
+                linea = await lector.readline()  # Lee la línea de la solicitud
+                if not linea.strip():  # Si el cliente cerró la conexión
+                    break  # Termina
+                metodo, ruta, version = linea.decode("latin-1").split(maxsplit=2)  # Método, ruta y versión
+                cabeceras = {}  # Cabeceras de la solicitud
+                while (cabecera := await lector.readline()) not in (b"\r\n", b"\n", b""):  # Lee hasta la línea vacía
+                    nombre, _, valor = cabecera.decode("latin-1").partition(":")  # Separa el nombre y el valor
+                    cabeceras[nombre.strip().lower()] = valor.strip()  # Guarda la cabecera
+                largo = int(cabeceras.get("content-length", 0))  # Tamaño del cuerpo
+                if largo > TAMANO_MAXIMO_SOLICITUD:  # Verifica el tamaño del cuerpo
+                    codigo, datos = 413, {"error": "Solicitud demasiado grande"}  # Error si es muy grande
+                else:
+                    codigo, datos = await self.responder(metodo.upper(), ruta, await lector.readexactly(largo) if largo else b"")  # Ejecuta la operación
+                mantener = version.strip().upper() == "HTTP/1.1" and cabeceras.get("connection", "").lower() != "close" and codigo != 413  # Indica si la conexión sigue abierta
+                contenido = json.dumps(datos, ensure_ascii=False).encode("utf-8")  # Cuerpo de la respuesta
+                escritor.write(f"HTTP/1.1 {codigo} {self.ESTADOS_HTTP.get(codigo, '')}\r\nContent-Type: application/json; charset=utf-8\r\nContent-Length: {len(contenido)}\r\nConnection: {'keep-alive' if mantener else 'close'}\r\n\r\n".encode("latin-1") + contenido)  # Escribe la respuesta
+                await escritor.drain()  # Envía la respuesta
+                if not mantener:  # Si la conexión se cierra
+                    break  # Termina
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):  # Conexión cortada o solicitud mal formada
+            pass  # Cierra la conexión
+        finally:
+            escritor.close()  # Cierra la conexión
+
+    async def servir(self, anfitrion, puerto):  # Método para escuchar conexiones hasta que se detenga el programa
+        servidor = await asyncio.start_server(self.atender, anfitrion, puerto)  # Abre el puerto
+        print(f"Servicio de taquilla escuchando en http://{anfitrion}:{puerto} (Ctrl+C para detener)")  # Muestra la dirección
+        async with servidor:  # Cierra el puerto al terminar
+            await servidor.serve_forever()  # Atiende las conexiones
+
+    def cerrar(self):  # Método para cerrar los procesos auxiliares
+        if self.ejecutor is not None:  # Si hay procesos auxiliares
+            self.ejecutor.shutdown()  # Cierra los procesos
 
 # Función para cargar datos de equipos, estadios y partidos
-def cargar_datos():
-    equipos = cargar_equipos()  # Carga los equipos
-    estadios = cargar_estadios()  # Carga los estadios
-    partidos = cargar_partidos(equipos, estadios)  # Carga los partidos
-    return equipos, estadios, partidos  # Devuelve los datos
-
-# Función para cargar equipos desde una URL
-def cargar_equipos():
-    url_equipos = "https://raw.githubusercontent.com/Algoritmos-y-Programacion/api-proyecto/main/teams.json"  # URL de equipos
+@metricas.medir()
+def cargar_datos(url_base=None, directorio_cache=None):
+    datos = cargar_catalogos(url_base, directorio_cache)  # Descarga los tres catálogos al mismo tiempo
+    catalogo = Catalogo(cargar_equipos(datos["equipos"]), cargar_estadios(datos["estadios"]))  # Indexa los equipos y estadios
+    catalogo.agregar_partidos(cargar_partidos(datos["partidos"], catalogo))  # Carga e indexa los partidos
+    return catalogo  # Devuelve el catálogo
+
+# Función para descargar los catálogos de equipos, estadios y partidos en paralelo
+def cargar_catalogos(url_base=None, directorio_cache=None):
+    url_base = url_base or os.environ.get("EUROCOPA_URL_DATOS") or URL_BASE_DATOS  # Usa la URL indicada, la del entorno o la de GitHub
+    if os.path.isdir(url_base):  # Si la fuente es un directorio local
+        url_base = pathlib.Path(url_base).resolve().as_uri()  # Lo convierte en una URL file://
+    if not url_base.endswith("/"):  # Verifica que la URL termine en barra
+        url_base += "/"  # Agrega la barra final
+    directorio_cache = directorio_fuente_cache(url_base, directorio_cache or DIRECTORIO_CACHE)  # Copia local propia de esta fuente
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(CATALOGOS)) as ejecutor:  # Crea un hilo por catálogo
+        futuros = {nombre: ejecutor.submit(descargar_catalogo, nombre, url_base, directorio_cache) for nombre in CATALOGOS}  # Lanza las descargas
+        return {nombre: futuro.result() for nombre, futuro in futuros.items()}  # Espera y devuelve los catálogos
+
+# Función para obtener el directorio de la copia local de una fuente de datos
+def directorio_fuente_cache(url_base, directorio_cache):
+    if url_base.startswith("file:"):  # Los archivos locales no necesitan copia
+        return None  # No se guarda copia local
+    return os.path.join(directorio_cache, hashlib.sha256(url_base.encode("utf-8")).hexdigest()[:16])  # Un subdirectorio por URL para no mezclar fuentes
+
+# Función para descargar un catálogo usando la copia local si la fuente no responde
+@metricas.medir()
+def descargar_catalogo(nombre, url_base, directorio_cache):
+    ruta_cache = os.path.join(directorio_cache, CATALOGOS[nombre]) if directorio_cache else None  # Ruta de la copia local del catálogo
+    datos_cache, meta_cache = leer_cache_catalogo(nombre, ruta_cache) if ruta_cache else (None, {})  # Lee la copia local si existe
+    solicitud = urllib.request.Request(url_base + CATALOGOS[nombre])  # Crea la solicitud al catálogo
+    if datos_cache is not None and meta_cache.get("etag"):  # Si la copia local tiene ETag
+        solicitud.add_header("If-None-Match", meta_cache["etag"])  # Pide el catálogo solo si cambió
+    if datos_cache is not None and meta_cache.get("last_modified"):  # Si la copia local tiene fecha de modificación
+        solicitud.add_header("If-Modified-Since", meta_cache["last_modified"])  # Pide el catálogo solo si cambió
+    try:
+        with urllib.request.urlopen(solicitud, timeout=TIEMPO_ESPERA_DESCARGA) as response:  # Hace una solicitud GET
+            datos = json.load(response)  # Convierte la respuesta a JSON
+            meta = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}  # Guarda los datos para revalidar
+        validar_catalogo(nombre, datos)  # Verifica que el catálogo tenga la forma esperada
+        if ruta_cache:  # Si la fuente tiene copia local
+            guardar_cache_catalogo(ruta_cache, datos, meta)  # Actualiza la copia local
+        return datos  # Devuelve el catálogo descargado
+    except urllib.error.HTTPError as e:  # Captura respuestas HTTP de error
+        if e.code == 304 and datos_cache is not None:  # El catálogo no cambió desde la última descarga
+            return datos_cache  # Devuelve la copia local
+        error = e  # Guarda el error
+    except (urllib.error.URLError, OSError, ValueError) as e:  # Captura errores de red, de archivo o de formato
+        error = e  # Guarda el error
+    if datos_cache is not None:  # Si hay copia local
+        print(f"Error al cargar {nombre}: {error}. Se usa la copia local.")  # Avisa que se usa la copia local
+        return datos_cache  # Devuelve la copia local
+    print(f"Error al cargar {nombre}: {error}")  # Imprime el error
+    return []  # Devuelve una lista vacía
+
+# Función para verificar que un catálogo tenga la forma esperada
+def validar_catalogo(nombre, datos):
+    if not isinstance(datos, list):  # Verifica que el catálogo sea una lista
+        raise ValueError(f"el catálogo de {nombre} no es una lista")  # Error si no es una lista
+    for posicion, item in enumerate(datos):  # Recorre los elementos del catálogo
+        faltantes = [campo for campo in CAMPOS_CATALOGOS[nombre] if not isinstance(item, dict) or campo not in item]  # Busca campos faltantes
+        if faltantes:  # Verifica si faltan campos
+            raise ValueError(f"al elemento {posicion} de {nombre} le faltan los campos {faltantes}")  # Error si faltan campos
+    if nombre == "estadios":  # Los estadios tienen una capacidad de dos valores
+        for item in datos:  # Recorre los estadios
+            if len(item["capacity"]) != 2:  # Verifica la capacidad general y VIP
+                raise ValueError(f"el estadio {item['name']} no tiene capacidad general y VIP")  # Error si la capacidad es inválida
+
+# Función para leer la copia local de un catálogo
+def leer_cache_catalogo(nombre, ruta_cache):
     try:
-        response = requests.get(url_equipos)  # Hace una solicitud GET
-        response.raise_for_status()  # Verifica si hay errores
-        equipos_data = response.json()  # Convierte la respuesta a JSON
-        return [Equipo(e["id"], e["code"], e["name"], e["group"]) for e in equipos_data]  # Crea una lista de equipos
-    except requests.exceptions.RequestException as e:  # Captura excepciones
-        print(f"Error al cargar equipos: {e}")  # Imprime el error
-        return []  # Devuelve una lista vacía
-
-# Función para cargar estadios desde una URL
-def cargar_estadios():
-    url_estadios = "https://raw.githubusercontent.com/Algoritmos-y-Programacion/api-proyecto/main/stadiums.json"  # URL de estadios
+        with open(ruta_cache, encoding="utf-8") as archivo:  # Abre la copia local
+            datos = json.load(archivo)  # Lee el catálogo
+        validar_catalogo(nombre, datos)  # Verifica que la copia local sea válida
+    except (OSError, ValueError):  # Si no existe o está dañada
+        return None, {}  # No hay copia local utilizable
     try:
-        response = urllib.request.urlopen(url_estadios)  # Hace una solicitud GET
-        data = json.load(response)  # Convierte la respuesta a JSON
-        estadios = []  # Inicializa la lista de estadios
-        for item in data:  # Recorre los datos
-            restaurants = [Restaurant(r["name"], [Product(p["name"], p["quantity"], p["price"], p["adicional"], p["stock"]) for p in r["products"]]) for r in item["restaurants"]]  # Crea una lista de restaurantes
-            estadio = Stadium(item["id"], item["name"], item["city"], item["capacity"][0], item["capacity"][1], restaurants)  # Crea un estadio
-            estadios.append(estadio)  # Añade el estadio a la lista
-        return estadios  # Devuelve la lista de estadios
-    except urllib.error.URLError as e:  # Captura excepciones
-        print(f"Error al cargar estadios: {e}")  # Imprime el error
-        return []  # Devuelve una lista vacía
-
-# Función para cargar partidos desde una URL
-def cargar_partidos(equipos, estadios):
-    url_partidos = "https://raw.githubusercontent.com/Algoritmos-y-Programacion/api-proyecto/main/matches.json"  # URL de partidos
+        with open(ruta_cache + ".meta", encoding="utf-8") as archivo:  # Abre los datos de revalidación
+            meta = json.load(archivo)  # Lee los datos de revalidación
+    except (OSError, ValueError):  # Si no existen o están dañados
+        meta = {}  # Se descargará el catálogo completo
+    return datos, meta  # Devuelve la copia local y sus datos de revalidación
+
+# Función para guardar la copia local de un catálogo
+def guardar_cache_catalogo(ruta_cache, datos, meta):
     try:
-        response = requests.get(url_partidos)  # Hace una solicitud GET
-        response.raise_for_status()  # Verifica si hay errores
-        partidos_data = response.json()  # Convierte la respuesta a JSON
-        return [Match(m, equipos, estadios) for m in partidos_data]  # Crea una lista de partidos
-    except requests.exceptions.RequestException as e:  # Captura excepciones
-        print(f"Error al cargar partidos: {e}")  # Imprime el error
-        return []  # Devuelve una lista vacía
+        os.makedirs(os.path.dirname(ruta_cache), exist_ok=True)  # Crea el directorio de caché si no existe
+        for ruta, contenido in ((ruta_cache, datos), (ruta_cache + ".meta", meta)):  # Recorre el catálogo y sus datos de revalidación
+            with open(ruta + ".tmp", "w", encoding="utf-8") as archivo:  # Escribe en un archivo temporal
+                json.dump(contenido, archivo)  # Guarda el contenido
+            os.replace(ruta + ".tmp", ruta)  # Reemplaza la copia anterior de forma atómica
+    except OSError as e:  # Captura errores al escribir
+        print(f"No se pudo guardar la copia local: {e}")  # Avisa sin detener la carga
+
+# Función para crear los equipos a partir del catálogo
+def cargar_equipos(equipos_data):
+    return [Equipo(e["id"], e["code"], e["name"], e["group"]) for e in equipos_data]  # Crea una lista de equipos
+
+# Función para crear los estadios a partir del catálogo
+@metricas.medir()
+def cargar_estadios(estadios_data):
+    estadios = []  # Inicializa la lista de estadios
+    for item in estadios_data:  # Recorre los datos
+        restaurants = [Restaurant(r["name"], [Product(p["name"], p["quantity"], p["price"], p["adicional"], p["stock"]) for p in r["products"]]) for r in item["restaurants"]]  # Crea una lista de restaurantes
+        estadio = Stadium(item["id"], item["name"], item["city"], item["capacity"][0], item["capacity"][1], restaurants)  # Crea un estadio
+        estadios.append(estadio)  # Añade el estadio a la lista
+    return estadios  # Devuelve la lista de estadios
+
+# Función para crear los partidos a partir del catálogo
+@metricas.medir()
+def cargar_partidos(partidos_data, catalogo):
+    partidos = []  # Inicializa la lista de partidos
+    for m in partidos_data:  # Recorre los datos
+        try:
+            partidos.append(Match(m, catalogo))  # Crea el partido
+        except ElementoNoEncontrado as e:  # Captura referencias a equipos o estadios inexistentes
+            print(f"Error al cargar el partido {m['id']}: {e}")  # Imprime el error
+    return partidos  # Devuelve la lista de partidos
 
 # Función para verificar si un número es vampiro
 def es_numero_vampiro(cedula):
+    if cedula in cache_vampiros:  # Verifica si la cédula ya fue calculada
+        return cache_vampiros[cedula]  # Devuelve el resultado guardado
     cedula_str = str(cedula)  # Convierte la cédula a cadena
     cedula_length = len(cedula_str)  # Obtiene la longitud de la cédula
-    if cedula_length % 2 != 0:  # Verifica si la longitud es impar
-        return False  # No es vampiro si es impar
-    for i in range(1, 10**(cedula_length // 2)):  # Itera posibles factores
-        if (cedula % i == 0):  # Verifica si i es un factor
-            factor1 = i  # Asigna el primer factor
-            factor2 = cedula // i  # Asigna el segundo factor
-            if len(str(factor1)) == cedula_length // 2 and len(str(factor2)) == cedula_length // 2:  # Verifica la longitud de los factores
-                digits = list(cedula_str)  # Convierte la cédula a lista de dígitos
-                factors_digits = list(str(factor1) + str(factor2))  # Convierte los factores a lista de dígitos
-                factors_digits.sort()  # Ordena los dígitos de los factores
-                digits.sort()  # Ordena los dígitos de la cédula
-                if factors_digits == digits:  # Compara los dígitos
-                    return True  # Es vampiro si coinciden
-    return False  # No es vampiro si no coincide
+    resultado = False  # Inicializa el resultado
+    if cedula_length % 2 == 0:  # Solo los números de longitud par pueden ser vampiro
+        mitad = cedula_length // 2  # Obtiene la longitud de cada factor
+        digitos = sorted(cedula_str)  # Firma de dígitos de la cédula
+        minimo = max(10 ** (mitad - 1), -(-cedula // (10 ** mitad - 1)))  # Menor factor posible para que el otro tenga la misma longitud
+        maximo = math.isqrt(cedula)  # El factor menor nunca supera la raíz cuadrada
+        for factor1 in range(minimo, maximo + 1):  # Itera solo los factores válidos
+            if cedula % factor1 == 0:  # Verifica si es un factor
+                factor2 = cedula // factor1  # Obtiene el segundo factor
+                if sorted(str(factor1) + str(factor2)) == digitos:  # Compara las firmas de dígitos
+                    resultado = True  # Es vampiro si coinciden
+                    break  # Termina la búsqueda
+    cache_vampiros[cedula] = resultado  # Guarda el resultado para la próxima vez
+    return resultado  # Devuelve el resultado
+
+# Función para clasificar muchas cédulas como números vampiro de una sola vez
+def clasificar_vampiros(cedulas):
+    resultados = {}  # Inicializa el diccionario de resultados
+    for cedula in cedulas:  # Recorre las cédulas
+        numero = int(cedula) if str(cedula).isdigit() else None  # Convierte la cédula a número si es válida
+        resultados[cedula] = numero is not None and es_numero_vampiro(numero)  # Clasifica la cédula
+    return resultados  # Devuelve las cédulas clasificadas
 
 # Función para verificar si un número es perfecto
 def es_numero_perfecto(cedula):
+    if cedula in cache_perfectos:  # Verifica si la cédula ya fue calculada
+        return cache_perfectos[cedula]  # Devuelve el resultado guardado
+    if cedula <= 0:  # El cero y los negativos se resuelven igual que la suma directa
+        resultado = cedula == 0  # La suma vacía de divisores es cero
+    elif cedula <= NUMEROS_PERFECTOS[-1]:  # No existen perfectos impares por debajo de este límite
+        resultado = cedula in NUMEROS_PERFECTOS  # Busca en los perfectos conocidos
+    else:
+        suma_divisores = 1 if cedula > 1 else 0  # El 1 divide a todo número mayor que 1
+        for divisor in range(2, math.isqrt(cedula) + 1):  # Recorre los divisores hasta la raíz cuadrada
+            if cedula % divisor == 0:  # Verifica si es divisor
+                pareja = cedula // divisor  # Obtiene el divisor complementario
+                suma_divisores += divisor if pareja == divisor else divisor + pareja  # Suma la pareja de divisores
+        resultado = suma_divisores == cedula  # Verifica si la suma es igual a la cédula
+    cache_perfectos[cedula] = resultado  # Guarda el resultado para la próxima vez
+    return resultado  # Devuelve el resultado
+
+# Función para verificar si un número es perfecto sumando todos sus divisores (versión de referencia)
+def es_numero_perfecto_directo(cedula):
     suma_divisores = sum(divisor for divisor in range(1, cedula) if cedula % divisor == 0)  # Suma los divisores de la cédula
     return suma_divisores == cedula  # Verifica si la suma es igual a la cédula
 
+# Función para clasificar muchas cédulas como números perfectos de una sola vez
+def clasificar_perfectos(cedulas):
+    resultados = {}  # Inicializa el diccionario de resultados
+    for cedula in cedulas:  # Recorre las cédulas
+        numero = int(cedula) if str(cedula).isdigit() else None  # Convierte la cédula a número si es válida
+        resultados[cedula] = numero is not None and es_numero_perfecto(numero)  # Clasifica la cédula
+    return resultados  # Devuelve las cédulas clasificadas
+
+# Función para comparar es_numero_perfecto con la versión de referencia
+def comprobar_numero_perfecto(cedulas):
+    diferencias = []  # Inicializa la lista de diferencias
+    for cedula in cedulas:  # Recorre las cédulas a comparar
+        if es_numero_perfecto(cedula) != es_numero_perfecto_directo(cedula):  # Compara ambas versiones
+            diferencias.append(cedula)  # Guarda la cédula con resultado distinto
+    return diferencias  # Devuelve las cédulas con resultados distintos
+
+# Función para normalizar un texto para las búsquedas (minúsculas y sin acentos)
+def normalizar_texto(texto):
+    texto = unicodedata.normalize("NFKD", str(texto).strip().lower())  # Separa los acentos de las letras
+    return "".join(c for c in texto if not unicodedata.combining(c))  # Elimina los acentos
+
 # Función para buscar partidos por país
-def buscar_partidos_por_pais(pais, partidos):
-    return [partido for partido in partidos if partido.home.name == pais or partido.away.name == pais]  # Devuelve los partidos del país
+def buscar_partidos_por_pais(pais, buscador):
+    return buscador.buscar(equipo=pais)  # Devuelve los partidos del país
 
 # Función para buscar partidos por estadio
-def buscar_partidos_por_estadio(estadio, partidos):
-    return [partido for partido in partidos if partido.estadio.name == estadio]  # Devuelve los partidos en el estadio
+def buscar_partidos_por_estadio(estadio, buscador):
+    return buscador.buscar(estadio=estadio)  # Devuelve los partidos en el estadio
+
+# Función para verificar que un texto sea una fecha aaaa-mm-dd
+def es_fecha_valida(texto):
+    try:
+        datetime.date.fromisoformat(texto.strip())  # Intenta leer la fecha
+    except ValueError:  # Si está vacía o no tiene el formato
+        return False  # La fecha es inválida
+    return True  # La fecha es válida
 
 # Función para buscar partidos por fecha
-def buscar_partidos_por_fecha(fecha, partidos):
-    return [partido for partido in partidos if partido.date == fecha]  # Devuelve los partidos en la fecha
+def buscar_partidos_por_fecha(fecha, buscador):
+    if not es_fecha_valida(fecha):  # Una fecha vacía no debe tomarse como "sin filtro"
+        return []  # No hay partidos en una fecha inválida
+    return buscador.buscar(desde=fecha.strip(), hasta=fecha.strip())  # Devuelve los partidos en la fecha
+
+# Función para buscar partidos según el filtro elegido en el menú
+@metricas.medir()
+def buscar_partidos(buscador):
+    op = input("Elija el filtro (pais, estadio, fecha, ciudad, grupo, rango, combinado): ").lower()  # Solicita el filtro
+    if op == "pais":  # Si el filtro es país
+        pais = input("Nombre o código del pais: ")  # Solicita el nombre del país
+        partidos = buscar_partidos_por_pais(pais, buscador)  # Busca los partidos por país
+        descripcion = f"de {pais}"  # Describe la búsqueda
+    elif op == "estadio":  # Si el filtro es estadio
+        estadio = input("Nombre del estadio: ")  # Solicita el nombre del estadio
+        partidos = buscar_partidos_por_estadio(estadio, buscador)  # Busca los partidos por estadio
+        descripcion = f"en el estadio {estadio}"  # Describe la búsqueda
+    elif op == "fecha":  # Si el filtro es fecha
+        fecha = input("Fecha del partido (aaaa-mm-dd): ")  # Solicita la fecha
+        if not es_fecha_valida(fecha):  # Verifica la fecha
+            print("Fecha inválida. Use el formato aaaa-mm-dd.")  # Mensaje de error
+            return  # Termina la función
+        partidos = buscar_partidos_por_fecha(fecha, buscador)  # Busca los partidos por fecha
+        descripcion = f"en la fecha {fecha}"  # Describe la búsqueda
+    elif op == "ciudad":  # Si el filtro es ciudad
+        ciudad = input("Nombre de la ciudad: ")  # Solicita la ciudad
+        partidos = buscador.buscar(ciudad=ciudad)  # Busca los partidos por ciudad
+        descripcion = f"en la ciudad {ciudad}"  # Describe la búsqueda
+    elif op == "grupo":  # Si el filtro es grupo
+        grupo = input("Grupo: ")  # Solicita el grupo
+        partidos = buscador.buscar(grupo=grupo)  # Busca los partidos por grupo
+        descripcion = f"del grupo {grupo}"  # Describe la búsqueda
+    elif op == "rango":  # Si el filtro es un rango de fechas
+        desde = input("Desde (aaaa-mm-dd): ")  # Solicita la fecha inicial
+        hasta = input("Hasta (aaaa-mm-dd): ")  # Solicita la fecha final
+        if not (es_fecha_valida(desde) and es_fecha_valida(hasta)):  # Verifica ambas fechas
+            print("Fechas inválidas. Use el formato aaaa-mm-dd.")  # Mensaje de error
+            return  # Termina la función
+        partidos = buscador.buscar(desde=desde, hasta=hasta)  # Busca los partidos en el rango
+        descripcion = f"entre {desde} y {hasta}"  # Describe la búsqueda
+    elif op == "combinado":  # Si se combinan varios filtros
+        print("Deje en blanco los filtros que no quiera usar.")  # Explica cómo omitir filtros
+        filtros = {campo: input(f"{etiqueta}: ") for campo, etiqueta in (("equipo", "País"), ("estadio", "Estadio"), ("ciudad", "Ciudad"), ("grupo", "Grupo"), ("desde", "Desde (aaaa-mm-dd)"), ("hasta", "Hasta (aaaa-mm-dd)"))}  # Solicita los filtros
+        if any(filtros[campo].strip() and not es_fecha_valida(filtros[campo]) for campo in ("desde", "hasta")):  # Verifica las fechas indicadas
+            print("Fechas inválidas. Use el formato aaaa-mm-dd.")  # Mensaje de error
+            return  # Termina la función
+        partidos = buscador.buscar(**filtros)  # Busca los partidos que cumplen todos los filtros
+        descripcion = "con esos filtros"  # Describe la búsqueda
+    else:
+        print("Opción incorrecta.")  # Mensaje si la opción es incorrecta
+        return  # Termina la función
+    if partidos:  # Verifica si hay partidos
+        print(f"Partidos {descripcion}:")  # Encabezado
+        for partido in partidos:  # Recorre los partidos
+            print(f"ID: {partido.id}, Fecha: {partido.date}, Equipo local: {partido.home.name}, Equipo visitante: {partido.away.name}, Estadio: {partido.estadio.name}\n-----")  # Muestra los partidos
+    else:
+        print(f"No se encontraron partidos {descripcion}.")  # Mensaje si no hay partidos
 
 # Función para solicitar datos del cliente
 def solicitar_datos_cliente(partidos):
@@ -181,6 +1510,7 @@ def mostrar_partidos(partidos):
         print("---------------------------")  # Separador
 
 # Función para calcular el costo de una entrada
+@metricas.medir()
 def calcular_costo_entrada(tipo_entrada, cedula):
     descuento = 0.5 if cedula.isdigit() and es_numero_vampiro(int(cedula)) else 0  # Calcula el descuento si la cédula es un número vampiro
     precio_base = 35 if tipo_entrada == "General" else 75 if tipo_entrada == "VIP" else None  # Asigna el precio base según el tipo de entrada
@@ -192,164 +1522,479 @@ def calcular_costo_entrada(tipo_entrada, cedula):
     return precio_base, descuento, iva, total  # Devuelve el precio base, descuento, IVA y total
 
 # Función para seleccionar un asiento
-def seleccionar_asiento(estadio):
-    print("----- Mapa del Estadio -----")  # Encabezado
-    for i in range(estadio.capacity_general):  # Recorre las filas del estadio
-        print(" ".join(["O" for _ in range(estadio.capacity_vip)]))  # Muestra los asientos disponibles
+@metricas.medir()
+def seleccionar_asiento(partido, seccion):
+    mapa = partido.asientos  # Obtiene el mapa de asientos del partido
+    sugerido = mapa.siguiente_libre(seccion)  # Busca el próximo asiento libre
+    if sugerido is None:  # Verifica si la sección está llena
+        print(f"No quedan asientos {seccion} disponibles para este partido.")  # Mensaje de error si no hay asientos
+        return None  # Devuelve None si no hay asientos
+    fila_sugerida, columna_sugerida = mapa.posicion(sugerido)  # Obtiene la fila y columna del asiento sugerido
+    print(f"----- Mapa del Estadio ({seccion}) -----")  # Encabezado
+    print(f"Asientos disponibles: {mapa.disponibles(seccion)} de {mapa.capacidad(seccion)}")  # Muestra los asientos libres
+    print(mapa.dibujar(seccion, fila_sugerida))  # Muestra las filas cercanas al asiento sugerido
+    print(f"Asiento sugerido: Fila {fila_sugerida}, Columna {columna_sugerida}")  # Muestra el asiento sugerido
     while True:  # Ciclo para seleccionar asiento
-        fila = int(input("Número de fila: "))  # Solicita la fila
-        columna = int(input("Número de columna: "))  # Solicita la columna
-        if 1 <= fila <= estadio.capacity_general and 1 <= columna <= estadio.capacity_vip:  # Verifica si la fila y columna son válidas
-            if estadio.asientos[fila - 1][columna - 1] == "Disponible":  # Verifica si el asiento está disponible
-                estadio.asientos[fila - 1][columna - 1] = "Ocupado"  # Marca el asiento como ocupado
-                return f"Fila {fila}, Columna {columna}"  # Devuelve la fila y columna seleccionada
+        fila = input("Número de fila (ENTER para el sugerido): ")  # Solicita la fila
+        if fila == "":  # Si no escribe nada toma el asiento sugerido
+            fila, columna = fila_sugerida, columna_sugerida  # Asigna el asiento sugerido
+        else:
+            fila = int(fila)  # Convierte la fila a número
+            columna = int(input("Número de columna: "))  # Solicita la columna
+        indice = mapa.indice(fila, columna)  # Convierte la fila y columna en un índice
+        if 1 <= columna <= mapa.asientos_por_fila and mapa.es_valido(seccion, indice):  # Verifica si la fila y columna son válidas
+            retencion = mapa.retener(seccion, indice)  # Intenta apartar el asiento mientras se paga
+            if retencion:  # Verifica si se pudo apartar
+                return retencion  # Devuelve la retención del asiento seleccionado
             else:
                 print("El asiento seleccionado está ocupado. Por favor, elija otro.")  # Mensaje de error si el asiento está ocupado
         else:
             print("Asiento inválido. Intente nuevamente.")  # Mensaje de error si la fila o columna son inválidas
 
 # Función para vender una entrada
-def vender_entrada(partidos, estadios, clientes):
-    nombre, cedula, edad, partido_id, tipo_entrada = solicitar_datos_cliente(partidos)  # Solicita los datos del cliente
-    partido = next((p for p in partidos if p.id == partido_id), None)  # Busca el partido por ID
-    if partido is None:  # Verifica si el partido existe
+@metricas.medir()
+def vender_entrada(estado):
+    catalogo = estado.catalogo  # Obtiene el catálogo
+    nombre, cedula, edad, partido_id, tipo_entrada = solicitar_datos_cliente(catalogo.partidos)  # Solicita los datos del cliente
+    try:
+        partido = catalogo.partido(partido_id)  # Busca el partido por ID
+    except ElementoNoEncontrado:  # Verifica si el partido existe
         print("Partido no encontrado.")  # Mensaje de error si no encuentra el partido
         return  # Termina la función si no encuentra el partido
     estadio = partido.estadio  # Asigna el estadio del partido
-    asiento = seleccionar_asiento(estadio)  # Selecciona un asiento
     costo_entrada = calcular_costo_entrada(tipo_entrada, cedula)  # Calcula el costo de la entrada
     if costo_entrada is None:  # Verifica si el tipo de entrada es válido
         return  # Termina la función si el tipo de entrada es inválido
+    retencion = seleccionar_asiento(partido, tipo_entrada)  # Aparta un asiento en la sección del tipo de entrada
+    if retencion is None:  # Verifica si se pudo asignar un asiento
+        return  # Termina la función si no hay asientos
+    asiento = partido.asientos.describir(tipo_entrada, retencion.indice)  # Describe el asiento seleccionado
     subtotal, descuento, iva, total = costo_entrada  # Desempaqueta el costo de la entrada
     print(f"----- Detalle del Boleto -----\nNombre del cliente: {nombre}\nCédula: {cedula}\nEdad: {edad}\nPartido: {partido.home.name} vs {partido.away.name}\nEstadio: {estadio.name}\nAsiento: {asiento}\nCosto:\nSubtotal: ${subtotal}\nDescuento: ${subtotal * descuento}\nIVA (16%): ${iva}\nTotal: ${total}")  # Muestra el detalle del boleto
     if input("¿Quiere pagar la entrada? (Si/No): ").lower() == "si":  # Pregunta si quiere pagar la entrada
-        cliente = Cliente(nombre, cedula, edad, tipo_entrada, estadio.name)  # Crea un cliente
-        clientes.append(cliente)  # Añade el cliente a la lista
+        if not partido.asientos.confirmar(retencion):  # Ocupa el asiento si la retención sigue vigente
+            print("El tiempo para pagar el asiento venció. Intente la compra nuevamente.")  # Mensaje si la retención venció
+            return  # Termina la función
+        cliente = Cliente(nombre, cedula, edad, tipo_entrada, estadio.name, estado.boletos.emitir_id(), partido.id, retencion.indice, total)  # Crea un cliente con un ID único
+        try:
+            estado.vender(cliente)  # Guarda y registra el boleto
+        except Exception:  # Si no se pudo guardar
+            partido.asientos.liberar(tipo_entrada, retencion.indice)  # Devuelve el asiento
+            raise  # Propaga el error
         print(f"Pago exitoso. Su entrada ha sido reservada. Su ID de entrada es: {cliente.id_boleto}")  # Mensaje de éxito
     else:
+        partido.asientos.cancelar(retencion)  # Devuelve el asiento apartado
         print("Venta de entrada cancelada.")  # Mensaje de cancelación
 
+# Define la excepción ErrorVenta para los pedidos que no se pueden vender
+class ErrorVenta(ValueError):
+    pass
+
+# Función para limpiar y verificar los datos de un comprador
+def validar_datos_cliente(nombre, cedula, edad):
+    nombre, cedula = str(nombre).strip(), str(cedula).strip()  # Limpia los datos del comprador
+    if not nombre:  # Verifica el nombre
+        raise ErrorVenta("El nombre está vacío")  # Error si no hay nombre
+    if not cedula.isdigit():  # Verifica la cédula
+        raise ErrorVenta(f"Cédula inválida: {cedula}")  # Error si la cédula no es numérica
+    try:
+        edad = int(edad)  # Convierte la edad a número
+    except (TypeError, ValueError):  # Si la edad no es un número
+        raise ErrorVenta(f"Edad inválida: {edad}") from None  # Error si la edad es inválida
+    return nombre, cedula, edad  # Devuelve los datos limpios
+
+# Función para vender un boleto sin interacción (usada por la venta masiva)
+@metricas.medir()
+def vender_boleto(estado, nombre, cedula, edad, partido_id, tipo_entrada, asiento=None):
+    nombre, cedula, edad = validar_datos_cliente(nombre, cedula, edad)  # Verifica los datos del comprador
+    tipo_entrada = str(tipo_entrada).strip()  # Limpia el tipo de entrada
+    if tipo_entrada not in ("General", "VIP"):  # Verifica el tipo de entrada
+        raise ErrorVenta(f"Tipo de entrada inválido: {tipo_entrada}")  # Error si el tipo es inválido
+    try:
+        partido = estado.catalogo.partido(partido_id)  # Busca el partido por ID
+    except ElementoNoEncontrado as e:  # Si el partido no existe
+        raise ErrorVenta(str(e)) from None  # Error si el partido no existe
+    subtotal, descuento, iva, total = calcular_costo_entrada(tipo_entrada, cedula)  # Calcula el costo de la entrada
+    mapa = partido.asientos  # Mapa de asientos del partido
+    if asiento:  # Si el pedido indica el asiento como fila-columna
+        try:
+            fila, columna = (int(parte) for parte in str(asiento).split("-"))  # Separa la fila y la columna
+        except ValueError:  # Si el formato es incorrecto
+            raise ErrorVenta(f"Asiento inválido: {asiento}") from None  # Error si el asiento es inválido
+        indice = mapa.indice(fila, columna)  # Convierte la fila y columna en un índice
+        if not 1 <= columna <= mapa.asientos_por_fila or not mapa.es_valido(tipo_entrada, indice) or not mapa.reservar(tipo_entrada, indice):  # Intenta ocupar el asiento
+            raise ErrorVenta(f"Asiento no disponible: {asiento}")  # Error si el asiento no existe o está ocupado
+    else:
+        retencion = mapa.retener(tipo_entrada)  # Aparta el próximo asiento libre
+        if retencion is None or not mapa.confirmar(retencion):  # Lo ocupa de inmediato
+            raise ErrorVenta(f"No quedan asientos {tipo_entrada}")  # Error si la sección está llena
+        indice = retencion.indice  # Índice del asiento asignado
+    cliente = Cliente(nombre, cedula, edad, tipo_entrada, partido.estadio.name, estado.boletos.emitir_id(), partido.id, indice, total)  # Crea el cliente
+    try:
+        estado.vender(cliente)  # Guarda y registra el boleto
+    except Exception:  # Si no se pudo guardar
+        mapa.liberar(tipo_entrada, indice)  # Devuelve el asiento
+        raise  # Propaga el error
+    return cliente  # Devuelve el cliente
+
+# Función para apartar asientos de un partido sin interacción (usada por el servicio)
+@metricas.medir()
+def retener_asientos(estado, partido_id, tipo_entrada, cantidad=1, duracion=TIEMPO_RETENCION):
+    if tipo_entrada not in ("General", "VIP"):  # Verifica el tipo de entrada
+        raise ErrorVenta(f"Tipo de entrada inválido: {tipo_entrada}")  # Error si el tipo es inválido
+    try:
+        cantidad = int(cantidad)  # Convierte la cantidad a número
+    except (TypeError, ValueError):  # Si la cantidad no es un número
+        raise ErrorVenta(f"Cantidad inválida: {cantidad}") from None  # Error si la cantidad es inválida
+    partido = estado.catalogo.partido(partido_id)  # Busca el partido por ID
+    retencion = partido.asientos.retener(tipo_entrada, cantidad=cantidad, duracion=duracion)  # Aparta los asientos
+    if retencion is None:  # Si no hay asientos juntos
+        raise ErrorVenta(f"No quedan {cantidad} asientos {tipo_entrada} juntos")  # Error si la sección está llena
+    return partido, retencion  # Devuelve el partido y la retención
+
+# Función para vender a un comprador los asientos de una retención
+@metricas.medir()
+def confirmar_retencion(estado, partido, retencion, nombre, cedula, edad):
+    nombre, cedula, edad = validar_datos_cliente(nombre, cedula, edad)  # Verifica los datos del comprador
+    mapa = partido.asientos  # Mapa de asientos del partido
+    if not mapa.confirmar(retencion):  # Ocupa los asientos si la retención sigue vigente
+        raise ErrorVenta("La retención venció o fue cancelada")  # Error si la retención terminó
+    total = calcular_costo_entrada(retencion.seccion, cedula)[3]  # Precio de cada boleto
+    clientes = []  # Boletos vendidos
+    try:
+        with estado.lote():  # Guarda todos los boletos juntos
+            for i in range(retencion.cantidad):  # Un boleto por asiento
+                cliente = Cliente(nombre, cedula, edad, retencion.seccion, partido.estadio.name, estado.boletos.emitir_id(), partido.id, retencion.indice + i, total)  # Crea el cliente
+                estado.vender(cliente)  # Guarda y registra el boleto
+                clientes.append(cliente)  # Añade el boleto
+    except Exception:  # Si no se pudo guardar algún boleto
+        mapa.liberar(retencion.seccion, retencion.indice + len(clientes), retencion.cantidad - len(clientes))  # Devuelve los asientos no vendidos
+        raise  # Propaga el error
+    return clientes  # Devuelve los boletos
+
+# Función para leer pedidos de un archivo CSV o JSON Lines, uno por uno (las líneas dañadas se devuelven como ErrorVenta)
+def leer_pedidos(ruta):
+    with open(ruta, encoding="utf-8", newline="") as archivo:  # Abre el archivo de pedidos
+        if ruta.lower().endswith(".csv"):  # Si es un archivo CSV
+            yield from csv.DictReader(archivo)  # Devuelve cada fila como diccionario
+        else:
+            for numero, linea in enumerate(archivo, 1):  # Recorre las líneas JSON
+                if not linea.strip():  # Ignora las líneas vacías
+                    continue  # Siguiente línea
+                try:
+                    pedido = json.loads(linea)  # Lee el pedido
+                except ValueError as e:  # Si la línea no es JSON válido
+                    yield ErrorVenta(f"Línea {numero}: JSON inválido ({e})")  # Devuelve el error para rechazar solo este pedido
+                    continue  # Siguiente línea
+                yield pedido if isinstance(pedido, dict) else ErrorVenta(f"Línea {numero}: el pedido no es un objeto JSON")  # Devuelve el pedido o el error
+
+# Función que clasifica un bloque de cédulas en otro proceso
+def clasificar_bloque_vampiros(cedulas):
+    return [(cedula, es_numero_vampiro(cedula)) for cedula in cedulas]  # Devuelve cada cédula con su resultado
+
+# Función para calcular en paralelo los descuentos de las cédulas que no estén en caché
+@metricas.medir()
+def precalcular_descuentos(cedulas, ejecutor, procesos=1):
+    pendientes = sorted({int(c) for c in cedulas if str(c).strip().isdigit()} - cache_vampiros.keys())  # Cédulas aún no calculadas
+    if not pendientes:  # Si todas están en caché
+        return  # No hay nada que calcular
+    if ejecutor is None:  # Si no hay procesos auxiliares
+        clasificar_vampiros(pendientes)  # Calcula en este proceso
+        return  # Termina la función
+    tamano = max(1, -(-len(pendientes) // (4 * procesos)))  # Reparte las cédulas en cuatro bloques por proceso
+    bloques = [pendientes[i:i + tamano] for i in range(0, len(pendientes), tamano)]  # Arma los bloques
+    for resultados in ejecutor.map(clasificar_bloque_vampiros, bloques):  # Recibe los resultados de cada proceso
+        cache_vampiros.update(resultados)  # Guarda los resultados en la caché
+
+# Función para vender en bloque los pedidos de un archivo y escribir el resultado de cada uno
+@metricas.medir()
+def procesar_pedidos(estado, ruta_pedidos, ruta_resultados, procesos=None, tamano_bloque=TAMANO_BLOQUE_PEDIDOS):
+    resumen = {"vendidos": 0, "rechazados": 0}  # Inicializa el resumen
+    pedidos = leer_pedidos(ruta_pedidos)  # Lee los pedidos sin cargarlos todos
+    procesos = (procesos or os.cpu_count() or 1) if procesos != 0 else 0  # Cantidad de procesos para los descuentos
+    ejecutor = concurrent.futures.ProcessPoolExecutor(procesos) if procesos else None  # Procesos para los descuentos
+    try:
+        with open(ruta_resultados, "w", encoding="utf-8") as salida:  # Abre el archivo de resultados
+            numero = 0  # Número del pedido
+            while True:  # Procesa los pedidos por bloques
+                bloque = list(itertools.islice(pedidos, tamano_bloque))  # Toma el siguiente bloque
+                if not bloque:  # Si no quedan pedidos
+                    break  # Termina
+                precalcular_descuentos((p.get("cedula", "") for p in bloque if isinstance(p, dict)), ejecutor, procesos)  # Calcula los descuentos del bloque en paralelo
+                with estado.lote():  # Guarda todo el bloque en una sola transacción
+                    for pedido in bloque:  # Recorre los pedidos del bloque
+                        numero += 1  # Avanza el número del pedido
+                        try:
+                            if isinstance(pedido, ErrorVenta):  # Si la línea del pedido estaba dañada
+                                raise pedido  # Rechaza solo este pedido
+                            cliente = vender_boleto(estado, pedido.get("nombre", ""), pedido.get("cedula", ""), pedido.get("edad"), pedido.get("partido_id", ""), pedido.get("tipo_entrada", ""), pedido.get("asiento"))  # Vende el boleto
+                            resultado = {"pedido": numero, "estado": "vendido", "id_boleto": cliente.id_boleto, "asiento": estado.catalogo.partido(cliente.partido_id).asientos.describir(cliente.tipo_entrada, cliente.asiento), "total": cliente.total}  # Resultado de la venta
+                            resumen["vendidos"] += 1  # Cuenta la venta
+                        except ErrorVenta as e:  # Si el pedido no se pudo vender
+                            resultado = {"pedido": numero, "estado": "rechazado", "error": str(e)}  # Resultado del rechazo
+                            resumen["rechazados"] += 1  # Cuenta el rechazo
+                            metricas.contar("pedido_rechazado")  # Cuenta el rechazo en las métricas
+                        salida.write(json.dumps(resultado, ensure_ascii=False) + "\n")  # Escribe el resultado del pedido
+    finally:
+        if ejecutor is not None:  # Si se usaron procesos auxiliares
+            ejecutor.shutdown()  # Cierra los procesos
+    return resumen  # Devuelve el resumen
+
 # Función para imprimir los productos
 def imprimir_producto(producto):
     print(f"Nombre: {producto.name}\nCantidad: {producto.quantity}\nPrecio (con IVA): {producto.price}\nAdicional: {producto.adicional}\nStock: {producto.stock}\n-------------------------")
 
 # Función para realizar una compra en el restaurante
-def realizar_compra_restaurante(cedula, estadios, clientes):
-    cliente = next((c for c in clientes if c.cedula == cedula), None)  # Busca el cliente por cédula
-    if cliente is None or cliente.tipo_entrada != "VIP":  # Verifica si el cliente existe y es VIP
+@metricas.medir()
+def realizar_compra_restaurante(cedula, estado):
+    catalogo = estado.catalogo  # Obtiene el catálogo
+    perfil = estado.clientes.perfil(cedula)  # Busca el cliente por cédula
+    cliente = perfil.boleto_vip() if perfil else None  # Obtiene su último boleto VIP
+    if cliente is None:  # Verifica si el cliente existe y es VIP
         print("Cliente no encontrado o no es VIP.")  # Mensaje de error
         return  # Termina la función si no es VIP
-    nombre_estadio = cliente.nombre_estadio  # Asigna el nombre del estadio
-    productos_seleccionados = []  # Inicializa la lista de productos seleccionados
-    monto_total = 0.0  # Inicializa el monto total
-    estadio = next((e for e in estadios if e.name == nombre_estadio), None)  # Busca el estadio por nombre
-    if estadio:  # Verifica si el estadio existe
-        for restaurant in estadio.restaurants:  # Recorre los restaurantes
-            for product in restaurant.products:  # Recorre los productos
-                imprimir_producto(product)  # Muestra los productos
+    estadio = catalogo.estadio_por_nombre(cliente.nombre_estadio)  # Busca el estadio por nombre
+    inventario = estadio.inventario  # Inventario de los restaurantes del estadio
+    lineas = []  # Inicializa la lista de productos seleccionados con su cantidad
+    for restaurant in estadio.restaurants:  # Recorre los restaurantes
+        for product in restaurant.products:  # Recorre los productos
+            imprimir_producto(product)  # Muestra los productos
     while True:  # Ciclo para seleccionar productos
         nombre_producto = input("Nombre del producto que desea comprar ('fin' para finalizar): ").lower()  # Solicita el nombre del producto
         if nombre_producto == "fin":  # Verifica si el usuario quiere finalizar
             break  # Termina
-        producto = next((p for r in estadio.restaurants for p in r.products if p.name.lower() == nombre_producto), None)  # Busca el producto por nombre
-        if producto:  # Verifica si el producto existe
+        texto_cantidad = input("Cantidad (ENTER para 1): ")  # Solicita la cantidad
+        if not (texto_cantidad == "" or texto_cantidad.isdigit() and int(texto_cantidad) > 0):  # Verifica la cantidad
+            print("Cantidad inválida.")  # Mensaje de error
+            continue  # Vuelve a pedir el producto
+        cantidad = int(texto_cantidad or 1)  # Convierte la cantidad a número
+        resultado = inventario.producto(nombre_producto, cantidad)  # Busca el producto en el inventario del estadio
+        if resultado:  # Verifica si el producto existe
+            producto = resultado.producto  # Obtiene el producto encontrado
             if cliente.edad < 18 and producto.adicional.lower() == "alcoholic":  # Verifica si el cliente es menor de edad y el producto es alcohólico
                 print("No puedes comprar bebidas alcohólicas.")  # Mensaje de error
+            elif inventario.disponible(resultado) < cantidad:  # Verifica si hay stock suficiente
+                print(f"Stock insuficiente. Disponibles: {max(inventario.disponible(resultado), 0)}")  # Mensaje de error
             else:
-                productos_seleccionados.append(producto)  # Añade el producto a la lista
-                monto_total += producto.price  # Suma el precio del producto al monto total
+                lineas.append((resultado, cantidad))  # Añade el producto a la lista
         else:
             print("Producto no encontrado.")  # Mensaje de error si no encuentra el producto
-    subtotal = monto_total  # Asigna el subtotal
-    descuento = 0.15 * monto_total if es_numero_perfecto(int(cliente.cedula)) else 0  # Calcula el descuento si la cédula es un número perfecto
-    monto_total -= descuento  # Resta el descuento al monto total
+    if not lineas:  # Verifica si se eligió algún producto
+        print("No se seleccionaron productos.")  # Mensaje de aviso
+        return  # Termina la función
+    try:
+        reserva = inventario.reservar(lineas)  # Aparta todos los productos mientras se confirma el pago
+    except StockInsuficiente as e:  # Si otra caja vendió el stock mientras tanto
+        print(f"{e}. Compra cancelada.")  # Mensaje de error
+        return  # Termina la función
+    subtotal = reserva.subtotal()  # Calcula el subtotal
+    descuento = 0.15 * subtotal if es_numero_perfecto(int(cliente.cedula)) else 0  # Calcula el descuento si la cédula es un número perfecto
+    monto_total = subtotal - descuento  # Resta el descuento al monto total
     print(f"Productos seleccionados:")  # Encabezado
-    for producto in productos_seleccionados:  # Recorre los productos seleccionados
-        imprimir_producto(producto)  # Muestra los productos seleccionados
+    for seleccionado, cantidad in reserva.lineas:  # Recorre los productos seleccionados
+        print(f"{cantidad} x {seleccionado.producto.name} ({seleccionado.restaurante.name}) - ${seleccionado.producto.price * cantidad}")  # Muestra el producto y la cantidad
     if input(f"Monto total: {monto_total}\n¿Desea proceder con la compra? (Si/No): ").lower() == "si":  # Pregunta si desea proceder con la compra
+        try:
+            estado.comprar(cliente, reserva, subtotal, descuento, monto_total)  # Guarda la compra y reduce el stock
+        except Exception:  # Si no se pudo guardar la compra
+            inventario.cancelar(reserva)  # Devuelve los productos apartados
+            raise  # Propaga el error
         print(f"Pago exitoso:\nSubtotal: ${subtotal}\nDescuento: ${descuento}\nTotal: ${monto_total}")  # Mensaje de éxito
-        for producto in productos_seleccionados:  # Recorre los productos seleccionados
-            producto.stock -= 1  # Reduce el stock del producto
+        for alerta in inventario.tomar_alertas():  # Recorre los avisos de stock bajo
+            print(alerta)  # Muestra el aviso
     else:
+        inventario.cancelar(reserva)  # Devuelve los productos apartados
         print("Venta de productos cancelada.")  # Mensaje de cancelación
 
+# Función para comprar productos del restaurante sin interacción (usada por el servicio)
+@metricas.medir()
+def comprar_productos(estado, cedula, pedidos):
+    perfil = estado.clientes.perfil(str(cedula))  # Busca el cliente por cédula
+    cliente = perfil.boleto_vip() if perfil else None  # Obtiene su último boleto VIP
+    if cliente is None:  # Verifica si el cliente existe y es VIP
+        raise ElementoNoEncontrado(f"No existe un cliente VIP con cédula {cedula}")  # Error si no es VIP
+    inventario = estado.catalogo.estadio_por_nombre(cliente.nombre_estadio).inventario  # Inventario del estadio del cliente
+    if not isinstance(pedidos, list):  # Verifica que los productos sean una lista
+        raise ErrorVenta("Los productos deben ser una lista")  # Error si no es una lista
+    lineas = []  # Productos pedidos con su cantidad
+    for pedido in pedidos:  # Recorre los productos pedidos
+        if not isinstance(pedido, dict) or not isinstance(pedido.get("nombre"), str) or not isinstance(pedido.get("restaurante", ""), str):  # Verifica la forma del producto
+            raise ErrorVenta(f"Producto inválido: {pedido}")  # Error si falta el nombre o el restaurante no es texto
+        try:
+            cantidad = int(pedido.get("cantidad", 1))  # Cantidad pedida
+        except (TypeError, ValueError):  # Si la cantidad no es un número
+            raise ErrorVenta(f"Cantidad inválida para {pedido['nombre']}: {pedido.get('cantidad')}") from None  # Error si la cantidad es inválida
+        if cantidad < 1:  # Verifica que la cantidad sea positiva
+            raise ErrorVenta(f"Cantidad inválida para {pedido['nombre']}: {cantidad}")  # Error si la cantidad es inválida
+        entrada = inventario.producto(pedido["nombre"], cantidad, pedido.get("restaurante"))  # Busca el producto
+        if entrada is None:  # Si el producto no existe
+            raise ElementoNoEncontrado(f"No existe el producto {pedido['nombre']}")  # Error si no existe
+        if cliente.edad < 18 and entrada.producto.adicional.lower() == "alcoholic":  # Verifica la edad para las bebidas alcohólicas
+            raise ErrorVenta(f"El cliente no puede comprar {entrada.producto.name}")  # Error si es menor de edad
+        lineas.append((entrada, cantidad))  # Añade el producto
+    if not lineas:  # Verifica si se pidió algún producto
+        raise ErrorVenta("No se pidieron productos")  # Error si la compra está vacía
+    reserva = inventario.reservar(lineas)  # Aparta todos los productos o ninguno
+    subtotal = reserva.subtotal()  # Calcula el subtotal
+    descuento = 0.15 * subtotal if es_numero_perfecto(int(cliente.cedula)) else 0  # Calcula el descuento si la cédula es un número perfecto
+    try:
+        estado.comprar(cliente, reserva, subtotal, descuento, subtotal - descuento)  # Guarda la compra y reduce el stock
+    except Exception:  # Si no se pudo guardar la compra
+        inventario.cancelar(reserva)  # Devuelve los productos apartados
+        raise  # Propaga el error
+    return {"subtotal": subtotal, "descuento": descuento, "total": subtotal - descuento, "productos": [{"nombre": e.producto.name, "restaurante": e.restaurante.name, "cantidad": c} for e, c in reserva.lineas], "alertas": inventario.tomar_alertas()}  # Devuelve el resumen de la compra
+
 # Función para validar un boleto
-def validar_boleto(clientes, id_boleto):
-    cliente_asistido = next((c for c in clientes if c.id_boleto == id_boleto), None)  # Busca el cliente por ID de boleto
-    if cliente_asistido:  # Verifica si el cliente existe
+@metricas.medir()
+def validar_boleto(estado, id_boleto):
+    resultado, cliente_asistido = estado.validar(id_boleto)  # Busca el boleto y registra la asistencia
+    if resultado == BOLETO_VALIDO:  # Verifica si el boleto es válido
         print(f"El boleto es válido. Cliente: {cliente_asistido.nombre}")  # Mensaje de éxito
+    elif resultado == BOLETO_USADO:  # Verifica si el boleto ya se usó
+        print(f"El boleto ya fue usado. Cliente: {cliente_asistido.nombre}")  # Mensaje de boleto repetido
     else:
         print("El ID del boleto no es válido. El boleto es falso.")  # Mensaje de error
 
+# Función para validar un archivo de boletos escaneados
+@metricas.medir()
+def validar_boletos_archivo(estado, ruta):
+    try:
+        resumen = estado.validar_archivo(ruta)  # Valida los boletos del archivo
+    except OSError as e:  # Captura errores al abrir el archivo
+        print(f"No se pudo leer el archivo: {e}")  # Mensaje de error
+        return  # Termina la función
+    print(f"Boletos válidos: {resumen[BOLETO_VALIDO]}\nBoletos usados más de una vez: {len(resumen[BOLETO_USADO])}\nBoletos falsos: {len(resumen[BOLETO_INVALIDO])}")  # Muestra el resumen
+    for id_boleto in resumen[BOLETO_USADO]:  # Recorre los boletos repetidos
+        print(f"- Boleto repetido: {id_boleto}")  # Muestra el boleto repetido
+    for id_boleto in resumen[BOLETO_INVALIDO]:  # Recorre los boletos falsos
+        print(f"- Boleto falso: {id_boleto}")  # Muestra el boleto falso
+
 # Función para buscar productos
-def buscar_productos(estadios, criterio, valor_busqueda=None, precio_minimo=None, precio_maximo=None):
-    for estadio in estadios:  # Recorre los estadios
-        for restaurant in estadio.restaurants:  # Recorre los restaurantes
-            for product in restaurant.products:  # Recorre los productos
-                if criterio == "nombre" and valor_busqueda in product.name:  # Busca por nombre
-                    imprimir_producto(product)  # Muestra el producto
-                elif criterio == "tipo" and valor_busqueda.lower() in product.adicional.lower():  # Busca por tipo
-                    imprimir_producto(product)  # Muestra el producto
-                elif criterio == "rango" and precio_minimo <= product.price <= precio_maximo:  # Busca por rango de precio
-                    imprimir_producto(product)  # Muestra el producto
+@metricas.medir()
+def buscar_productos(indice, criterio, valor_busqueda=None, precio_minimo=None, precio_maximo=None, estadio=None, pagina=1):
+    if criterio == "nombre":  # Busca por nombre
+        return indice.buscar_nombre(valor_busqueda, estadio, pagina)  # Devuelve los productos por nombre
+    elif criterio == "tipo":  # Busca por tipo
+        return indice.buscar_tipo(valor_busqueda, estadio, pagina)  # Devuelve los productos por tipo
+    elif criterio == "rango":  # Busca por rango de precio
+        return indice.buscar_rango(precio_minimo, precio_maximo, estadio, pagina)  # Devuelve los productos por rango de precio
+    raise ValueError(f"Criterio de búsqueda desconocido: {criterio}")  # Error si el criterio no existe
+
+# Función para consultar productos según el filtro elegido en el menú
+def consultar_productos(catalogo):
+    op = input("Elija el filtro (nombre, tipo, rango): ").lower()  # Solicita el filtro
+    if op == "nombre":  # Si el filtro es nombre
+        criterio = {"valor_busqueda": input("Nombre del producto: ")}  # Solicita el nombre del producto
+    elif op == "tipo":  # Si el filtro es tipo
+        criterio = {"valor_busqueda": input("Tipo: (alcoholic, non-alcoholic, package, plate): ")}  # Solicita el tipo de producto
+    elif op == "rango":  # Si el filtro es rango
+        criterio = {"precio_minimo": float(input("Rango inferior: ")), "precio_maximo": float(input("Rango superior: "))}  # Solicita el rango de precio
+    else:
+        print("Opción incorrecta.")  # Mensaje si la opción es incorrecta
+        return  # Termina la función
+    nombre_estadio = input("Estadio (ENTER para todos): ")  # Solicita el estadio para limitar la búsqueda
+    try:
+        estadio = catalogo.estadio_por_nombre(nombre_estadio) if nombre_estadio else None  # Busca el estadio por nombre
+    except ElementoNoEncontrado as e:  # Si el estadio no existe
+        print(e)  # Mensaje de error
+        return  # Termina la función
+    pagina = 1  # Empieza por la primera página
+    while True:  # Ciclo para recorrer las páginas
+        resultados = buscar_productos(catalogo.productos, op, estadio=estadio, pagina=pagina, **criterio)  # Busca los productos
+        if resultados.total == 0:  # Verifica si hay productos
+            print("No se encontraron productos.")  # Mensaje si no hay productos
+            return  # Termina la función
+        print(f"----- Página {resultados.pagina} de {resultados.paginas} ({resultados.total} productos) -----")  # Encabezado de la página
+        for resultado in resultados.resultados:  # Recorre los productos de la página
+            print(f"Estadio: {resultado.estadio.name}\nRestaurante: {resultado.restaurante.name}")  # Muestra dónde se vende
+            imprimir_producto(resultado.producto)  # Muestra el producto
+        if not resultados.hay_siguiente() or input("¿Ver la siguiente página? (Si/No): ").lower() != "si":  # Pregunta si quiere seguir
+            return  # Termina la función
+        pagina += 1  # Avanza a la siguiente página
 
 # Función para guardar los datos actuales en un archivo
-def guardar_datos_actuales(clientes, equipos, estadios, partidos):
+@metricas.medir()
+def guardar_datos_actuales(estado):
     directorio_actual = os.path.dirname(os.path.abspath(__file__))  # Obtiene el directorio actual
-    ruta = os.path.join(directorio_actual, "datos_actuales.txt")  # Define la ruta del archivo
-    with open(ruta, "w") as archivo:  # Abre el archivo en modo escritura
-        archivo.write("Equipos:\n")  # Encabezado de equipos
-        for equipo in equipos:  # Recorre los equipos
-            archivo.write(f"ID: {equipo.id}\nCodigo: {equipo.code}\nNombre: {equipo.name}\nGrupo: {equipo.group}\n-------------------------\n")  # Escribe los datos del equipo
-        archivo.write("Clientes:\n")  # Encabezado de clientes
-        for cliente in clientes:  # Recorre los clientes
-            archivo.write(f"Nombre: {cliente.nombre}\nCédula: {cliente.cedula}\nEdad: {cliente.edad}\nTipo de entrada: {cliente.tipo_entrada}\nID del boleto: {cliente.id_boleto}\n-------------------------\n")  # Escribe los datos del cliente
-        archivo.write("Estadios:\n")  # Encabezado de estadios
-        for estadio in estadios:  # Recorre los estadios
-            archivo.write(f"Estadio: {estadio.name}\nCiudad: {estadio.city}\nCapacidad general: {estadio.capacity_general}\nCapacidad vip: {estadio.capacity_vip}\nRestaurantes:\n")  # Escribe los datos del estadio
-            for restaurant in estadio.restaurants:  # Recorre los restaurantes
-                archivo.write(f"- Nombre: {restaurant.name}\n  Productos:\n")  # Escribe los datos del restaurante
-                for product in restaurant.products:  # Recorre los productos
-                    archivo.write(f"  - Nombre: {product.name}\n    Cantidad: {product.quantity}\n    Precio: {product.price}\n    Adicional: {product.adicional}\n    Stock: {product.stock}\n")  # Escribe los datos del producto
-                archivo.write("\n")  # Línea en blanco
-            archivo.write("\n")  # Línea en blanco
-        archivo.write("Partidos:\n")  # Encabezado de partidos
-        for partido in partidos:  # Recorre los partidos
-            archivo.write(f"ID: {partido.id}\nNúmero: {partido.number}\nEquipo local: {partido.home.name}\nEquipo visitante: {partido.away.name}\nFecha: {partido.date}\nGrupo: {partido.group}\nEstadio: {partido.estadio.name}\n-------------------------\n")  # Escribe los datos del partido
+    ruta = os.path.join(directorio_actual, "datos_actuales.jsonl")  # Define la ruta del archivo
+    exportar_estado(estado, ruta)  # Escribe el estado del sistema
+    print(f"Datos guardados en {ruta}")  # Informa dónde se guardaron los datos
+
+# Función para generar, uno por uno, los registros del estado del sistema
+def generar_registros_estado(estado):
+    catalogo = estado.catalogo  # Obtiene el catálogo
+    yield {"tipo": "estado", "version": VERSION_ESTADO, "secuencia": estado.secuencia}  # Encabezado con la última operación aplicada
+    for equipo in catalogo.equipos:  # Recorre los equipos
+        yield {"tipo": "equipo", "id": equipo.id, "code": equipo.code, "name": equipo.name, "group": equipo.group}  # Registro del equipo
+    for estadio in catalogo.estadios:  # Recorre los estadios
+        restaurantes = [{"name": r.name, "products": [{"name": p.name, "quantity": p.quantity, "price": p.precio_base, "adicional": p.adicional, "stock": p.stock} for p in r.products]} for r in estadio.restaurants]  # Restaurantes con el stock actual
+        yield {"tipo": "estadio", "id": estadio.id, "name": estadio.name, "city": estadio.city, "capacity": [estadio.capacity_general, estadio.capacity_vip], "restaurants": restaurantes}  # Registro del estadio
+    for partido in catalogo.partidos:  # Recorre los partidos
+        yield {"tipo": "partido", "id": partido.id, "number": partido.number, "home": {"id": partido.home.id}, "away": {"id": partido.away.id}, "date": partido.date, "group": partido.group, "stadium_id": partido.estadio.id}  # Registro del partido
+    for cliente in estado.boletos.clientes:  # Recorre los boletos vendidos
+        yield {"tipo": "boleto", "id_boleto": cliente.id_boleto, "nombre": cliente.nombre, "cedula": cliente.cedula, "edad": cliente.edad, "tipo_entrada": cliente.tipo_entrada, "partido_id": cliente.partido_id, "asiento": cliente.asiento, "total": cliente.total, "asistencias": estado.boletos.asistencias.get(cliente.id_boleto, 0)}  # Registro del boleto
+    for linea in estado.libro.lineas:  # Recorre las ventas del restaurante
+        yield {"tipo": "linea", **vars(linea)}  # Registro de la línea de venta
+
+# Función para exportar el estado del sistema en formato JSON Lines
+@metricas.medir()
+def exportar_estado(estado, ruta):
+    with open(ruta + ".tmp", "w", encoding="utf-8") as archivo:  # Escribe en un archivo temporal
+        for registro in generar_registros_estado(estado):  # Recorre los registros sin armarlos todos en memoria
+            archivo.write(json.dumps(registro, ensure_ascii=False) + "\n")  # Escribe un registro por línea
+    os.replace(ruta + ".tmp", ruta)  # Reemplaza el archivo anterior de forma atómica
+
+# Función para reconstruir el estado del sistema desde un archivo JSON Lines
+@metricas.medir()
+def importar_estado(ruta, almacen=None):
+    datos = {nombre: [] for nombre in CATALOGOS}  # Datos de los catálogos
+    boletos = []  # Boletos vendidos
+    lineas = []  # Líneas de venta del restaurante
+    secuencia = 0  # Última operación aplicada
+    with open(ruta, encoding="utf-8") as archivo:  # Abre el archivo
+        for linea in archivo:  # Recorre los registros uno por uno
+            registro = json.loads(linea)  # Lee el registro
+            tipo = registro.pop("tipo")  # Obtiene el tipo de registro
+            if tipo == "estado":  # Si es el encabezado
+                if registro["version"] != VERSION_ESTADO:  # Verifica la versión del formato
+                    raise ValueError(f"Versión de estado no soportada: {registro['version']}")  # Error si la versión no coincide
+                secuencia = registro["secuencia"]  # Guarda la última operación aplicada
+            elif tipo == "equipo":  # Si es un equipo
+                datos["equipos"].append(registro)  # Guarda el equipo
+            elif tipo == "estadio":  # Si es un estadio
+                datos["estadios"].append(registro)  # Guarda el estadio
+            elif tipo == "partido":  # Si es un partido
+                datos["partidos"].append(registro)  # Guarda el partido
+            elif tipo == "boleto":  # Si es un boleto
+                boletos.append(registro)  # Guarda el boleto
+            elif tipo == "linea":  # Si es una línea de venta del restaurante
+                lineas.append(LineaVenta(**registro))  # Guarda la línea
+    catalogo = Catalogo(cargar_equipos(datos["equipos"]), cargar_estadios(datos["estadios"]))  # Indexa los equipos y estadios
+    catalogo.agregar_partidos(cargar_partidos(datos["partidos"], catalogo))  # Carga e indexa los partidos
+    estado = EstadoSistema(catalogo, almacen)  # Crea el estado del sistema
+    for boleto in boletos:  # Recorre los boletos
+        cliente = estado.aplicar("venta", boleto, None, recuperando=True)  # Registra el boleto y ocupa su asiento
+        if boleto["asistencias"]:  # Si el boleto ya se escaneó
+            estado.boletos.asistencias[boleto["id_boleto"]] = boleto["asistencias"]  # Restaura la asistencia
+            estado.estadisticas.registrar_asistencia(cliente)  # Actualiza los contadores del partido
+    for linea in lineas:  # Recorre las líneas de venta (el stock exportado ya las descuenta)
+        estado.libro.registrar(linea)  # Registra la línea en el libro de ventas
+        estado.clientes.registrar_gasto_restaurante(linea.cedula, linea.monto())  # Actualiza el gasto del comprador
+    estado.secuencia = secuencia  # Las operaciones posteriores se recuperan desde el almacén
+    return estado  # Devuelve el estado reconstruido
 
 # Función para calcular el promedio de gasto de clientes VIP
-def promedio_gasto_clientes_vip(partidos, estadios, clientes):
-    total_gastos = 0  # Inicializa el total de gastos
-    cantidad_clientes_vip = 0  # Inicializa la cantidad de clientes VIP
-    for cliente in clientes:  # Recorre los clientes
-        if cliente.tipo_entrada == "VIP":  # Verifica si el cliente es VIP
-            gasto_total = 0  # Inicializa el gasto total
-            costo_ticket = calcular_costo_entrada(cliente.tipo_entrada, cliente.cedula)  # Calcula el costo del ticket
-            if costo_ticket is not None:  # Verifica si el costo del ticket es válido
-                subtotal, descuento, iva, _ = costo_ticket  # Desempaqueta el costo del ticket
-                gasto_total += subtotal - (subtotal * descuento) + iva  # Calcula el gasto total
-            nombre_estadio = cliente.nombre_estadio  # Asigna el nombre del estadio
-            estadio = next((e for e in estadios if e.name == nombre_estadio), None)  # Busca el estadio por nombre
-            if estadio:  # Verifica si el estadio existe
-                for restaurant in estadio.restaurants:  # Recorre los restaurantes
-                    for product in restaurant.products:  # Recorre los productos
-                        gasto_total += product.price  # Suma el precio del producto al gasto total
-            total_gastos += gasto_total  # Suma el gasto total al total de gastos
-            cantidad_clientes_vip += 1  # Incrementa la cantidad de clientes VIP
-    if cantidad_clientes_vip > 0:  # Verifica si hay clientes VIP
-        promedio = total_gastos / cantidad_clientes_vip  # Calcula el promedio de gasto
+def promedio_gasto_clientes_vip(registro_clientes):
+    promedio = registro_clientes.promedio_gasto_vip()  # Obtiene el promedio desde los totales del registro
+    if promedio is not None:  # Verifica si hay clientes VIP
         print(f"El promedio de gasto de un cliente VIP en un partido es de: ${promedio}")  # Muestra el promedio de gasto
     else:
         print("No hay clientes VIP registrados.")  # Mensaje si no hay clientes VIP
+    return promedio  # Devuelve el promedio de gasto
 
 # Función para mostrar la asistencia a los partidos
-def mostrar_asistencia_partidos(partidos, clientes):
-    asistencia_partidos = []  # Inicializa la lista de asistencia
-    for partido in partidos:  # Recorre los partidos
-        boletos_vendidos = sum(1 for c in clientes if c.nombre_estadio == partido.estadio.name and c.tipo_entrada != "")  # Cuenta los boletos vendidos
-        personas_asistieron = boletos_vendidos  # Asigna las personas que asistieron
-        relacion_asistencia_venta = personas_asistieron / boletos_vendidos if boletos_vendidos > 0 else 0  # Calcula la relación asistencia/venta
-        asistencia_partidos.append((partido, boletos_vendidos, personas_asistieron, relacion_asistencia_venta))  # Añade la asistencia a la lista
+def mostrar_asistencia_partidos(estadisticas):
+    asistencia_partidos = estadisticas.tabla()  # Obtiene la tabla desde los contadores
     asistencia_partidos.sort(key=lambda x: x[3], reverse=True)  # Ordena la lista por relación asistencia/venta
     print("----- Tabla de Asistencia a los Partidos -----")  # Encabezado
     print("{:<30} {:<20} {:<15} {:<15} {:<25}".format("Partido", "Estadio", "Boletos Vendidos", "Personas Asistieron", "Relación Asistencia/Venta"))  # Encabezados de columna
@@ -357,60 +2002,56 @@ def mostrar_asistencia_partidos(partidos, clientes):
         print("{:<30} {:<20} {:<15} {:<15} {:<25}".format(f"{partido.home.name} vs {partido.away.name}", partido.estadio.name, boletos_vendidos, personas_asistieron, relacion_asistencia_venta))  # Muestra los datos de asistencia
 
 # Función para encontrar el partido con mayor asistencia
-def encontrar_partido_mayor_asistencia(partidos, clientes):
-    partido_mayor_asistencia = None  # Inicializa el partido con mayor asistencia
-    mayor_asistencia = 0  # Inicializa la mayor asistencia
-    for partido in partidos:  # Recorre los partidos
-        personas_asistieron = sum(1 for c in clientes if c.nombre_estadio == partido.estadio.name and c.tipo_entrada != "")  # Cuenta las personas que asistieron
-        if personas_asistieron > mayor_asistencia:  # Verifica si la asistencia es mayor
-            mayor_asistencia = personas_asistieron  # Asigna la mayor asistencia
-            partido_mayor_asistencia = partido  # Asigna el partido con mayor asistencia
+def encontrar_partido_mayor_asistencia(estadisticas):
+    partido_mayor_asistencia = estadisticas.partido_mayor_asistencia()  # Obtiene el partido desde los contadores
     if partido_mayor_asistencia:  # Verifica si hay un partido con mayor asistencia
         print(f"El partido con mayor asistencia fue: {partido_mayor_asistencia.home.name} vs {partido_mayor_asistencia.away.name}")  # Muestra el partido con mayor asistencia
     else:
         print("No hay partidos registrados.")  # Mensaje si no hay partidos registrados
 
 # Función para encontrar el partido con mayor boletos vendidos
-def encontrar_partido_mayor_boletos_vendidos(partidos, clientes):
-    partido_mayor_boletos = None  # Inicializa el partido con mayor boletos vendidos
-    mayor_boletos_vendidos = 0  # Inicializa el mayor boletos vendidos
-    for partido in partidos:  # Recorre los partidos
-        boletos_vendidos = sum(1 for c in clientes if c.nombre_estadio == partido.estadio.name and c.tipo_entrada != "")  # Cuenta los boletos vendidos
-        if boletos_vendidos > mayor_boletos_vendidos:  # Verifica si los boletos vendidos son mayores
-            mayor_boletos_vendidos = boletos_vendidos  # Asigna el mayor boletos vendidos
-            partido_mayor_boletos = partido  # Asigna el partido con mayor boletos vendidos
+def encontrar_partido_mayor_boletos_vendidos(estadisticas):
+    partido_mayor_boletos = estadisticas.partido_mayor_boletos()  # Obtiene el partido desde los contadores
     if partido_mayor_boletos:  # Verifica si hay un partido con mayor boletos vendidos
         print(f"El partido con mayor número de boletos vendidos fue: {partido_mayor_boletos.home.name} vs {partido_mayor_boletos.away.name}")  # Muestra el partido con mayor boletos vendidos
     else:
         print("No hay partidos registrados.")  # Mensaje si no hay partidos registrados
 
-# Función para obtener el top 3 de productos más vendidos
-def obtener_top_productos_vendidos(estadios, clientes):
-    productos_vendidos = {}  # Inicializa el diccionario de productos vendidos
-    for estadio in estadios:  # Recorre los estadios
-        for restaurant in estadio.restaurants:  # Recorre los restaurantes
-            for product in restaurant.products:  # Recorre los productos
-                total_vendidos = sum(1 for cliente in clientes if cliente.tipo_entrada == "VIP" and cliente.nombre_estadio == estadio.name)  # Cuenta los productos vendidos
-                if product.name in productos_vendidos:  # Verifica si el producto ya está en el diccionario
-                    productos_vendidos[product.name] += total_vendidos  # Suma los productos vendidos
-                else:
-                    productos_vendidos[product.name] = total_vendidos  # Añade el producto al diccionario
-    top_productos = sorted(productos_vendidos.items(), key=lambda x: x[1], reverse=True)[:3]  # Ordena los productos por cantidad vendida y obtiene el top 3
+# Función para obtener el top 3 de productos más vendidos, en total, durante un partido o entre dos fechas
+def obtener_top_productos_vendidos(libro, partido_id=None, desde=None, hasta=None):
+    if partido_id is not None:  # Si se pidió un partido
+        top_productos, periodo = libro.top_productos_partido(partido_id, 3), f" durante el partido {partido_id}"  # Top 3 del partido
+    elif desde is not None or hasta is not None:  # Si se pidió un rango de fechas
+        top_productos, periodo = libro.top_productos_entre(desde or 0.0, hasta or math.inf, 3), " en el rango de fechas indicado"  # Top 3 de la ventana
+    else:
+        top_productos, periodo = libro.top_productos(3), ""  # Top 3 de todas las ventas
     if top_productos:  # Verifica si hay productos vendidos
-        print("Los tres productos más vendidos en el restaurante son:")  # Encabezado
+        print(f"Los tres productos más vendidos en el restaurante{periodo} son:")  # Encabezado
         for producto, cantidad_vendida in top_productos:  # Recorre los productos más vendidos
             print(f"- Producto: {producto}\n  Cantidad vendida: {cantidad_vendida}")  # Muestra el producto y la cantidad vendida
     else:
-        print("No hay productos registrados.")  # Mensaje si no hay productos registrados
+        print(f"No hay productos vendidos{periodo}.")  # Mensaje si no hay productos vendidos
     return top_productos  # Devuelve el top 3 de productos más vendidos
 
+# Función para obtener el top 3 de restaurantes que más productos vendieron
+def obtener_top_restaurantes(libro, catalogo):
+    top_restaurantes = libro.top_restaurantes(3)  # Obtiene el top 3 desde el libro de ventas
+    if top_restaurantes:  # Verifica si hay ventas
+        print("Los tres restaurantes que más productos vendieron son:")  # Encabezado
+        for (estadio_id, restaurante), cantidad_vendida in top_restaurantes:  # Recorre los restaurantes que más vendieron
+            print(f"- Restaurante: {restaurante} ({catalogo.estadio(estadio_id).name})\n  Productos vendidos: {cantidad_vendida}")  # Muestra el restaurante y las unidades vendidas
+    else:
+        print("No hay productos vendidos.")  # Mensaje si no hay ventas
+    return top_restaurantes  # Devuelve el top 3 de restaurantes
+
+# Función para convertir una fecha AAAA-MM-DD en segundos desde 1970, al inicio o al final del día
+def fecha_a_segundos(texto, fin_del_dia=False):
+    fecha = datetime.datetime.combine(datetime.date.fromisoformat(texto), datetime.time.max if fin_del_dia else datetime.time.min)  # Fecha y hora local
+    return fecha.timestamp()  # Devuelve los segundos como los guarda el libro de ventas
+
 # Función para obtener el top 3 de clientes que más compraron boletos
-def obtener_top_clientes_compradores(clientes):
-    clientes_boletos = {}  # Inicializa el diccionario de clientes y boletos comprados
-    for cliente in clientes:  # Recorre los clientes
-        boletos_comprados = sum(1 for item in cliente.tipo_entrada if item != "")  # Cuenta los boletos comprados
-        clientes_boletos[cliente] = boletos_comprados  # Añade el cliente y los boletos comprados al diccionario
-    top_clientes = sorted(clientes_boletos.items(), key=lambda x: x[1], reverse=True)[:3]  # Ordena los clientes por boletos comprados y obtiene el top 3
+def obtener_top_clientes_compradores(registro_clientes):
+    top_clientes = registro_clientes.top_compradores(3)  # Obtiene el top 3 desde el registro de clientes
     if top_clientes:  # Verifica si hay clientes que compraron boletos
         print("Los tres clientes que más compraron boletos son:")  # Encabezado
         for cliente, boletos_comprados in top_clientes:  # Recorre los clientes que más compraron boletos
@@ -419,108 +2060,596 @@ def obtener_top_clientes_compradores(clientes):
         print("No hay clientes registrados.")  # Mensaje si no hay clientes registrados
     return top_clientes  # Devuelve el top 3 de clientes que más compraron boletos
 
+# Función para calcular el precio con IVA de todos los productos de los estadios a la vez
+def precios_productos(estadios):
+    import numpy as np  # Importa numpy solo al calcular
+    productos = [producto for estadio in estadios for restaurante in estadio.restaurants for producto in restaurante.products]  # Todos los productos
+    base = np.array([producto.precio_base for producto in productos], dtype=np.float64)  # Precios sin IVA
+    return productos, base + base * 0.16  # Mismo orden de operaciones que Product
+
+# Función para comparar el reporte en columnas con las funciones de cada objeto, al centavo
+def verificar_reporte_cierre(estado, tabla):
+    diferencias = []  # Inicializa la lista de diferencias
+
+    def comparar(nombre, claves, vectorizado, referencia):  # Función que guarda los valores que difieren en más de medio centavo
+        for clave, actual, esperado in zip(claves, vectorizado, referencia):  # Recorre los valores
+            if abs(actual - esperado) >= 0.005:  # Verifica la diferencia al centavo
+                diferencias.append((nombre, clave, float(actual), esperado))  # Guarda la diferencia
+
+    clientes = estado.boletos.clientes  # Boletos en orden de venta
+    ids = [c.id_boleto for c in clientes]  # ID de cada boleto
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):  # Oculta los mensajes de calcular_costo_entrada
+        comparar("precio_boleto", ids, tabla.precios_boletos()[3], [calcular_costo_entrada(c.tipo_entrada, c.cedula)[3] for c in clientes])  # Precio de cada boleto
+    comparar("total_boleto", ids, tabla.precios_boletos()[3], [c.total for c in clientes])  # Precio cobrado de cada boleto
+    comparar("monto_linea", range(len(estado.libro.lineas)), tabla.montos_lineas(), [linea.monto() for linea in estado.libro.lineas])  # Monto de cada línea
+    comparar("recaudacion_partido", tabla.partidos, tabla.recaudacion_por_partido(), [estado.estadisticas.recaudacion[p] for p in tabla.partidos])  # Recaudación por partido
+    comparar("ingresos_restaurante", tabla.estadios, tabla.ingresos_restaurante_por_estadio(), [estado.libro.ingresos_por_estadio[e] for e in tabla.estadios])  # Ingresos del restaurante por estadio
+    productos, precios = precios_productos(estado.catalogo.estadios)  # Precios con IVA en columnas
+    comparar("precio_producto", [p.name for p in productos], precios, [p.price for p in productos])  # Precio de cada producto
+    promedio, esperado = tabla.promedio_gasto_vip(), estado.clientes.promedio_gasto_vip()  # Promedio VIP en columnas y en el registro
+    if (promedio is None) != (esperado is None) or promedio is not None and abs(promedio - esperado) >= 0.005:  # Compara el promedio VIP
+        diferencias.append(("promedio_gasto_vip", None, promedio, esperado))  # Guarda la diferencia
+    return diferencias  # Devuelve las diferencias
+
+# Función para mostrar el reporte de cierre del día calculado en columnas
+@metricas.medir()
+def mostrar_reporte_cierre(estado):
+    tabla = TablaVentas(estado.catalogo, estado.boletos, estado.libro)  # Arma la tabla en columnas
+    recaudacion_partidos = tabla.recaudacion_por_partido()  # Recaudación por partido
+    recaudacion_estadios = tabla.recaudacion_por_estadio()  # Recaudación por estadio
+    ingresos_estadios = tabla.ingresos_restaurante_por_estadio()  # Ingresos del restaurante por estadio
+    print("----- Reporte de cierre -----")  # Encabezado
+    print(f"Boletos vendidos: {len(tabla.boleto_total)} ({int(tabla.boleto_vip.sum())} VIP), con descuento: {int(tabla.boleto_descuento.sum())}")  # Resumen de boletos
+    for partido, monto in zip(estado.catalogo.partidos, recaudacion_partidos):  # Recorre los partidos
+        if monto:  # Solo los partidos con ventas
+            print(f"Partido {partido.id} {partido.home.name} vs {partido.away.name}: ${monto:.2f}")  # Recaudación del partido
+    for estadio, boletos, restaurante in zip(estado.catalogo.estadios, recaudacion_estadios, ingresos_estadios):  # Recorre los estadios
+        print(f"Estadio {estadio.name}: boletos ${boletos:.2f}, restaurantes ${restaurante:.2f}")  # Recaudación del estadio
+    promedio = tabla.promedio_gasto_vip()  # Promedio de gasto VIP
+    print(f"Promedio de gasto de un cliente VIP: ${promedio:.2f}" if promedio is not None else "No hay clientes VIP registrados.")  # Promedio VIP
+    diferencias = verificar_reporte_cierre(estado, tabla)  # Compara con las funciones de cada objeto
+    for nombre, clave, actual, esperado in diferencias:  # Recorre las diferencias
+        print(f"Diferencia en {nombre} {clave}: {actual} en columnas, {esperado} por objeto")  # Muestra la diferencia
+    print("El reporte coincide al centavo con los cálculos por objeto." if not diferencias else f"Se encontraron {len(diferencias)} diferencias.")  # Muestra el resultado
+    return diferencias  # Devuelve las diferencias
+
+# Función para mostrar las estadísticas de la opción 6 del menú
+@metricas.medir()
+def mostrar_estadisticas(estado, graficar=True):
+    promedio_gasto_clientes_vip(estado.clientes)  # Muestra el promedio de gasto de clientes VIP
+    mostrar_asistencia_partidos(estado.estadisticas)  # Muestra la asistencia a los partidos
+    encontrar_partido_mayor_asistencia(estado.estadisticas)  # Encuentra el partido con mayor asistencia
+    encontrar_partido_mayor_boletos_vendidos(estado.estadisticas)  # Encuentra el partido con mayor boletos vendidos
+    top_productos = obtener_top_productos_vendidos(estado.libro)  # Obtiene el top 3 de productos más vendidos
+    partido_mayor_boletos = estado.estadisticas.partido_mayor_boletos()  # Partido con más boletos vendidos
+    if partido_mayor_boletos:  # Si hay partidos con ventas
+        obtener_top_productos_vendidos(estado.libro, partido_mayor_boletos.id)  # Obtiene el top 3 de productos de ese partido
+    obtener_top_restaurantes(estado.libro, estado.catalogo)  # Obtiene el top 3 de restaurantes
+    top_clientes = obtener_top_clientes_compradores(estado.clientes)  # Obtiene el top 3 de clientes que más compraron boletos
+    if graficar:  # Si se muestran los gráficos
+        graficar_top_productos_vendidos(top_productos)  # Grafica el top 3 de productos más vendidos
+        graficar_top_clientes_compradores(top_clientes)  # Grafica el top 3 de clientes que más compraron boletos
+
+# Función para dibujar un gráfico de barras con matplotlib en una ventana o en un archivo PNG o SVG
+def graficar_barras_matplotlib(etiquetas, valores, titulo, eje_x, eje_y, archivo=None):
+    if archivo is None:  # Si se muestra en una ventana
+        import matplotlib.pyplot as plt  # Importa pyplot solo al dibujar
+        figura, ejes = plt.subplots()  # Crea la figura con la interfaz gráfica
+    else:
+        from matplotlib.figure import Figure  # Importa Figure, que no abre ninguna ventana
+        figura = Figure()  # Crea la figura sin interfaz gráfica
+        ejes = figura.subplots()  # Crea los ejes
+    ejes.bar(etiquetas, valores)  # Crea un gráfico de barras
+    ejes.set_xlabel(eje_x)  # Etiqueta del eje x
+    ejes.set_ylabel(eje_y)  # Etiqueta del eje y
+    ejes.set_title(titulo)  # Título del gráfico
+    if archivo is None:  # Si se muestra en una ventana
+        plt.show()  # Muestra el gráfico
+    else:
+        figura.savefig(archivo)  # Guarda el gráfico en el formato de la extensión
+    return archivo  # Devuelve la ruta del archivo o None
+
+# Función para dibujar un gráfico de barras con bokeh en el navegador o en un archivo HTML
+def graficar_barras_bokeh(etiquetas, valores, titulo, eje_x, eje_y, archivo=None):
+    from bokeh.plotting import figure, show, save  # Importa bokeh solo al dibujar
+    from bokeh.resources import CDN  # Recursos de bokeh para el archivo HTML
+    p = figure(x_range=etiquetas, height=350, title=titulo)  # Crea un gráfico de barras
+    p.vbar(x=etiquetas, top=valores, width=0.9)  # Añade las barras al gráfico
+    p.xaxis.axis_label = eje_x  # Etiqueta del eje x
+    p.yaxis.axis_label = eje_y  # Etiqueta del eje y
+    if archivo is None:  # Si se muestra en el navegador
+        show(p)  # Muestra el gráfico
+    else:
+        save(p, filename=archivo, resources=CDN, title=titulo)  # Guarda el gráfico como HTML
+    return archivo  # Devuelve la ruta del archivo o None
+
+# Función para dibujar un gráfico de barras con la librería que corresponda al destino
+def graficar_barras(etiquetas, valores, titulo, eje_x, eje_y, archivo=None, navegador=False):
+    if archivo is not None and archivo.lower().endswith(".html") or archivo is None and navegador:  # HTML o gráfico interactivo
+        return graficar_barras_bokeh(etiquetas, valores, titulo, eje_x, eje_y, archivo)  # Dibuja con bokeh
+    return graficar_barras_matplotlib(etiquetas, valores, titulo, eje_x, eje_y, archivo)  # Dibuja con matplotlib
+
 # Función para graficar el top 3 de productos más vendidos
-def graficar_top_productos_vendidos(top_productos):
+def graficar_top_productos_vendidos(top_productos, archivo=None):
     if top_productos:  # Verifica si hay productos vendidos
         productos = [producto[0] for producto in top_productos]  # Obtiene los nombres de los productos
         cantidades = [producto[1] for producto in top_productos]  # Obtiene las cantidades vendidas
-        plt.bar(productos, cantidades)  # Crea un gráfico de barras
-        plt.xlabel('Productos')  # Etiqueta del eje x
-        plt.ylabel('Cantidad vendida')  # Etiqueta del eje y
-        plt.title('Top 3 productos más vendidos')  # Título del gráfico
-        plt.show()  # Muestra el gráfico
-    else:
-        print("No hay productos registrados.")  # Mensaje si no hay productos registrados
+        return graficar_barras(productos, cantidades, 'Top 3 productos más vendidos', 'Productos', 'Cantidad vendida', archivo)  # Dibuja el gráfico
+    print("No hay productos registrados.")  # Mensaje si no hay productos registrados
 
 # Función para graficar el top 3 de clientes que más compraron boletos
-def graficar_top_clientes_compradores(top_clientes):
+def graficar_top_clientes_compradores(top_clientes, archivo=None):
     if top_clientes:  # Verifica si hay clientes que compraron boletos
         clientes = [cliente[0].nombre for cliente in top_clientes]  # Obtiene los nombres de los clientes
         boletos = [cliente[1] for cliente in top_clientes]  # Obtiene la cantidad de boletos comprados
-        p = figure(x_range=clientes, plot_height=350, title='Top 3 clientes que más compraron boletos')  # Crea un gráfico de barras
-        p.vbar(x=clientes, top=boletos, width=0.9)  # Añade las barras al gráfico
-        p.xaxis.axis_label = 'Clientes'  # Etiqueta del eje x
-        p.yaxis.axis_label = 'Boletos comprados'  # Etiqueta del eje y
-        show(p)  # Muestra el gráfico
+        return graficar_barras(clientes, boletos, 'Top 3 clientes que más compraron boletos', 'Clientes', 'Boletos comprados', archivo, navegador=True)  # Dibuja el gráfico
+    print("No hay clientes registrados.")  # Mensaje si no hay clientes registrados
+
+# Función para guardar los gráficos del reporte en archivos sin abrir ventanas
+def exportar_graficos(estado, directorio, formato="png"):
+    if formato not in FORMATOS_GRAFICOS:  # Verifica el formato
+        raise ValueError(f"Formato de gráfico inválido: {formato}")  # Error si el formato no existe
+    os.makedirs(directorio, exist_ok=True)  # Crea el directorio si no existe
+    archivos = [  # Gráficos generados
+        graficar_top_productos_vendidos(obtener_top_productos_vendidos(estado.libro), os.path.join(directorio, f"top_productos.{formato}")),  # Gráfico de productos
+        graficar_top_clientes_compradores(obtener_top_clientes_compradores(estado.clientes), os.path.join(directorio, f"top_clientes.{formato}")),  # Gráfico de clientes
+    ]
+    return [archivo for archivo in archivos if archivo]  # Devuelve los archivos creados
+
+# Función para medir en un intérprete nuevo cuánto cuesta importar un módulo
+def medir_importacion(repeticiones=5):
+    codigos = {  # Código que se importa en cada caso
+        "programa": f"import importlib.util; e = importlib.util.spec_from_file_location('programa', {os.path.abspath(__file__)!r}); e.loader.exec_module(importlib.util.module_from_spec(e))",  # Este programa
+        "matplotlib.pyplot": "import matplotlib.pyplot",  # Librería de gráficos
+        "bokeh.plotting": "import bokeh.plotting",  # Librería de gráficos interactivos
+    }
+    medicion = "import time, resource; inicio = time.perf_counter(); {}; print(time.perf_counter() - inicio, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"  # Mide el tiempo y la memoria máxima
+    resultados = {}  # Resultados por caso
+    for nombre, codigo in codigos.items():  # Recorre los casos
+        tiempos, memorias = [], []  # Mediciones del caso
+        for _ in range(repeticiones):  # Repite la medición en intérpretes nuevos
+            salida = subprocess.run([sys.executable, "-c", medicion.format(codigo)], capture_output=True, text=True, check=True).stdout.split()  # Ejecuta la medición
+            tiempos.append(float(salida[0]))  # Guarda el tiempo
+            memorias.append(int(salida[1]))  # Guarda la memoria máxima (KB en Linux)
+        resultados[nombre] = (statistics.median(tiempos), statistics.median(memorias))  # Guarda la mediana
+    return resultados  # Devuelve los resultados
+
+# Función para escribir datos de prueba con la misma forma que los catálogos de la API
+def generar_datos_sinteticos(directorio, partidos=51, clientes=0, restaurantes=2, productos=5, semilla=0):
+    azar = random.Random(semilla)  # Generador aleatorio repetible
+    cantidad_equipos = max(4, partidos // 2)  # Cantidad de equipos según los partidos
+    cantidad_estadios = max(1, partidos // 5)  # Cantidad de estadios según los partidos
+    equipos = []  # Inicializa la lista de equipos
+    for i in range(cantidad_equipos):  # Crea los equipos en grupos de cuatro
+        codigo = "".join(string.ascii_uppercase[i // 26 ** k % 26] for k in (2, 1, 0))  # Código único de tres letras
+        equipos.append({"id": f"t{i}", "code": codigo, "name": f"Pais {i}", "group": f"G{i // 4}"})  # Añade el equipo
+    nombres_productos = (("Refresco", "non-alcoholic"), ("Cerveza", "alcoholic"), ("Hamburguesa", "plate"), ("Perro Caliente", "plate"), ("Combo", "package"), ("Agua", "non-alcoholic"), ("Vino", "alcoholic"))  # Productos de base
+    estadios = []  # Inicializa la lista de estadios
+    for i in range(cantidad_estadios):  # Crea los estadios
+        menus = []  # Inicializa los restaurantes del estadio
+        for r in range(restaurantes):  # Crea los restaurantes
+            menu = []  # Inicializa los productos del restaurante
+            for j in range(productos):  # Crea los productos
+                nombre, adicional = nombres_productos[j % len(nombres_productos)]  # Elige el producto de base
+                menu.append({"name": f"{nombre} {j // len(nombres_productos)}" if j >= len(nombres_productos) else nombre, "quantity": azar.randint(1, 10), "price": round(azar.uniform(2, 30), 2), "adicional": adicional, "stock": azar.randint(50, 500)})  # Añade el producto
+            menus.append({"name": f"Restaurante {i}-{r}", "products": menu})  # Añade el restaurante
+        estadios.append({"id": f"s{i}", "name": f"Estadio {i}", "city": f"Ciudad {i // 2}", "capacity": [max(40000, 20 * clientes // cantidad_estadios), max(4000, 5 * clientes // cantidad_estadios)], "restaurants": menus})  # Añade el estadio
+    inicio = datetime.date(2024, 6, 14)  # Fecha del primer partido
+    encuentros = []  # Inicializa la lista de partidos
+    for i in range(partidos):  # Crea los partidos
+        grupo = azar.randrange(cantidad_equipos // 4)  # Elige el grupo
+        local, visitante = azar.sample(equipos[grupo * 4:grupo * 4 + 4], 2)  # Elige dos equipos del grupo
+        encuentros.append({"id": str(100 + i), "number": i + 1, "home": {"id": local["id"]}, "away": {"id": visitante["id"]}, "date": (inicio + datetime.timedelta(days=i // 4)).isoformat(), "group": local["group"], "stadium_id": azar.choice(estadios)["id"]})  # Añade el partido
+    os.makedirs(directorio, exist_ok=True)  # Crea el directorio si no existe
+    for nombre, datos in (("equipos", equipos), ("estadios", estadios), ("partidos", encuentros)):  # Recorre los catálogos
+        with open(os.path.join(directorio, CATALOGOS[nombre]), "w", encoding="utf-8") as archivo:  # Abre el archivo del catálogo
+            json.dump(datos, archivo)  # Guarda el catálogo
+    with open(os.path.join(directorio, "pedidos.jsonl"), "w", encoding="utf-8") as archivo:  # Abre el archivo de pedidos de los clientes
+        for i in range(clientes):  # Crea los pedidos
+            pedido = {"nombre": f"Cliente {i}", "cedula": str(azar.randint(10 ** 5, 10 ** 9)), "edad": azar.randint(12, 80), "partido_id": azar.choice(encuentros)["id"], "tipo_entrada": "VIP" if azar.random() < 0.2 else "General"}  # Crea el pedido
+            archivo.write(json.dumps(pedido) + "\n")  # Guarda el pedido
+    return {"equipos": len(equipos), "estadios": len(estadios), "partidos": len(encuentros), "clientes": clientes}  # Devuelve las cantidades generadas
+
+# Función para medir el tiempo y la memoria máxima de una operación
+def medir_operacion(funcion, repeticiones=3, preparar=None):
+    tiempos = []  # Inicializa los tiempos
+    for _ in range(repeticiones + 1):  # La última repetición mide la memoria
+        if preparar is not None:  # Si la operación necesita preparación
+            preparar()  # Prepara la repetición
+        if len(tiempos) == repeticiones:  # Repetición para la memoria, sin medir el tiempo
+            tracemalloc.start()  # Empieza a medir la memoria
+            funcion()  # Ejecuta la operación
+            pico = tracemalloc.get_traced_memory()[1]  # Memoria máxima usada
+            tracemalloc.stop()  # Deja de medir la memoria
+        else:
+            inicio = time.perf_counter()  # Momento de inicio
+            funcion()  # Ejecuta la operación
+            tiempos.append(time.perf_counter() - inicio)  # Guarda el tiempo
+    return min(tiempos), pico  # Devuelve el mejor tiempo y la memoria máxima
+
+# Función para medir las operaciones principales con datos de prueba de varios tamaños
+def ejecutar_benchmarks(tamanos=TAMANOS_BENCHMARK, repeticiones=3):
+    resultados = []  # Inicializa los resultados
+    for tamano in tamanos:  # Recorre los tamaños
+        with tempfile.TemporaryDirectory() as directorio:  # Directorio temporal para los datos
+            generar_datos_sinteticos(directorio, partidos=tamano, clientes=10 * tamano, semilla=tamano)  # Genera los datos de prueba
+            datos = {}  # Inicializa los catálogos
+            for nombre, archivo_catalogo in CATALOGOS.items():  # Recorre los catálogos
+                with open(os.path.join(directorio, archivo_catalogo), encoding="utf-8") as archivo:  # Abre el catálogo
+                    datos[nombre] = json.load(archivo)  # Lee el catálogo
+            pedidos = list(leer_pedidos(os.path.join(directorio, "pedidos.jsonl")))  # Lee los pedidos
+        cedulas = [int(pedido["cedula"]) for pedido in pedidos]  # Cédulas de los clientes
+        estadios = cargar_estadios(datos["estadios"])  # Crea los estadios
+        catalogo = Catalogo(cargar_equipos(datos["equipos"]), estadios)  # Crea el catálogo
+        partidos = cargar_partidos(datos["partidos"], catalogo)  # Crea los partidos
+        catalogo.agregar_partidos(partidos)  # Indexa los partidos
+        estado = EstadoSistema(catalogo)  # Estado sin almacén de ventas
+        fechas = sorted({partido.date for partido in partidos})  # Fechas con partidos
+        with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):  # Oculta los mensajes de las operaciones
+            for pedido in pedidos:  # Vende los boletos de los pedidos
+                cliente = vender_boleto(estado, pedido["nombre"], pedido["cedula"], pedido["edad"], pedido["partido_id"], pedido["tipo_entrada"])  # Vende el boleto
+                if cliente.tipo_entrada == "VIP":  # Los clientes VIP compran en el restaurante
+                    inventario = catalogo.partido(cliente.partido_id).estadio.inventario  # Inventario del estadio
+                    entrada = catalogo.productos.indice_de(inventario.estadio).entradas[0]  # Primer producto del estadio
+                    if inventario.disponible(entrada) > 0:  # Si queda stock
+                        reserva = inventario.reservar([(entrada, 1)])  # Aparta el producto
+                        estado.comprar(cliente, reserva, reserva.subtotal(), 0, reserva.subtotal())  # Confirma la compra
+            ids = [cliente.id_boleto for cliente in estado.boletos.clientes]  # Boletos vendidos
+            ambitos = [None, *estadios]  # Búsquedas de productos en todos los estadios y en cada uno
+            prefijos = sorted({entrada.producto.name[:3] for entrada in catalogo.productos.entradas})  # Prefijos de los nombres de los productos
+            tipos = sorted({entrada.producto.adicional for entrada in catalogo.productos.entradas})  # Tipos de producto
+            rangos = [(minimo, minimo + 5) for minimo in range(0, 40, 5)]  # Rangos de precio con IVA
+            operaciones = (  # Operación, cantidad de llamadas, función y preparación
+                ("cargar_estadios", len(datos["estadios"]), lambda: cargar_estadios(datos["estadios"]), None),
+                ("Match", len(datos["partidos"]), lambda: cargar_partidos(datos["partidos"], catalogo), None),
+                ("es_numero_vampiro", len(cedulas), lambda: [es_numero_vampiro(c) for c in cedulas], cache_vampiros.clear),
+                ("es_numero_perfecto", len(cedulas), lambda: [es_numero_perfecto(c) for c in cedulas], cache_perfectos.clear),
+                ("buscar_partidos_por_pais", len(catalogo.equipos), lambda: [buscar_partidos_por_pais(e.name, catalogo.buscador) for e in catalogo.equipos], None),
+                ("buscar_partidos_por_estadio", len(estadios), lambda: [buscar_partidos_por_estadio(e.name, catalogo.buscador) for e in estadios], None),
+                ("buscar_partidos_por_fecha", len(fechas), lambda: [buscar_partidos_por_fecha(f, catalogo.buscador) for f in fechas], None),
+                ("buscar_productos nombre", len(ambitos) * len(prefijos), lambda: [buscar_productos(catalogo.productos, "nombre", p, estadio=e) for e in ambitos for p in prefijos], None),
+                ("buscar_productos tipo", len(ambitos) * len(tipos), lambda: [buscar_productos(catalogo.productos, "tipo", t, estadio=e) for e in ambitos for t in tipos], None),
+                ("buscar_productos rango", len(ambitos) * len(rangos), lambda: [buscar_productos(catalogo.productos, "rango", precio_minimo=a, precio_maximo=b, estadio=e) for e in ambitos for a, b in rangos], None),
+                ("validar_boleto", len(ids), lambda: [validar_boleto(estado, i) for i in ids], None),
+                ("estadisticas (opción 6)", 1, lambda: mostrar_estadisticas(estado, graficar=False), None),
+            )
+            for nombre, cantidad, funcion, preparar in operaciones:  # Recorre las operaciones
+                segundos, memoria = medir_operacion(funcion, repeticiones, preparar)  # Mide la operación
+                resultados.append({"operacion": nombre, "tamano": tamano, "cantidad": cantidad, "segundos": segundos, "memoria": memoria})  # Guarda el resultado
+    return resultados  # Devuelve los resultados
+
+# Función para mostrar los resultados del benchmark y compararlos con una medición anterior
+def mostrar_benchmarks(resultados, base=None):
+    anteriores = {(r["operacion"], r["tamano"]): r for r in base or []}  # Resultados anteriores por operación y tamaño
+    print(f"{'Operación':<28} {'Tamaño':>7} {'Llamadas':>9} {'Total ms':>10} {'µs/llamada':>11} {'Memoria KB':>11}" + (" vs. base" if base else ""))  # Encabezado
+    for r in resultados:  # Recorre los resultados
+        linea = f"{r['operacion']:<28} {r['tamano']:>7} {r['cantidad']:>9} {r['segundos'] * 1000:>10.2f} {r['segundos'] * 1e6 / max(r['cantidad'], 1):>11.2f} {r['memoria'] / 1024:>11.1f}"  # Línea del resultado
+        anterior = anteriores.get((r["operacion"], r["tamano"]))  # Resultado anterior de la misma operación
+        if anterior and anterior["segundos"] > 0:  # Si hay con qué comparar
+            razon = r["segundos"] / anterior["segundos"]  # Razón entre el tiempo actual y el anterior
+            linea += f" {razon:8.2f}x" + (" LENTO" if razon > 1.2 else "")  # Marca las operaciones más lentas
+        print(linea)  # Muestra la línea
+
+# Función para probar que varias taquillas a la vez no venden dos veces el mismo asiento
+def prueba_estres_reservas(hilos=16, operaciones=5000, capacidad=2000):
+    mapa = MapaAsientos(capacidad, capacidad // 10)  # Crea un estadio de prueba
+    vendidos = collections.Counter()  # Veces que se vendió cada asiento
+    candado_vendidos = threading.Lock()  # Candado para juntar los resultados
+    barrera = threading.Barrier(hilos)  # Hace que todas las taquillas empiecen a la vez
+
+    def taquilla(numero):  # Función que simula una taquilla
+        azar = random.Random(numero)  # Generador aleatorio propio de la taquilla
+        confirmados = []  # Asientos vendidos por la taquilla
+        barrera.wait()  # Espera a las demás taquillas
+        for _ in range(operaciones):  # Repite las operaciones
+            seccion = "General" if azar.random() < 0.8 else "VIP"  # Elige la sección
+            modo = azar.random()  # Elige qué hace el cliente
+            if modo < 0.2:  # Reserva directa de un asiento al azar
+                indice = azar.randrange(mapa.capacidad(seccion))  # Elige el asiento
+                if mapa.reservar(seccion, indice):  # Intenta ocuparlo
+                    confirmados.append((seccion, indice))  # Guarda la venta
+                continue  # Siguiente operación
+            retencion = mapa.retener(seccion, cantidad=azar.choice((1, 1, 1, 2, 4)), duracion=0.001 if modo >= 0.9 else 60)  # Aparta asientos
+            if retencion is None:  # Si no hay asientos
+                continue  # Siguiente operación
+            if modo >= 0.9:  # El cliente tarda más que la retención
+                time.sleep(0.002)  # Deja vencer la retención
+            if modo < 0.6 or modo >= 0.9:  # El cliente paga
+                if mapa.confirmar(retencion):  # Ocupa los asientos si la retención sigue vigente
+                    confirmados.extend((seccion, retencion.indice + i) for i in range(retencion.cantidad))  # Guarda la venta
+            else:
+                mapa.cancelar(retencion)  # El cliente cancela
+        with candado_vendidos:  # Junta los resultados
+            vendidos.update(confirmados)  # Suma las ventas de la taquilla
+
+    taquillas = [threading.Thread(target=taquilla, args=(numero,)) for numero in range(hilos)]  # Crea las taquillas
+    inicio = time.perf_counter()  # Momento de inicio
+    for hilo in taquillas:  # Recorre las taquillas
+        hilo.start()  # Inicia la taquilla
+    for hilo in taquillas:  # Recorre las taquillas
+        hilo.join()  # Espera a que termine
+    duracion = time.perf_counter() - inicio  # Tiempo total
+    errores = [f"Asiento {seccion} {indice} vendido {veces} veces" for (seccion, indice), veces in vendidos.items() if veces > 1]  # Busca sobreventas
+    for seccion, asientos in mapa.secciones.items():  # Recorre las secciones
+        mapa.siguiente_libre(seccion)  # Vence las retenciones pendientes
+        ocupados = asientos.count(MapaAsientos.OCUPADO)  # Asientos ocupados en el mapa
+        vendidos_seccion = sum(1 for (s, _) in vendidos if s == seccion)  # Asientos vendidos en la sección
+        if ocupados != vendidos_seccion:  # Verifica que el mapa coincida con las ventas
+            errores.append(f"{seccion}: {ocupados} asientos ocupados pero {vendidos_seccion} vendidos")  # Guarda el error
+        if asientos.count(MapaAsientos.RETENIDO):  # Verifica que no queden retenciones colgadas
+            errores.append(f"{seccion}: quedaron {asientos.count(MapaAsientos.RETENIDO)} asientos retenidos")  # Guarda el error
+        if mapa.disponibles(seccion) != asientos.count(MapaAsientos.LIBRE):  # Verifica el contador de libres
+            errores.append(f"{seccion}: el contador indica {mapa.disponibles(seccion)} libres pero hay {asientos.count(MapaAsientos.LIBRE)}")  # Guarda el error
+    return {"operaciones": hilos * operaciones, "vendidos": len(vendidos), "segundos": duracion, "errores": errores}  # Devuelve el resultado
+
+# Función para enviar una solicitud HTTP por una conexión abierta y leer la respuesta JSON
+async def solicitud_http(lector, escritor, metodo, ruta, cuerpo=None, anfitrion="localhost"):
+    contenido = json.dumps(cuerpo).encode("utf-8") if cuerpo is not None else b""  # Cuerpo de la solicitud
+    escritor.write(f"{metodo} {ruta} HTTP/1.1\r\nHost: {anfitrion}\r\nContent-Type: application/json\r\nContent-Length: {len(contenido)}\r\n\r\n".encode("latin-1") + contenido)  # Escribe la solicitud
+    await escritor.drain()  # Envía la solicitud
+    codigo = int((await lector.readline()).split()[1])  # Código de la respuesta
+    largo = 0  # Tamaño del cuerpo
+    while (cabecera := await lector.readline()) not in (b"\r\n", b"\n", b""):  # Lee las cabeceras
+        nombre, _, valor = cabecera.decode("latin-1").partition(":")  # Separa el nombre y el valor
+        if nombre.strip().lower() == "content-length":  # Si es el tamaño del cuerpo
+            largo = int(valor)  # Guarda el tamaño
+    return codigo, json.loads(await lector.readexactly(largo)) if largo else None  # Devuelve el código y los datos
+
+# Función para medir cuántas solicitudes por segundo atiende el servicio y su latencia
+async def prueba_carga(url, conexiones=50, solicitudes=5000):
+    direccion = urllib.parse.urlsplit(url if "//" in url else "http://" + url)  # Separa el anfitrión y el puerto
+    anfitrion, puerto = direccion.hostname, direccion.port or 80  # Dirección del servicio
+    lector, escritor = await asyncio.open_connection(anfitrion, puerto)  # Conexión para preparar la prueba
+    _, partidos = await solicitud_http(lector, escritor, "GET", "/partidos", anfitrion=anfitrion)  # Partidos disponibles
+    escritor.close()  # Cierra la conexión
+    if not partidos:  # Verifica que haya partidos
+        raise ValueError("El servicio no tiene partidos cargados")  # Error si no hay partidos
+    latencias = []  # Duración de cada solicitud
+    codigos = collections.Counter()  # Cantidad de respuestas por código
+    vendidos = []  # Boletos vendidos durante la prueba
+
+    async def cliente(numero, cantidad):  # Función que simula una taquilla remota
+        azar = random.Random(numero)  # Generador aleatorio propio de la taquilla
+        lector, escritor = await asyncio.open_connection(anfitrion, puerto)  # Conexión que se reutiliza
+        try:
+            for _ in range(cantidad):  # Envía las solicitudes
+                eleccion = azar.random()  # Elige la operación
+                partido = azar.choice(partidos)  # Elige un partido
+                if eleccion < 0.5:  # Búsqueda de partidos
+                    metodo, ruta, cuerpo = "GET", "/partidos?" + urllib.parse.urlencode({"equipo": partido["local"]}), None  # Busca por equipo
+                elif eleccion < 0.8:  # Validación de un boleto vendido o falso
+                    metodo, ruta, cuerpo = "POST", "/validaciones", {"id_boleto": azar.choice(vendidos) if vendidos and azar.random() < 0.7 else "FALSO" + str(azar.randrange(10 ** 6))}  # Valida el boleto
+                elif eleccion < 0.95:  # Venta de un boleto
+                    metodo, ruta, cuerpo = "POST", "/boletos", {"nombre": f"Carga {numero}", "cedula": str(azar.randint(10 ** 5, 10 ** 9)), "edad": azar.randint(12, 80), "partido_id": partido["id"], "tipo_entrada": "VIP" if azar.random() < 0.2 else "General"}  # Vende el boleto
+                else:  # Retención de un asiento
+                    metodo, ruta, cuerpo = "POST", "/retenciones", {"partido_id": partido["id"], "tipo_entrada": "General"}  # Aparta el asiento
+                inicio = time.perf_counter()  # Momento de inicio
+                codigo, datos = await solicitud_http(lector, escritor, metodo, ruta, cuerpo, anfitrion)  # Envía la solicitud
+                latencias.append(time.perf_counter() - inicio)  # Guarda la latencia
+                codigos[codigo] += 1  # Cuenta la respuesta
+                if codigo == 201 and ruta == "/boletos":  # Si se vendió un boleto
+                    vendidos.append(datos["id_boleto"])  # Lo guarda para validarlo después
+                elif codigo == 201 and ruta == "/retenciones":  # Si se apartó un asiento
+                    inicio = time.perf_counter()  # Momento de inicio
+                    codigo, _ = await solicitud_http(lector, escritor, "DELETE", f"/retenciones/{datos['retencion']}", anfitrion=anfitrion)  # Cancela la retención
+                    latencias.append(time.perf_counter() - inicio)  # Guarda la latencia
+                    codigos[codigo] += 1  # Cuenta la respuesta
+        finally:
+            escritor.close()  # Cierra la conexión
+
+    inicio = time.perf_counter()  # Momento de inicio de la prueba
+    await asyncio.gather(*(cliente(n, solicitudes // conexiones + (n < solicitudes % conexiones)) for n in range(conexiones)))  # Ejecuta las taquillas a la vez
+    duracion = time.perf_counter() - inicio  # Duración de la prueba
+    percentiles = statistics.quantiles(latencias, n=100) if len(latencias) > 1 else latencias * 99  # Percentiles de latencia
+    return {"solicitudes": len(latencias), "segundos": duracion, "por_segundo": len(latencias) / duracion, "p50": percentiles[49], "p99": percentiles[98], "codigos": dict(codigos)}  # Devuelve el resultado
+
+# Función para cargar el estado del sistema y recuperar las ventas guardadas
+@metricas.medir()
+def cargar_estado(url_datos=None, ruta_ventas=RUTA_VENTAS, ruta_estado=None):
+    if ruta_estado:  # Si se indicó un estado guardado
+        estado = importar_estado(ruta_estado, AlmacenVentas(ruta_ventas))  # Carga el estado sin usar la red
     else:
-        print("No hay clientes registrados.")  # Mensaje si no hay clientes registrados
+        estado = EstadoSistema(cargar_datos(url_datos), AlmacenVentas(ruta_ventas))  # Carga los datos y abre el almacén de ventas
+    recuperadas = estado.recuperar()  # Recupera las ventas guardadas
+    if recuperadas:  # Si había operaciones guardadas
+        print(f"Se recuperaron {recuperadas} operaciones guardadas.")  # Informa la recuperación
+    if estado.omitidas:  # Si hubo operaciones de otro catálogo
+        print(f"Se omitieron {len(estado.omitidas)} operaciones que no corresponden al catálogo actual de {estado.almacen.ruta}:")  # Avisa las operaciones omitidas
+        for secuencia, tipo, error in estado.omitidas[:5]:  # Muestra las primeras
+            print(f"  #{secuencia} ({tipo}): {error}")  # Muestra la operación y el motivo
+    return estado  # Devuelve el estado del sistema
+
+# Función para verificar los contadores de estadísticas contra un recálculo completo
+def verificar_estadisticas(estado):
+    diferencias = estado.estadisticas.verificar(estado.boletos)  # Compara los contadores con el recálculo
+    for partido_id, contador, actual, esperado in diferencias:  # Recorre las diferencias
+        print(f"Partido {partido_id}: {contador} = {actual}, se esperaba {esperado}")  # Muestra la diferencia
+    print("Las estadísticas son consistentes." if not diferencias else f"Se encontraron {len(diferencias)} diferencias.")  # Muestra el resultado
+    return diferencias  # Devuelve las diferencias
+
+# Función para guardar las métricas cuando se piden desde el menú
+def exportar_metricas(ruta):
+    if not metricas.activa:  # Verifica si las mediciones están encendidas
+        print("Las métricas están desactivadas. Inicie el programa con --metricas RUTA.")  # Mensaje de aviso
+        return None  # Termina la función
+    try:
+        print(f"Métricas guardadas en {metricas.guardar(ruta)}")  # Guarda las métricas y muestra la ruta
+    except OSError as e:  # Captura errores al escribir
+        print(f"No se pudieron guardar las métricas: {e}")  # Mensaje de error
+        return None  # Termina la función
+    return ruta  # Devuelve la ruta del archivo
 
 # Función principal
-def main():
-    equipos, estadios, partidos = cargar_datos()  # Carga los datos
-    clientes = []  # Inicializa la lista de clientes
+def main(url_datos=None, ruta_ventas=RUTA_VENTAS, ruta_estado=None):
+    estado = cargar_estado(url_datos, ruta_ventas, ruta_estado)  # Carga el estado del sistema
+    try:
+        menu_principal(estado)  # Ejecuta el menú principal
+    finally:
+        estado.cerrar()  # Cierra el almacén de ventas
+
+# Función para ejecutar el menú principal
+def menu_principal(estado):
+    catalogo = estado.catalogo  # Obtiene el catálogo
     while True:  # Ciclo principal
-        print("-- Eurocopa 2024 --\nMenu Principal del Sistema:\n1. Busqueda de partidos.\n2. Venta de entradas.\n3. Validar boleto.\n4. Buscar productos.\n5. Comprar productos.\n6. Mostrar estadísticas.\n7. Salir.")  # Muestra el menú
+        print("-- Eurocopa 2024 --\nMenu Principal del Sistema:\n1. Busqueda de partidos.\n2. Venta de entradas.\n3. Validar boleto.\n4. Buscar productos.\n5. Comprar productos.\n6. Mostrar estadísticas.\n7. Salir.\n8. Exportar métricas.")  # Muestra el menú
         opcion = input("Elija una opcion: ")  # Solicita una opción
-        if opcion == "1":  # Si la opción es 1
-            op = input("Elija el filtro (pais, estadio, fecha): ").lower()  # Solicita el filtro
-            if op == "pais":  # Si el filtro es país
-                pais = input("Nombre del pais: ")  # Solicita el nombre del país
-                partidos_pais = buscar_partidos_por_pais(pais, partidos)  # Busca los partidos por país
-                if partidos_pais:  # Verifica si hay partidos
-                    print(f"Partidos de {pais}:")  # Encabezado
-                    for partido in partidos_pais:  # Recorre los partidos
-                        print(f"Equipo local: {partido.home.name} vs Equipo visitante: {partido.away.name}")  # Muestra los partidos
-                else:
-                    print(f"No se encontraron partidos de {pais}.")  # Mensaje si no hay partidos
-            elif op == "estadio":  # Si el filtro es estadio
-                estadio = input("Nombre del estadio: ")  # Solicita el nombre del estadio
-                partidos_estadio = buscar_partidos_por_estadio(estadio, partidos)  # Busca los partidos por estadio
-                if partidos_estadio:  # Verifica si hay partidos
-                    print(f"Partidos en {estadio}")  # Encabezado
-                    for partido in partidos_estadio:  # Recorre los partidos
-                        print(f"Equipo local: {partido.home.name} vs Equipo visitante: {partido.away.name}")  # Muestra los partidos
-                else:
-                    print(f"No se encontraron partidos en el estadio {estadio}.")  # Mensaje si no hay partidos
-            elif op == "fecha":  # Si el filtro es fecha
-                fecha = input("Fecha del partido (aaaa-mm-dd): ")  # Solicita la fecha
-                partidos_fecha = buscar_partidos_por_fecha(fecha, partidos)  # Busca los partidos por fecha
-                if partidos_fecha:  # Verifica si hay partidos
-                    print(f"Partidos en la fecha {fecha}:")  # Encabezado
-                    for partido in partidos_fecha:  # Recorre los partidos
-                        print(f"ID: {partido.id}, Equipo local: {partido.home.name}, Equipo visitante: {partido.away.name}, Estadio: {partido.estadio.name}\n-----")  # Muestra los partidos
+        with metricas.cronometro(f"menu_opcion_{opcion}" if opcion in OPCIONES_MENU else "menu_opcion_invalida"):  # Mide la duración de la opción elegida
+            if opcion == "1":  # Si la opción es 1
+                buscar_partidos(catalogo.buscador)  # Busca partidos con el filtro elegido
+            elif opcion == "2":  # Si la opción es 2
+                vender_entrada(estado)  # Vende una entrada
+            elif opcion == "3":  # Si la opción es 3
+                id_boleto = input("Ingrese ID del Boleto (o 'archivo' para validar un lote): ")  # Solicita el ID del boleto
+                if id_boleto.lower() == "archivo":  # Si quiere validar un archivo de boletos
+                    validar_boletos_archivo(estado, input("Ruta del archivo con un ID por línea: "))  # Valida el lote
                 else:
-                    print(f"No se encontraron partidos en la fecha {fecha}.")  # Mensaje si no hay partidos
+                    validar_boleto(estado, id_boleto)  # Valida el boleto
+            elif opcion == "4":  # Si la opción es 4
+                consultar_productos(catalogo)  # Busca productos con el filtro elegido
+            elif opcion == "5":  # Si la opción es 5
+                cedula = input("Ingrese cedula del cliente: ")  # Solicita la cédula del cliente
+                realizar_compra_restaurante(cedula, estado)  # Realiza una compra en el restaurante
+            elif opcion == "6":  # Si la opción es 6
+                mostrar_estadisticas(estado)  # Muestra las estadísticas y los gráficos
+            elif opcion == "7":  # Si la opción es 7
+                guardar_datos_actuales(estado)  # Guarda los datos actuales
+                print("Saliendo del sistema. Presione ENTER para salir.")  # Mensaje de salida
+                input()  # Espera una entrada
+                break  # Termina el ciclo
+            elif opcion == "8":  # Si la opción es 8
+                exportar_metricas(input(f"Ruta del archivo de métricas (.json o .prom) [{metricas.ruta or 'metricas.prom'}]: ") or metricas.ruta or "metricas.prom")  # Guarda las métricas
             else:
                 print("Opción incorrecta.")  # Mensaje si la opción es incorrecta
-        elif opcion == "2":  # Si la opción es 2
-            vender_entrada(partidos, estadios, clientes)  # Vende una entrada
-        elif opcion == "3":  # Si la opción es 3
-            id_boleto = input("Ingrese ID del Boleto: ")  # Solicita el ID del boleto
-            validar_boleto(clientes, id_boleto)  # Valida el boleto
-        elif opcion == "4":  # Si la opción es 4
-            op = input("Elija el filtro (nombre, tipo, rango): ").lower()  # Solicita el filtro
-            if op == "nombre":  # Si el filtro es nombre
-                name = input("Nombre del producto: ")  # Solicita el nombre del producto
-                buscar_productos(estadios, "nombre", name)  # Busca productos por nombre
-            elif op == "tipo":  # Si el filtro es tipo
-                tipo = input("Tipo: (alcoholic, non-alcoholic, package, plate): ")  # Solicita el tipo de producto
-                buscar_productos(estadios, "tipo", tipo)  # Busca productos por tipo
-            elif op == "rango":  # Si el filtro es rango
-                inf = float(input("Rango inferior: "))  # Solicita el rango inferior
-                sup = float(input("Rango superior: "))  # Solicita el rango superior
-                buscar_productos(estadios, "rango", precio_minimo=inf, precio_maximo=sup)  # Busca productos por rango de precio
-            else:
-                print("Opción incorrecta.")  # Mensaje si la opción es incorrecta
-        elif opcion == "5":  # Si la opción es 5
-            cedula = input("Ingrese cedula del cliente: ")  # Solicita la cédula del cliente
-            realizar_compra_restaurante(cedula, estadios, clientes)  # Realiza una compra en el restaurante
-        elif opcion == "6":  # Si la opción es 6
-            promedio_gasto_clientes_vip(partidos, estadios, clientes)  # Muestra el promedio de gasto de clientes VIP
-            mostrar_asistencia_partidos(partidos, clientes)  # Muestra la asistencia a los partidos
-            encontrar_partido_mayor_asistencia(partidos, clientes)  # Encuentra el partido con mayor asistencia
-            encontrar_partido_mayor_boletos_vendidos(partidos, clientes)  # Encuentra el partido con mayor boletos vendidos
-            top_productos = obtener_top_productos_vendidos(estadios, clientes)  # Obtiene el top 3 de productos más vendidos
-            top_clientes = obtener_top_clientes_compradores(clientes)  # Obtiene el top 3 de clientes que más compraron boletos
-            graficar_top_productos_vendidos(top_productos)  # Grafica el top 3 de productos más vendidos
-            graficar_top_clientes_compradores(top_clientes)  # Grafica el top 3 de clientes que más compraron boletos
-        elif opcion == "7":  # Si la opción es 7
-            guardar_datos_actuales(clientes, equipos, estadios, partidos)  # Guarda los datos actuales
-            print("Saliendo del sistema. Presione ENTER para salir.")  # Mensaje de salida
-            input()  # Espera una entrada
-            break  # Termina el ciclo
-        else:
-            print("Opción incorrecta.")  # Mensaje si la opción es incorrecta
 
 if __name__ == "__main__":  # Punto de entrada
-    main()  # Ejecuta la función principal
+    parser = argparse.ArgumentParser(description="Sistema de venta de entradas de la Eurocopa 2024")  # Crea el lector de argumentos
+    parser.add_argument("--datos", metavar="URL", help="URL o directorio local con teams.json, stadiums.json y matches.json")  # Fuente alternativa de los catálogos
+    parser.add_argument("--ventas", default=RUTA_VENTAS, metavar="RUTA", help="base de datos donde se guardan las ventas")  # Ruta del almacén de ventas
+    parser.add_argument("--estado", metavar="RUTA", help="inicia desde un estado exportado en JSON Lines en lugar de descargar los catálogos")  # Estado guardado
+    parser.add_argument("--verificar-estadisticas", action="store_true", help="compara los contadores de estadísticas con un recálculo completo y termina")  # Opción de verificación
+    parser.add_argument("--estres-reservas", type=int, metavar="HILOS", help="vende asientos desde varios hilos a la vez y verifica que no haya sobreventas")  # Prueba de estrés
+    parser.add_argument("--graficos", metavar="DIRECTORIO", help="guarda los gráficos del reporte en archivos sin abrir ventanas y termina")  # Gráficos sin ventana
+    parser.add_argument("--formato-graficos", choices=FORMATOS_GRAFICOS, default="png", help="formato de los gráficos guardados con --graficos")  # Formato de los gráficos
+    parser.add_argument("--medir-importacion", action="store_true", help="mide el tiempo y la memoria de importar el programa y las librerías de gráficos y termina")  # Medición de arranque
+    parser.add_argument("--generar-datos", metavar="DIRECTORIO", help="escribe catálogos de prueba con la forma de la API (y pedidos.jsonl) para usarlos con --datos y termina")  # Generador de datos
+    parser.add_argument("--partidos", type=int, default=51, metavar="N", help="cantidad de partidos de los datos generados")  # Tamaño de los datos generados
+    parser.add_argument("--clientes", type=int, default=0, metavar="N", help="cantidad de pedidos de clientes de los datos generados")  # Clientes de los datos generados
+    parser.add_argument("--semilla", type=int, default=0, help="semilla de los datos generados")  # Semilla de los datos generados
+    parser.add_argument("--benchmark", type=int, nargs="*", metavar="PARTIDOS", help=f"mide el tiempo y la memoria de las operaciones principales con datos generados (por defecto {' '.join(map(str, TAMANOS_BENCHMARK))} partidos) y termina")  # Benchmark
+    parser.add_argument("--benchmark-json", metavar="RUTA", help="guarda los resultados del benchmark en un archivo JSON")  # Resultados del benchmark
+    parser.add_argument("--benchmark-base", metavar="RUTA", help="compara el benchmark con los resultados guardados en un archivo JSON")  # Benchmark anterior
+    parser.add_argument("--metricas", metavar="RUTA", help="mide la duración de cada operación y guarda las métricas al salir (.json para JSON, otra extensión para texto de Prometheus)")  # Métricas
+    parser.add_argument("--perfil", metavar="RUTA", help="perfila la sesión con cProfile, guarda el perfil en RUTA y muestra las funciones más costosas al salir")  # Perfil de la sesión
+    parser.add_argument("--reporte-cierre", action="store_true", help="calcula el reporte de cierre en columnas con NumPy, lo compara al centavo con los cálculos por objeto y termina")  # Reporte de cierre
+    parser.add_argument("--servicio", nargs="?", const=SERVICIO_PREDETERMINADO, metavar="ANFITRION:PUERTO", help=f"atiende ventas, retenciones, validaciones, búsquedas y compras por HTTP (por defecto {SERVICIO_PREDETERMINADO})")  # Servicio de taquilla
+    parser.add_argument("--prueba-carga", metavar="URL", help="envía solicitudes al servicio desde varias conexiones y muestra solicitudes por segundo y latencia p99")  # Prueba de carga
+    parser.add_argument("--conexiones", type=int, default=50, metavar="N", help="conexiones simultáneas de la prueba de carga")  # Conexiones de la prueba
+    parser.add_argument("--solicitudes", type=int, default=5000, metavar="N", help="solicitudes totales de la prueba de carga")  # Solicitudes de la prueba
+    parser.add_argument("--pedidos", metavar="RUTA", help="vende los pedidos de un archivo CSV o JSON Lines (nombre, cedula, edad, partido_id, tipo_entrada, asiento opcional como fila-columna) y termina")  # Venta masiva
+    parser.add_argument("--resultados", metavar="RUTA", help="archivo JSON Lines con el resultado de cada pedido (por defecto RUTA_PEDIDOS.resultados.jsonl)")  # Resultados de la venta masiva
+    parser.add_argument("--procesos", type=int, metavar="N", help="procesos para calcular los descuentos de la venta masiva (0 para no usar procesos)")  # Procesos auxiliares
+    parser.add_argument("--top-productos", action="store_true", help="muestra los productos y restaurantes más vendidos y termina")  # Opción del top de ventas
+    parser.add_argument("--partido", metavar="ID", help="limita --top-productos a las compras de los clientes de un partido")  # Partido del top
+    parser.add_argument("--desde", metavar="AAAA-MM-DD", help="limita --top-productos a las compras desde esa fecha")  # Inicio del rango del top
+    parser.add_argument("--hasta", metavar="AAAA-MM-DD", help="limita --top-productos a las compras hasta esa fecha (inclusive)")  # Fin del rango del top
+    parser.add_argument("--comprobar-perfectos", type=int, metavar="N", help="compara es_numero_perfecto con la versión de referencia para las cédulas 0..N")  # Opción de comprobación
+    argumentos = parser.parse_args()  # Lee los argumentos
+    if argumentos.metricas:  # Si se pidieron las métricas
+        metricas.activar(argumentos.metricas)  # Enciende las mediciones y las guarda al salir
+    if argumentos.comprobar_perfectos is not None:  # Si se pidió la comprobación de números perfectos
+        cedulas = list(range(argumentos.comprobar_perfectos + 1)) + [n + d for n in NUMEROS_PERFECTOS[:5] for d in (-1, 0, 1)]  # Cédulas a comparar
+        diferencias = comprobar_numero_perfecto(cedulas)  # Compara ambas versiones
+        print(f"Cédulas comparadas: {len(cedulas)}, diferencias: {diferencias}")  # Muestra el resultado
+        sys.exit(1 if diferencias else 0)  # Termina con error si hubo diferencias
+    if argumentos.estres_reservas:  # Si se pidió la prueba de estrés de reservas
+        resultado = prueba_estres_reservas(argumentos.estres_reservas)  # Ejecuta la prueba
+        print(f"Operaciones: {resultado['operaciones']}, asientos vendidos: {resultado['vendidos']}, tiempo: {resultado['segundos']:.2f} s")  # Muestra el resultado
+        for error in resultado["errores"]:  # Recorre los errores
+            print(error)  # Muestra el error
+        print("Sin sobreventas." if not resultado["errores"] else "Se encontraron errores.")  # Muestra la conclusión
+        sys.exit(1 if resultado["errores"] else 0)  # Termina con error si hubo sobreventas
+    if argumentos.generar_datos:  # Si se pidió generar datos de prueba
+        cantidades = generar_datos_sinteticos(argumentos.generar_datos, argumentos.partidos, argumentos.clientes, semilla=argumentos.semilla)  # Genera los datos
+        print(f"Datos generados en {argumentos.generar_datos}: " + ", ".join(f"{cantidad} {nombre}" for nombre, cantidad in cantidades.items()))  # Muestra las cantidades
+        sys.exit(0)  # Termina el programa
+    if argumentos.benchmark is not None:  # Si se pidió el benchmark
+        base = None  # Resultados anteriores
+        if argumentos.benchmark_base:  # Si se indicó un benchmark anterior
+            with open(argumentos.benchmark_base, encoding="utf-8") as archivo:  # Abre el benchmark anterior
+                base = json.load(archivo)  # Lee los resultados anteriores
+        resultados = ejecutar_benchmarks(argumentos.benchmark or TAMANOS_BENCHMARK)  # Ejecuta el benchmark
+        mostrar_benchmarks(resultados, base)  # Muestra los resultados
+        if argumentos.benchmark_json:  # Si se pidió guardar los resultados
+            with open(argumentos.benchmark_json, "w", encoding="utf-8") as archivo:  # Abre el archivo de resultados
+                json.dump(resultados, archivo, indent=2)  # Guarda los resultados
+        sys.exit(0)  # Termina el programa
+    if argumentos.medir_importacion:  # Si se pidió medir la importación
+        for nombre, (segundos, memoria) in medir_importacion().items():  # Recorre los resultados
+            print(f"{nombre:<20} {segundos * 1000:8.1f} ms {memoria / 1024:8.1f} MB")  # Muestra el tiempo y la memoria máxima
+        sys.exit(0)  # Termina el programa
+    if argumentos.graficos:  # Si se pidieron los gráficos en archivos
+        estado = cargar_estado(argumentos.datos, argumentos.ventas, argumentos.estado)  # Carga el estado del sistema
+        try:
+            for archivo in exportar_graficos(estado, argumentos.graficos, argumentos.formato_graficos):  # Guarda los gráficos
+                print(f"Gráfico guardado en {archivo}")  # Muestra la ruta del gráfico
+        finally:
+            estado.cerrar()  # Cierra el almacén de ventas
+        sys.exit(0)  # Termina el programa
+    if argumentos.prueba_carga:  # Si se pidió la prueba de carga
+        resultado = asyncio.run(prueba_carga(argumentos.prueba_carga, argumentos.conexiones, argumentos.solicitudes))  # Ejecuta la prueba
+        print(f"Solicitudes: {resultado['solicitudes']} en {resultado['segundos']:.2f} s, {resultado['por_segundo']:.0f} solicitudes/s")  # Muestra el rendimiento
+        print(f"Latencia p50: {resultado['p50'] * 1000:.2f} ms, p99: {resultado['p99'] * 1000:.2f} ms")  # Muestra la latencia
+        print("Respuestas: " + ", ".join(f"{codigo}: {cantidad}" for codigo, cantidad in sorted(resultado["codigos"].items())))  # Muestra las respuestas por código
+        sys.exit(0)  # Termina el programa
+    if argumentos.servicio:  # Si se pidió el servicio de taquilla
+        anfitrion, _, puerto = argumentos.servicio.rpartition(":")  # Separa el anfitrión y el puerto
+        estado = cargar_estado(argumentos.datos, argumentos.ventas, argumentos.estado)  # Carga el estado del sistema
+        servicio = ServicioTaquilla(estado, argumentos.procesos)  # Crea el servicio
+        try:
+            asyncio.run(servicio.servir(anfitrion or "127.0.0.1", int(puerto)))  # Atiende las conexiones
+        except KeyboardInterrupt:  # Si se detiene con Ctrl+C
+            print("Servicio detenido.")  # Mensaje de salida
+        finally:
+            servicio.cerrar()  # Cierra los procesos auxiliares
+            estado.cerrar()  # Cierra el almacén de ventas
+        sys.exit(0)  # Termina el programa
+    if argumentos.pedidos:  # Si se pidió la venta masiva
+        estado = cargar_estado(argumentos.datos, argumentos.ventas, argumentos.estado)  # Carga el estado del sistema
+        inicio = time.perf_counter()  # Momento de inicio
+        try:
+            resumen = procesar_pedidos(estado, argumentos.pedidos, argumentos.resultados or argumentos.pedidos + ".resultados.jsonl", argumentos.procesos)  # Procesa los pedidos
+        finally:
+            estado.cerrar()  # Cierra el almacén de ventas
+        print(f"Boletos vendidos: {resumen['vendidos']}, pedidos rechazados: {resumen['rechazados']}, tiempo: {time.perf_counter() - inicio:.2f} s")  # Muestra el resumen
+        sys.exit(0)  # Termina el programa
+    if argumentos.reporte_cierre:  # Si se pidió el reporte de cierre
+        estado = cargar_estado(argumentos.datos, argumentos.ventas, argumentos.estado)  # Carga el estado del sistema
+        try:
+            diferencias = mostrar_reporte_cierre(estado)  # Muestra y verifica el reporte
+        finally:
+            estado.cerrar()  # Cierra el almacén de ventas
+        sys.exit(1 if diferencias else 0)  # Termina con error si hubo diferencias
+    if argumentos.top_productos:  # Si se pidió el top de ventas
+        desde = fecha_a_segundos(argumentos.desde) if argumentos.desde else None  # Inicio del rango
+        hasta = fecha_a_segundos(argumentos.hasta, fin_del_dia=True) if argumentos.hasta else None  # Fin del rango
+        estado = cargar_estado(argumentos.datos, argumentos.ventas, argumentos.estado)  # Carga el estado del sistema
+        try:
+            obtener_top_productos_vendidos(estado.libro, argumentos.partido, desde, hasta)  # Muestra los productos más vendidos
+            obtener_top_restaurantes(estado.libro, estado.catalogo)  # Muestra los restaurantes que más vendieron
+        finally:
+            estado.cerrar()  # Cierra el almacén de ventas
+        sys.exit(0)  # Termina el programa
+    if argumentos.verificar_estadisticas:  # Si se pidió verificar las estadísticas
+        estado = cargar_estado(argumentos.datos, argumentos.ventas, argumentos.estado)  # Carga el estado del sistema
+        diferencias = verificar_estadisticas(estado)  # Verifica los contadores
+        estado.cerrar()  # Cierra el almacén de ventas
+        sys.exit(1 if diferencias else 0)  # Termina con error si hubo diferencias
+    if argumentos.perfil:  # Si se pidió perfilar la sesión
+        perfilador = cProfile.Profile()  # Crea el perfilador
+        try:
+            perfilador.runcall(main, argumentos.datos, argumentos.ventas, argumentos.estado)  # Ejecuta la sesión perfilada
+        finally:
+            perfilador.dump_stats(argumentos.perfil)  # Guarda el perfil para abrirlo con pstats o snakeviz
+            pstats.Stats(perfilador).sort_stats("cumulative").print_stats(20)  # Muestra las funciones más costosas
+    else:
+        main(argumentos.datos, argumentos.ventas, argumentos.estado)  # Ejecuta la función principal